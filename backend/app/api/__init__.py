@@ -1,5 +1,18 @@
 """API routers package."""
+from .audit import router as audit_router
 from .auth import router as auth_router
+from .cache import router as cache_router
 from .cattle import router as cattle_router
+from .medications import router as medications_router
+from .outbox import router as outbox_router
+from .reports import router as reports_router
 
-__all__ = ["auth_router", "cattle_router"]
+__all__ = [
+    "audit_router",
+    "auth_router",
+    "cache_router",
+    "cattle_router",
+    "medications_router",
+    "outbox_router",
+    "reports_router",
+]
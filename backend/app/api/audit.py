@@ -0,0 +1,58 @@
+"""Audit trail router."""
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.api.dependencies import current_user, require_admin
+from app.core.database import get_db
+from app.core.security import Principal
+from app.schemas.audit import AuditEntryResponse
+from app.services.audit import audit_trail, audit_writer
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+
+@router.get("/cattle/{cattle_id}", response_model=List[AuditEntryResponse])
+def cattle_audit(
+    cattle_id: UUID,
+    antes: Optional[datetime] = None,
+    antes_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Changes to an animal and its records, newest first.
+
+    Page with ``antes`` and ``antes_id``, the ``momento`` and ``id`` of the last entry seen.
+
+    Owners see the trail of their own animals, including deleted ones.
+    """
+    owner = None if principal.is_admin else principal.id
+    return audit_trail(
+        db, id_vaca=cattle_id, id_usuario=owner, antes=antes, antes_id=antes_id, limit=limit
+    )
+
+
+@router.get("/users/{user_id}", response_model=List[AuditEntryResponse])
+def user_audit(
+    user_id: UUID,
+    antes: Optional[datetime] = None,
+    antes_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Changes made by a user, newest first, paged like ``/audit/cattle``.
+
+    Users may only read their own.
+    """
+    if user_id != principal.id and not principal.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return audit_trail(db, id_actor=user_id, antes=antes, antes_id=antes_id, limit=limit)
+
+
+@router.get("/writer", dependencies=[Depends(require_admin)])
+def audit_writer_status():
+    """Audit queue depth and COPY counters."""
+    return audit_writer.snapshot()
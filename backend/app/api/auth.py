@@ -1,16 +1,19 @@
 """Authentication router."""
+from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, lazyload
+from app.api.dependencies import current_user, require_admin
 from app.core.database import get_db
-from app.models.usuario import Usuario
-from app.schemas.auth import UserLogin, UserRegister, Token, UserResponse
+from app.core.security import Principal
+from app.models.usuario import Usuario, UserRole
+from app.schemas.auth import UserLogin, UserRegister, UserRoleUpdate, Token, UserResponse
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(user_data: UserRegister, db: Session = Depends(get_db)):
-    """Register a new user."""
+    """Register a new field user; only an admin can grant the admin role."""
     # Check if user exists
     existing = db.query(Usuario).filter(Usuario.email == user_data.email).first()
     if existing:
@@ -23,7 +26,7 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     user = Usuario(
         nombre=user_data.nombre,
         email=user_data.email,
-        rol=user_data.rol
+        rol=UserRole.FIELD
     )
     user.set_password(user_data.password)
     
@@ -56,10 +59,26 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(db: Session = Depends(get_db)):
-    """Get current user info (mock)."""
-    # En producción validaría el JWT del header
-    user = db.query(Usuario).first()
+def get_current_user(principal: Principal = Depends(current_user), db: Session = Depends(get_db)):
+    """Get the user named by the bearer token."""
+    # Sin cargar el hato ni los reportes del usuario
+    user = db.get(Usuario, principal.id, options=[lazyload("*")])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+
+@router.put(
+    "/users/{user_id}/role",
+    response_model=UserResponse,
+    dependencies=[Depends(require_admin)],
+)
+def set_user_role(user_id: UUID, payload: UserRoleUpdate, db: Session = Depends(get_db)):
+    """Grant or revoke the admin role; it applies to tokens issued afterwards."""
+    user = db.get(Usuario, user_id, options=[lazyload("*")])
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.rol = UserRole(payload.rol)
+    db.commit()
+    db.refresh(user)
+    return user
@@ -0,0 +1,13 @@
+"""In-process read cache router."""
+from fastapi import APIRouter, Depends
+from app.api.coalescing import read_coalescer
+from app.api.dependencies import require_admin
+from app.services.herd_stats import stats_cache
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+
+@router.get("/stats", dependencies=[Depends(require_admin)])
+def get_cache_stats():
+    """Hit, miss and coalesced-request counters of the coalesced reads and the herd stats cache."""
+    return {"lecturas": read_coalescer.snapshot(), "herd_stats": stats_cache.stats.as_dict()}
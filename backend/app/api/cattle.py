@@ -1,127 +1,615 @@
 """Cattle management router."""
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import SessionLocal, db_session, get_db
+from app.core.security import Principal
+from app.models.reporte import FormatoReporte
 from app.models.vaca import Vaca
 from app.models.registro_salud import RegistroSalud
-from app.models.registro_peso import RegistroPeso
+from app.models.alerta_peso import AlertaPeso
+from app.models.registro_peso import RegistroPeso, UnidadPeso
+from app.api.coalescing import read_coalescer
+from app.api.dependencies import cancellable_db, current_user, require_admin
 from app.schemas.cattle import (
-    CattleCreate, 
+    ArchiveRunResponse,
+    BatchCreateResponse,
+    BulkDeleteResponse,
+    BulkUpdateResponse,
+    CattleBatchCreate,
+    CattleBatchGet,
+    CattleBatchGetResponse,
+    CattleBulkUpdate,
+    CattleCardResponse,
+    CattleCreate,
+    CattleSelection,
     CattleUpdate, 
     CattleResponse,
+    FollowUpDueResponse,
     HealthRecordCreate,
-    WeightRecordCreate
+    HerdStatsResponse,
+    RollupBackfillResponse,
+    WeightAlertResponse,
+    WeightRecordCreate,
+    WeightRollupResponse,
+    WithdrawalResponse
 )
+from app.services.follow_up import due_window, list_due, schedule_follow_up
+from app.services import cattle_bulk
+from app.services.archive import DEFAULT_BATCH_SIZE, archive_inactive, cattle_with_archive
+from app.services.cattle_card import DEFAULT_HISTORY, MAX_HISTORY, cattle_card
+from app.services.columnar import ColumnarUnavailable, require_pyarrow, stream_columnar
+from app.services.herd_stats import get_herd_stats
+from app.services.latest import advance_latest_health, advance_latest_weights, repair_latest
+from app.services.reports import EXPORT_TABLES
+from app.services.weight_anomaly import process_readings, replay
+from app.services.weight_ingest import QueueFull, WeightReading, weight_queue
+from app.services.weight_rollup import backfill_rollups, daily_series
+from app.services.withdrawal import apply_withdrawal, list_under_withdrawal
 
 router = APIRouter(prefix="/cattle", tags=["cattle"])
 
+# Interactive reads are cancelled when the client disconnects; single-row
+# writes give up quickly on a locked row instead of queueing behind it.
+# Dashboard reads go through read_coalescer, which opens its own session.
+read_db = cancellable_db(statement_timeout_ms=settings.database.read_statement_timeout_ms)
+write_db = db_session(lock_timeout_ms=settings.database.write_lock_timeout_ms)
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _read_etag(cattle) -> str:
+    """Weak validator of the whole ``GET`` body, for ``If-None-Match`` only.
+
+    ``version`` only tracks edits; the latest weight and health fields kept by
+    ingest bump ``fecha_actualizacion`` instead, and archiving sets ``archivada``.
+    """
+    changed = int(cattle.fecha_actualizacion.timestamp() * 1_000_000)
+    archived = int(getattr(cattle, "archivada", False))
+    return f'W/"{cattle.version}-{changed}-{archived}"'
+
+
+def _if_match_version(if_match: Optional[str]) -> Optional[int]:
+    """Version demanded by an ``If-Match`` header, ``None`` when absent or ``*``."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    # If-Match uses strong comparison: weak or foreign tags can never match
+    if not (tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit()):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED, detail="ETag does not match"
+        )
+    return int(tag[1:-1])
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _owned(db: Session, principal: Principal, cattle_id) -> None:
+    """404 unless *cattle_id* is an animal of the caller."""
+    found = db.scalar(
+        select(Vaca.id).where(Vaca.id == cattle_id, Vaca.id_usuario == principal.id)
+    )
+    if found is None:
+        raise HTTPException(status_code=404, detail="Cattle not found")
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    try:
+        return cattle_bulk.parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
 
 @router.get("/", response_model=List[CattleResponse])
 def list_cattle(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     estado: str = None,
-    db: Session = Depends(get_db)
+    include_archived: bool = False,
+    fields: Optional[str] = None,
+    principal: Principal = Depends(current_user),
 ):
-    """List all cattle with optional filters."""
-    query = db.query(Vaca)
-    
-    if estado:
-        query = query.filter(Vaca.estado == estado)
-    
-    cattle = query.offset(skip).limit(limit).all()
-    return cattle
+    """List the caller's cattle with optional filters.
+
+    ``fields=a,b`` reads and returns only those columns (plus ``id``).
+    """
+    names = _parse_fields(fields)
+    columns = None
+    if names:
+        # identificador is always read because the listing is ordered by it
+        columns = [name for name in dict.fromkeys([*names, "identificador"]) if name != "archivada"]
+    def criteria(entity):
+        where = [entity.id_usuario == principal.id]
+        return [*where, entity.estado == estado] if estado else where
+
+    stmt = cattle_with_archive(criteria, include_archived, columns)
+
+    def compute(db: Session):
+        rows = db.execute(stmt.order_by("identificador").offset(skip).limit(limit)).all()
+        if names:
+            return JSONResponse(jsonable_encoder(cattle_bulk.sparse_rows(rows, names)))
+        return rows
+
+    return read_coalescer.respond(request, principal.id, compute, List[CattleResponse])
+
+
+@router.get("/stats", response_model=HerdStatsResponse)
+def herd_stats(request: Request, principal: Principal = Depends(current_user)):
+    """Composition of the caller's herd by estado, sexo, raza and age band (cached)."""
+    return read_coalescer.respond(
+        request, principal.id, lambda db: get_herd_stats(db, principal.id), HerdStatsResponse
+    )
+
+
+@router.post(
+    "/archive", response_model=ArchiveRunResponse, dependencies=[Depends(require_admin)]
+)
+def archive_cattle(batch_size: int = DEFAULT_BATCH_SIZE, max_batches: Optional[int] = None):
+    """Move sold and deceased animals and their history to the archive tables."""
+    if batch_size < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="batch_size must be positive")
+    return {"archivadas": archive_inactive(SessionLocal, batch_size, max_batches)}
+
+
+@router.post("/maintenance/latest", dependencies=[Depends(require_admin)])
+def repair_latest_fields(db: Session = Depends(get_db)):
+    """Recompute the denormalized latest weight and health fields set-wise."""
+    changed = repair_latest(db)
+    db.commit()
+    return changed
+
+
+@router.post(
+    "/maintenance/rollups",
+    response_model=RollupBackfillResponse,
+    dependencies=[Depends(require_admin)],
+)
+def backfill_weight_rollups(desde: Optional[date] = None, hasta: Optional[date] = None):
+    """Rebuild the daily weight rollups for a date range (all history by default)."""
+    return backfill_rollups(SessionLocal, desde, hasta)
+
+
+@router.get("/weights/daily", response_model=List[WeightRollupResponse])
+def owner_weight_series(
+    request: Request,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    periodo: str = "dia",
+    principal: Principal = Depends(current_user),
+):
+    """Weight min/max/average of the caller's herd per day, week, month or year."""
+    def compute(db: Session):
+        try:
+            return daily_series(
+                db, id_usuario=principal.id, desde=desde, hasta=hasta, periodo=periodo
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    return read_coalescer.respond(request, principal.id, compute, List[WeightRollupResponse])
+
+
+@router.get("/withdrawals", response_model=List[WithdrawalResponse])
+def list_withdrawals(
+    request: Request,
+    fecha: Optional[date] = None,
+    principal: Principal = Depends(current_user),
+):
+    """The caller's animals that cannot be sold or milked on a date because of a treatment."""
+    return read_coalescer.respond(
+        request,
+        principal.id,
+        lambda db: list_under_withdrawal(db, principal.id, fecha),
+        List[WithdrawalResponse],
+    )
+
+
+@router.get("/alerts", response_model=List[WeightAlertResponse])
+def list_weight_alerts(
+    request: Request,
+    id_vaca: Optional[str] = None,
+    desde: Optional[date] = None,
+    incluir_atendidas: bool = False,
+    limit: int = 100,
+    principal: Principal = Depends(current_user),
+):
+    """List weight-loss alerts raised at ingest on the caller's animals, newest first."""
+    stmt = (
+        select(*AlertaPeso.__table__.columns, Vaca.identificador)
+        .join(Vaca, Vaca.id == AlertaPeso.id_vaca)
+        .where(Vaca.id_usuario == principal.id)
+    )
+    if not incluir_atendidas:
+        stmt = stmt.where(AlertaPeso.atendida.is_(False))
+    if id_vaca:
+        stmt = stmt.where(AlertaPeso.id_vaca == id_vaca)
+    if desde:
+        stmt = stmt.where(AlertaPeso.fecha >= desde)
+    stmt = stmt.order_by(AlertaPeso.fecha.desc()).limit(limit)
+    return read_coalescer.respond(
+        request, principal.id, lambda db: db.execute(stmt).all(), List[WeightAlertResponse]
+    )
+
+
+@router.post("/alerts/replay", dependencies=[Depends(require_admin)])
+def replay_weight_alerts(batch_size: int = 10_000):
+    """Rebuild detector state and alerts by streaming the weight history."""
+    return replay(SessionLocal, batch_size=batch_size)
+
+
+@router.get("/export/{entidad}", dependencies=[Depends(require_admin)])
+def export_table(entidad: str, formato: str = "parquet"):
+    """Stream a whole table as Parquet or Arrow IPC, one batch at a time."""
+    table = EXPORT_TABLES.get(entidad)
+    if table is None:
+        raise HTTPException(status_code=404, detail="Unknown export entity")
+    try:
+        fmt = FormatoReporte(formato)
+    except ValueError:
+        fmt = None
+    if fmt is None or not fmt.es_columnar():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="formato must be 'parquet' or 'arrow'"
+        )
+    try:
+        require_pyarrow()
+    except ColumnarUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+
+    return StreamingResponse(
+        stream_columnar(SessionLocal, table, fmt, batch_size=settings.reports.batch_size),
+        media_type=fmt.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{entidad}.{fmt.extension}"'},
+    )
 
 
 @router.post("/", response_model=CattleResponse, status_code=status.HTTP_201_CREATED)
-def create_cattle(cattle_data: CattleCreate, db: Session = Depends(get_db)):
-    """Create a new cattle record."""
-    # Check if identificador exists
-    existing = db.query(Vaca).filter(Vaca.identificador == cattle_data.identificador).first()
-    if existing:
+def create_cattle(
+    cattle_data: CattleCreate,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Create a new cattle record, owned by the caller, in a single INSERT ... RETURNING."""
+    try:
+        cattle = cattle_bulk.create_cattle(db, cattle_data, principal.id)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Owner account no longer exists")
+    if cattle is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cattle with this identificador already exists"
         )
-    
-    # Get first user as owner (mock)
-    from app.models.usuario import Usuario
-    user = db.query(Usuario).first()
-    if not user:
-        raise HTTPException(status_code=400, detail="No users in system")
-    
-    cattle = Vaca(
-        identificador=cattle_data.identificador,
-        nombre=cattle_data.nombre,
-        raza=cattle_data.raza,
-        fecha_nacimiento=cattle_data.fecha_nacimiento,
-        sexo=cattle_data.sexo,
-        peso_actual=cattle_data.peso_actual,
-        id_usuario=user.id
-    )
-    
-    db.add(cattle)
     db.commit()
-    db.refresh(cattle)
     
     return cattle
 
 
-@router.get("/{cattle_id}", response_model=CattleResponse)
-def get_cattle(cattle_id: str, db: Session = Depends(get_db)):
-    """Get cattle by ID."""
-    cattle = db.query(Vaca).filter(Vaca.id == cattle_id).first()
+@router.post("/batch", response_model=BatchCreateResponse)
+def create_cattle_batch(
+    payload: CattleBatchCreate,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Register many animals (e.g. a calving season) with per-item results."""
+    try:
+        resultados = cattle_bulk.create_cattle_batch(db, payload.items, principal.id)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Owner account no longer exists")
+    db.commit()
+    creadas = sum(1 for item in resultados if item["estado"] == cattle_bulk.CREATED)
+    return {
+        "creadas": creadas,
+        "duplicadas": len(resultados) - creadas,
+        "resultados": resultados,
+    }
+
+
+@router.post("/batch-get", response_model=CattleBatchGetResponse)
+def batch_get_cattle(
+    payload: CattleBatchGet,
+    fields: Optional[str] = None,
+    include_archived: bool = False,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(read_db)
+):
+    """Look many of the caller's animals up by id and/or identificador in one query.
+
+    With ``include_archived`` archived animals are found too, flagged ``archivada``.
+    """
+    names = _parse_fields(fields)
+    rows, faltantes = cattle_bulk.batch_get(
+        db, principal.id, payload.ids, payload.identificadores, names, include_archived
+    )
+    if names:
+        return JSONResponse(
+            jsonable_encoder({"vacas": cattle_bulk.sparse_rows(rows, names), "faltantes": faltantes})
+        )
+    return {"vacas": rows, "faltantes": faltantes}
+
+
+def _load_cattle(
+    db: Session, principal: Principal, cattle_id: str, include_archived: bool = False
+):
+    if include_archived:
+        stmt = cattle_with_archive(
+            lambda entity: [entity.id == cattle_id, entity.id_usuario == principal.id],
+            include_archived=True,
+        )
+        cattle = db.execute(stmt).first()
+    else:
+        cattle = (
+            db.query(Vaca).filter(Vaca.id == cattle_id, Vaca.id_usuario == principal.id).first()
+        )
     if not cattle:
         raise HTTPException(status_code=404, detail="Cattle not found")
     return cattle
 
 
+@router.get("/{cattle_id}", response_model=CattleResponse)
+def get_cattle(
+    cattle_id: str,
+    response: Response,
+    include_archived: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(read_db)
+):
+    """Get cattle by ID, answering 304 to a matching ``If-None-Match``.
+
+    The ETag here is weak and covers the whole body; conditional updates send
+    ``If-Match: "<version>"`` with the ``version`` field instead.
+    """
+    cattle = _load_cattle(db, principal, cattle_id, include_archived)
+    etag = _read_etag(cattle)
+    if _not_modified(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return cattle
+
+
+@router.get("/{cattle_id}/card", response_model=CattleCardResponse)
+def get_cattle_card(
+    cattle_id: UUID,
+    n: int = Query(DEFAULT_HISTORY, ge=1, le=MAX_HISTORY),
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(read_db)
+):
+    """Detail card with the last *n* weights and health events, in one query."""
+    card = cattle_card(db, principal.id, cattle_id, n)
+    if card is None:
+        raise HTTPException(status_code=404, detail="Cattle not found")
+    return card
+
+
+@router.get("/{cattle_id}/weights/daily", response_model=List[WeightRollupResponse])
+def cattle_weight_series(
+    cattle_id: UUID,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    periodo: str = "dia",
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(read_db)
+):
+    """Growth chart data for one animal, read from the daily rollup."""
+    _owned(db, principal, cattle_id)
+    try:
+        return daily_series(db, id_vaca=cattle_id, desde=desde, hasta=hasta, periodo=periodo)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
 @router.put("/{cattle_id}", response_model=CattleResponse)
 def update_cattle(
     cattle_id: str, 
     cattle_data: CattleUpdate, 
-    db: Session = Depends(get_db)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(write_db)
 ):
-    """Update cattle information."""
-    cattle = db.query(Vaca).filter(Vaca.id == cattle_id).first()
-    if not cattle:
-        raise HTTPException(status_code=404, detail="Cattle not found")
-    
+    """Update cattle information.
+
+    With ``If-Match: "<version>"`` the update only applies if nobody changed
+    the animal since it was read; otherwise it fails with 412.
+    """
+    version = _if_match_version(if_match)
     update_data = cattle_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(cattle, field, value)
-    
+    if not update_data:
+        cattle = _load_cattle(db, principal, cattle_id)
+        if version is not None and cattle.version != version:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED, detail="ETag does not match"
+            )
+        response.headers["ETag"] = _etag(cattle.version)
+        return cattle
+
+    owned = [Vaca.id == cattle_id, Vaca.id_usuario == principal.id]
+    rows = cattle_bulk.update_cattle(db, owned, update_data, version)
+    if not rows:
+        db.rollback()
+        rejection = cattle_bulk.explain_rejections(
+            db, principal.id, [cattle_id], rows, update_data.get("estado"), version
+        )
+        if rejection and rejection[0][1] == cattle_bulk.VERSION_MISMATCH:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Cattle was modified by another request; reload and retry"
+            )
+        if rejection and rejection[0][1] == cattle_bulk.UNDER_WITHDRAWAL:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Cattle is under a drug withdrawal period and cannot be sold"
+            )
+        if rejection and rejection[0][1] == cattle_bulk.INVALID_TRANSITION:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Invalid estado transition to '{update_data['estado']}'"
+            )
+        raise HTTPException(status_code=404, detail="Cattle not found")
     db.commit()
-    db.refresh(cattle)
-    
-    return cattle
+    response.headers["ETag"] = _etag(rows[0].version)
+    return rows[0]
 
 
 @router.delete("/{cattle_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_cattle(cattle_id: str, db: Session = Depends(get_db)):
-    """Delete cattle record."""
-    cattle = db.query(Vaca).filter(Vaca.id == cattle_id).first()
-    if not cattle:
+def delete_cattle(
+    cattle_id: str,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(write_db)
+):
+    """Delete cattle record; its history goes through ON DELETE CASCADE."""
+    owned = [Vaca.id == cattle_id, Vaca.id_usuario == principal.id]
+    if not cattle_bulk.delete_where(db, owned):
+        db.rollback()
         raise HTTPException(status_code=404, detail="Cattle not found")
-    
-    db.delete(cattle)
     db.commit()
 
 
+@router.patch("/bulk", response_model=BulkUpdateResponse)
+def bulk_update_cattle(
+    payload: CattleBulkUpdate,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Apply the same change (e.g. a state transition) to many of the caller's animals."""
+    cambios = payload.cambios.model_dump(exclude_unset=True)
+    if not cambios:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cambios is empty")
+
+    criteria = cattle_bulk.selection_criteria(payload, principal.id)
+    rows = cattle_bulk.update_cattle(db, criteria, cambios)
+    db.commit()
+    rechazadas = []
+    if payload.ids is not None:
+        rechazadas = [
+            {"id": cattle_id, "motivo": motivo}
+            for cattle_id, motivo in cattle_bulk.explain_rejections(
+                db, principal.id, payload.ids, rows, cambios.get("estado")
+            )
+        ]
+    return {"actualizadas": rows, "rechazadas": rechazadas}
+
+
+@router.post("/bulk-delete", response_model=BulkDeleteResponse)
+def bulk_delete_cattle(
+    selection: CattleSelection,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete many of the caller's animals, by ids or by filter, in one statement."""
+    eliminados = cattle_bulk.delete_cattle(db, selection, principal.id)
+    db.commit()
+    return {"eliminados": eliminados}
+
+
 @router.post("/health-records", status_code=status.HTTP_201_CREATED)
-def create_health_record(record: HealthRecordCreate, db: Session = Depends(get_db)):
+def create_health_record(
+    record: HealthRecordCreate,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
     """Create health record."""
-    health_record = RegistroSalud(**record.model_dump())
+    _owned(db, principal, record.id_vaca)
+    health_record = RegistroSalud(**record.model_dump(), id_usuario=principal.id)
+    try:
+        apply_withdrawal(db, health_record)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    schedule_follow_up(db, health_record)
     db.add(health_record)
+    advance_latest_health(db, [(health_record.id_vaca, health_record.fecha, health_record.tipo)])
     db.commit()
     return {"message": "Health record created"}
 
 
 @router.post("/weight-records", status_code=status.HTTP_201_CREATED)
-def create_weight_record(record: WeightRecordCreate, db: Session = Depends(get_db)):
-    """Create weight record."""
-    weight_record = RegistroPeso(**record.model_dump())
+def create_weight_record(
+    record: WeightRecordCreate,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Create weight record.
+
+    In write-behind mode the reading is acknowledged with 202 once validated and
+    written by the background flusher within ``max_flush_delay_ms`` (bursts of
+    automatic readings may be compacted into one row).
+    """
+    if weight_queue.enabled:
+        try:
+            reading = WeightReading.from_payload(record.model_dump(), principal.id)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        try:
+            weight_queue.submit(reading)
+        except QueueFull as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(exc),
+                headers={"Retry-After": "1"},
+            )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "message": "Weight record accepted",
+                "id": str(reading.id),
+                "max_flush_delay_ms": weight_queue.max_flush_delay_ms,
+            },
+        )
+
+    _owned(db, principal, record.id_vaca)
+    weight_record = RegistroPeso(**record.model_dump(), id_usuario=principal.id)
     db.add(weight_record)
+    peso_kg = UnidadPeso(record.unidad).to_kilos(record.peso)
+    kilos = [(weight_record.id_vaca, weight_record.fecha, peso_kg)]
+    advance_latest_weights(db, kilos)
+    process_readings(db, kilos)
     db.commit()
     return {"message": "Weight record created"}
+
+
+@router.get("/weight-records/queue", dependencies=[Depends(require_admin)])
+def weight_queue_status():
+    """Write-behind queue depth and flush counters."""
+    return weight_queue.snapshot()
+
+
+@router.get("/health/due", response_model=List[FollowUpDueResponse])
+def list_due_follow_ups(
+    request: Request,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    vencidos: bool = False,
+    limit: int = 500,
+    principal: Principal = Depends(current_user),
+):
+    """List the caller's health follow-ups due in a date range (defaults to the coming week)."""
+    try:
+        start, end = due_window(desde, hasta)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return read_coalescer.respond(
+        request,
+        principal.id,
+        lambda db: list_due(db, principal.id, start, end, include_overdue=vencidos, limit=limit),
+        List[FollowUpDueResponse],
+    )
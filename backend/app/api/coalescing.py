@@ -0,0 +1,140 @@
+"""Coalescing of identical concurrent read requests.
+
+A dashboard refresh sends bursts of identical requests within milliseconds.
+:class:`ReadCoalescer` keys each read by method, path, normalized query
+string and owner: the first request runs the query and serializes the
+response once, and identical requests arriving while it runs wait for it and
+receive the same bytes. With ``CacheConfig.read_coalesce_ttl_ms`` > 0 those
+bytes are also reused for that long, so reads may lag writes by that much.
+
+The shared computation opens its own session with the read statement timeout
+instead of using the first caller's, so a client that disconnects does not
+cancel the query other callers are waiting on.
+"""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheStats, SingleFlightCache
+from app.core.config import settings
+from app.core.database import LOCK_TIMEOUT, STATEMENT_TIMEOUT, SessionLocal
+
+# body, status code, media type
+_Serialized = Tuple[bytes, int, str]
+
+
+def read_session() -> Session:
+    """Session with the interactive read timeouts, not bound to any request."""
+    return SessionLocal(
+        info={
+            STATEMENT_TIMEOUT: settings.database.read_statement_timeout_ms,
+            LOCK_TIMEOUT: settings.database.lock_timeout_ms,
+        }
+    )
+
+
+def normalized_query(request: Request) -> Tuple[Tuple[str, str], ...]:
+    """Query parameters sorted by name with blanks dropped: ``?b=1&a=`` is ``?b=1``."""
+    params = request.query_params.multi_items()
+    return tuple(sorted((name, value) for name, value in params if value))
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _serialize(result: Any, response_model: Any) -> _Serialized:
+    """Render *result* the way the route's ``response_model`` would."""
+    if isinstance(result, Response):
+        return bytes(result.body), result.status_code, result.media_type or JSONResponse.media_type
+    if response_model is None:
+        return JSONResponse(jsonable_encoder(result)).body, 200, JSONResponse.media_type
+    adapter = _adapter(response_model)
+    value = adapter.validate_python(result, from_attributes=True)
+    return adapter.dump_json(value, by_alias=True), 200, JSONResponse.media_type
+
+
+class ReadCoalescer:
+    """Shares one computation and its serialized response between identical reads.
+
+    Each route template gets its own :class:`SingleFlightCache`, so hits and
+    coalesced requests are counted per route.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 0.0,
+        max_entries: int = 1024,
+        session_factory: Callable[[], Session] = read_session,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._routes: Dict[str, SingleFlightCache] = {}
+
+    def _flights(self, route: str) -> SingleFlightCache:
+        with self._lock:
+            flights = self._routes.get(route)
+            if flights is None:
+                flights = SingleFlightCache(self.ttl_seconds, self.max_entries)
+                self._routes[route] = flights
+            return flights
+
+    def respond(
+        self,
+        request: Request,
+        owner: Optional[uuid.UUID],
+        compute: Callable[[Session], Any],
+        response_model: Any = None,
+    ) -> Response:
+        """Response of ``compute(db)``, shared with identical concurrent requests of *owner*.
+
+        Errors raised by *compute*, ``HTTPException`` included, reach every
+        waiting request.
+        """
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        key = (request.method, request.url.path, normalized_query(request), owner)
+
+        def run() -> _Serialized:
+            with self.session_factory() as db:
+                return _serialize(compute(db), response_model)
+
+        body, status_code, media_type = self._flights(route).get_or_compute(key, run)
+        return Response(content=body, status_code=status_code, media_type=media_type)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            routes = list(self._routes.values())
+        for flights in routes:
+            flights.invalidate()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals and per-route counters: ``coalesced`` requests waited on another's query."""
+        with self._lock:
+            routes = {route: flights.stats.as_dict() for route, flights in self._routes.items()}
+        total = CacheStats()
+        for counters in routes.values():
+            for name, count in counters.items():
+                setattr(total, name, getattr(total, name) + count)
+        return {"ttl_seconds": self.ttl_seconds, **total.as_dict(), "routes": routes}
+
+
+read_coalescer = ReadCoalescer(
+    ttl_seconds=settings.cache.read_coalesce_ttl_ms / 1000,
+    max_entries=settings.cache.read_coalesce_max_entries,
+)
+
+
+__all__ = ["ReadCoalescer", "normalized_query", "read_coalescer", "read_session"]
@@ -0,0 +1,82 @@
+"""Shared route dependencies."""
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+from app.core.database import cancel_running_query, db_session
+from app.core.security import InvalidToken, Principal, decode_access_token
+from app.services import audit
+
+logger = logging.getLogger(__name__)
+
+DISCONNECT_POLL_SECONDS = 0.25
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def _cancel_when_disconnected(request: Request, db: Session) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+    if cancel_running_query(db):
+        logger.info("Cancelled query for disconnected client on %s", request.url.path)
+
+
+def cancellable_db(
+    *,
+    statement_timeout_ms: Optional[int] = None,
+    lock_timeout_ms: Optional[int] = None,
+) -> Callable[..., AsyncIterator[Session]]:
+    """Session dependency whose running query is cancelled if the client goes away.
+
+    The sync route runs in the threadpool while a watcher task on the event
+    loop polls for ``http.disconnect`` and sends PostgreSQL a cancel request.
+    """
+    session_dependency = db_session(
+        statement_timeout_ms=statement_timeout_ms, lock_timeout_ms=lock_timeout_ms
+    )
+
+    async def dependency(
+        request: Request, db: Session = Depends(session_dependency)
+    ) -> AsyncIterator[Session]:
+        watcher = asyncio.create_task(_cancel_when_disconnected(request, db))
+        try:
+            yield db
+        finally:
+            watcher.cancel()
+
+    return dependency
+
+
+async def current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Principal:
+    """Principal of the bearer token; every query of the request is scoped to its id.
+
+    Runs on the event loop so the audit actor it sets is inherited by the
+    route and the sync dependencies that run in the threadpool after it.
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        principal = decode_access_token(credentials.credentials)
+    except InvalidToken as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(exc),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    audit.actor.set(principal.id)
+    return principal
+
+
+def require_admin(principal: Principal = Depends(current_user)) -> Principal:
+    """Restrict maintenance routes that act on every owner's data to admins."""
+    if not principal.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return principal
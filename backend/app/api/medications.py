@@ -0,0 +1,40 @@
+"""Medication catalog router."""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.api.dependencies import current_user
+from app.core.database import get_db
+from app.models.medicamento import Medicamento
+from app.schemas.medications import MedicationCreate, MedicationResponse
+
+# Shared catalog: any authenticated user reads and extends it
+router = APIRouter(
+    prefix="/medications", tags=["medications"], dependencies=[Depends(current_user)]
+)
+
+
+@router.get("/", response_model=List[MedicationResponse])
+def list_medications(db: Session = Depends(get_db)):
+    """List the medication catalog."""
+    return db.scalars(select(Medicamento).order_by(Medicamento.nombre)).all()
+
+
+@router.post("/", response_model=MedicationResponse, status_code=status.HTTP_201_CREATED)
+def create_medication(payload: MedicationCreate, db: Session = Depends(get_db)):
+    """Add a medication and its withdrawal periods to the catalog.
+
+    Withdrawal end dates are computed when treatments are recorded, so later
+    catalog changes do not move the dates of existing treatments.
+    """
+    medicamento = Medicamento(**payload.model_dump())
+    medicamento.nombre = medicamento.nombre.strip()
+    db.add(medicamento)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Medication already exists")
+    db.refresh(medicamento)
+    return medicamento
@@ -0,0 +1,14 @@
+"""Change-event outbox router."""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.api.dependencies import require_admin
+from app.core.database import get_db
+from app.services.outbox import outbox_dispatcher, outbox_status
+
+router = APIRouter(prefix="/outbox", tags=["outbox"])
+
+
+@router.get("/status", dependencies=[Depends(require_admin)])
+def get_outbox_status(db: Session = Depends(get_db)):
+    """Backlog size and lag of undelivered change events, plus dispatcher counters."""
+    return {**outbox_status(db), "dispatcher": outbox_dispatcher.snapshot()}
@@ -0,0 +1,190 @@
+"""Reports router."""
+import asyncio
+import json
+import time
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from app.api.dependencies import current_user
+from app.core.database import SessionLocal, get_db
+from app.core.security import Principal
+from app.models.reporte import EstadoReporte, FormatoReporte, Reporte, TipoReporte
+from app.schemas.reports import ReportCreate, ReportResponse
+from app.services.columnar import ColumnarUnavailable, require_pyarrow
+from app.services.report_events import ReportEvent, report_events
+from app.services.reports import report_source, reuse_artifact, run_report, storage
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+SSE_HEARTBEAT_SECONDS = 15
+# Silence after which a report no worker of this process publishes for is given up on
+SSE_STALE_SECONDS = 60
+
+
+def _to_response(reporte: Reporte) -> ReportResponse:
+    return ReportResponse(
+        id=reporte.id,
+        tipo=reporte.tipo.value,
+        formato=reporte.formato.value,
+        estado=reporte.estado.value,
+        parametros=reporte.parametros or {},
+        url_descarga=f"/reports/{reporte.id}/download" if reporte.es_descargable() else None,
+        url_eventos=(
+            f"/reports/{reporte.id}/events"
+            if reporte.estado in (EstadoReporte.PENDIENTE, EstadoReporte.PROCESANDO)
+            else None
+        ),
+        fecha_solicitud=reporte.fecha_solicitud,
+        fecha_generacion=reporte.fecha_generacion,
+    )
+
+
+def _get_report(report_id: UUID, principal: Principal, db: Session) -> Reporte:
+    reporte = db.get(Reporte, report_id)
+    if not reporte or reporte.id_usuario != principal.id:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return reporte
+
+
+@router.post("/", response_model=ReportResponse, status_code=status.HTTP_202_ACCEPTED)
+def request_report(
+    payload: ReportCreate,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a report over the caller's data, or complete it at once from a cached artifact."""
+    tipo = TipoReporte(payload.tipo)
+    formato = FormatoReporte(payload.formato)
+    try:
+        report_source(tipo, payload.parametros, principal.id)
+        if formato.es_columnar():
+            require_pyarrow()
+    except ColumnarUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    reporte = Reporte.crear(
+        id_usuario=principal.id, tipo=tipo, parametros=payload.parametros, formato=formato
+    )
+    reused = reuse_artifact(db, reporte)
+    db.add(reporte)
+    db.commit()
+    db.refresh(reporte)
+
+    if reused:
+        response.status_code = status.HTTP_200_OK
+    else:
+        background_tasks.add_task(run_report, reporte.id)
+    return _to_response(reporte)
+
+
+@router.get("/{report_id}", response_model=ReportResponse)
+def get_report(
+    report_id: UUID,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Get report status."""
+    return _to_response(_get_report(report_id, principal, db))
+
+
+@router.get("/{report_id}/download")
+def download_report(
+    report_id: UUID,
+    principal: Principal = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """Download a completed report artifact."""
+    reporte = _get_report(report_id, principal, db)
+    if not reporte.es_descargable():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Report is not ready")
+    path = storage.resolve(reporte.url_s3)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Report artifact was evicted")
+    storage.touch(path)
+    return FileResponse(
+        path,
+        media_type=reporte.formato.media_type,
+        filename=f"{reporte.tipo.value}-{reporte.id}.{reporte.formato.extension}",
+    )
+
+
+def _stored_event(report_id: UUID, principal: Principal) -> Optional[ReportEvent]:
+    with SessionLocal() as db:
+        reporte = db.get(Reporte, report_id)
+        if reporte is None or reporte.id_usuario != principal.id:
+            return None
+        return ReportEvent(reporte.estado)
+
+
+def _sse(report_id: UUID, event: ReportEvent) -> str:
+    data = event.as_dict()
+    if event.estado is EstadoReporte.COMPLETADO:
+        data["url_descarga"] = f"/reports/{report_id}/download"
+    return f"event: {event.estado.value}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/{report_id}/events")
+async def report_progress(
+    report_id: UUID, request: Request, principal: Principal = Depends(current_user)
+):
+    """Stream progress as Server-Sent Events until the report completes or fails.
+
+    Events come from the in-process worker. On each heartbeat the stored state
+    is re-read, so the stream also ends when the report was finished by another
+    process, or with the stored state once it is stale: no worker here has
+    published for it in ``SSE_STALE_SECONDS``. Clients then poll ``GET /reports/{id}``.
+    """
+    queue = report_events.subscribe(report_id)
+    try:
+        stored = await run_in_threadpool(_stored_event, report_id, principal)
+    except BaseException:
+        report_events.unsubscribe(report_id, queue)
+        raise
+    if stored is None:
+        report_events.unsubscribe(report_id, queue)
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    async def stream():
+        try:
+            if stored.final or report_events.last(report_id) is None:
+                yield _sse(report_id, stored)
+                if stored.final:
+                    return
+            silent_since = time.monotonic()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    current = await run_in_threadpool(_stored_event, report_id, principal)
+                    if current is None:
+                        return
+                    stale = (
+                        report_events.last(report_id) is None
+                        and time.monotonic() - silent_since >= SSE_STALE_SECONDS
+                    )
+                    if current.final or stale:
+                        yield _sse(report_id, current)
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                silent_since = time.monotonic()
+                yield _sse(report_id, event)
+                if event.final:
+                    return
+        finally:
+            report_events.unsubscribe(report_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,93 @@
+"""In-process caching primitives shared by the read endpoints."""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+@dataclass
+class _InFlight:
+    """A computation currently running on behalf of every caller of a key."""
+
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how requests were served."""
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class SingleFlightCache:
+    """Thread-safe TTL cache that computes each missing key only once.
+
+    Concurrent callers asking for a key that is being computed wait for the
+    running computation instead of starting their own. :meth:`invalidate`
+    drops every entry and prevents computations started before it from being
+    stored, so a write is never hidden behind a result computed earlier.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self._generation = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.stats.hits += 1
+                return entry[1]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+                generation = self._generation
+                self.stats.misses += 1
+            else:
+                self.stats.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = compute()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if call.error is None and self.ttl_seconds > 0 and generation == self._generation:
+                    if key not in self._entries and len(self._entries) >= self.max_entries:
+                        self._entries.pop(next(iter(self._entries)))
+                    self._entries[key] = (time.monotonic() + self.ttl_seconds, call.value)
+            call.done.set()
+        return call.value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.stats.invalidations += 1
+
+
+__all__ = ["CacheStats", "SingleFlightCache"]
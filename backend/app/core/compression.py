@@ -0,0 +1,336 @@
+"""HTTP compression middleware for responses and uploaded request bodies.
+
+Responses are compressed with the codec the client prefers among those
+available: zstd (``zstandard``) and brotli (``brotli``) are optional
+dependencies (``pip install cattle-backend[compression]``), gzip is always
+there. Bodies sent in several messages, such as ``StreamingResponse``
+exports, are compressed chunk by chunk, so memory stays bounded by
+``minimum_size`` whatever the response size. Server-sent events, content
+that is already compressed and responses marked ``no-transform`` pass through.
+
+Request bodies sent with ``Content-Encoding`` gzip, deflate or zstd are
+inflated on the configured ingest paths before the route reads them, and
+rejected with 413 once they grow beyond ``max_request_bytes``. Brotli is not
+accepted for uploads because its binding cannot bound the inflated size.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Callable, Dict, List, Optional, Protocol, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import CompressionConfig
+
+try:  # pragma: no cover - exercised only when the extra is installed
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:  # pragma: no cover - exercised only when the extra is installed
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Content types worth compressing; Parquet and images are compressed already
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+    "application/vnd.apache.arrow",
+)
+_STREAMED_EVENTS = "text/event-stream"
+
+
+class Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        """Compressed output available so far for *data* (possibly empty)."""
+
+    def finish(self) -> bytes:
+        """Remaining output, ending the stream."""
+
+
+class _ZlibEncoder:
+    def __init__(self, level: int, wbits: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encoders(config: CompressionConfig) -> Dict[str, Callable[[], Encoder]]:
+    """Encoder factories by content-coding, in server preference order."""
+    encoders: Dict[str, Callable[[], Encoder]] = {}
+    if zstandard is not None:
+        encoders["zstd"] = lambda: _ZstdEncoder(config.zstd_level)
+    if brotli is not None:
+        encoders["br"] = lambda: _BrotliEncoder(config.brotli_quality)
+    encoders["gzip"] = lambda: _ZlibEncoder(config.gzip_level, 31)
+    return encoders
+
+
+def negotiate(accept_encoding: str, available: Sequence[str]) -> Optional[str]:
+    """Coding of *available* with the highest ``q`` in *accept_encoding*; ties go to order."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class RequestBodyRejected(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _too_large(limit: int) -> RequestBodyRejected:
+    return RequestBodyRejected(413, f"Request body exceeds {limit} bytes once decompressed")
+
+
+def _inflate(data: bytes, wbits: int, limit: int) -> bytes:
+    decompressor = zlib.decompressobj(wbits)
+    try:
+        body = decompressor.decompress(data, limit + 1)
+    except zlib.error as exc:
+        raise RequestBodyRejected(400, f"Malformed compressed body: {exc}") from None
+    if len(body) > limit or decompressor.unconsumed_tail:
+        raise _too_large(limit)
+    if not decompressor.eof:
+        raise RequestBodyRejected(400, "Truncated compressed body")
+    return body
+
+
+def _unzstd(data: bytes, limit: int) -> bytes:
+    chunks: List[bytes] = []
+    size = 0
+    try:
+        with zstandard.ZstdDecompressor().stream_reader(data) as reader:
+            while size <= limit:
+                chunk = reader.read(limit + 1 - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+    except zstandard.ZstdError as exc:
+        raise RequestBodyRejected(400, f"Malformed compressed body: {exc}") from None
+    if size > limit:
+        raise _too_large(limit)
+    return b"".join(chunks)
+
+
+def decode_body(coding: str, data: bytes, limit: int) -> bytes:
+    """Inflate a request body sent with *coding*, raising :class:`RequestBodyRejected`."""
+    if coding in ("gzip", "x-gzip"):
+        return _inflate(data, 31, limit)
+    if coding == "deflate":
+        return _inflate(data, 15, limit)
+    if coding == "zstd" and zstandard is not None:
+        return _unzstd(data, limit)
+    raise RequestBodyRejected(415, f"Unsupported request Content-Encoding: {coding}")
+
+
+def _compressible(headers: Headers, status: int) -> bool:
+    content_type = headers.get("content-type", "").lower()
+    return (
+        status not in (204, 304)
+        and "content-encoding" not in headers
+        and "no-transform" not in headers.get("cache-control", "").lower()
+        and not content_type.startswith(_STREAMED_EVENTS)
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+class _CompressingSend:
+    """``send`` wrapper compressing one response, buffering at most ``minimum_size``."""
+
+    def __init__(self, send: Send, coding: str, encoder: Callable[[], Encoder], minimum_size: int):
+        self.send = send
+        self.coding = coding
+        self.make_encoder = encoder
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.buffer = bytearray()
+        self.encoder: Optional[Encoder] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            chunk = self.encoder.compress(body)
+            if not more_body:
+                chunk += self.encoder.finish()
+            if chunk or not more_body:
+                await self.send({"type": message["type"], "body": chunk, "more_body": more_body})
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+        if not _compressible(headers, self.start["status"]):
+            self.passthrough = True
+            await self._flush_start()
+            await self.send(message)
+            return
+        self.buffer += body
+        if len(self.buffer) < self.minimum_size:
+            if more_body:
+                return
+            headers.add_vary_header("Accept-Encoding")
+            await self._flush_start()
+            await self.send({"type": message["type"], "body": bytes(self.buffer)})
+            return
+
+        self.encoder = self.make_encoder()
+        headers["Content-Encoding"] = self.coding
+        headers.add_vary_header("Accept-Encoding")
+        # Strong ETags are left untouched: If-Match on writes compares them strongly
+        chunk = self.encoder.compress(bytes(self.buffer))
+        self.buffer = bytearray()
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            chunk += self.encoder.finish()
+            headers["Content-Length"] = str(len(chunk))
+        await self._flush_start()
+        await self.send({"type": message["type"], "body": chunk, "more_body": more_body})
+
+    async def _flush_start(self) -> None:
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.send(start)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing responses and inflating uploads."""
+
+    def __init__(self, app: ASGIApp, config: CompressionConfig) -> None:
+        self.app = app
+        self.config = config
+        self.encoders = available_encoders(config)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.config.enabled:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        coding = headers.get("content-encoding", "").strip().lower()
+        if coding and coding != "identity" and scope["path"].startswith(self.config.request_paths):
+            try:
+                body = await self._read_body(receive, coding)
+            except RequestBodyRejected as exc:
+                response = JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+                await response(scope, receive, send)
+                return
+            if body is None:
+                return
+            scope, receive = self._replace_body(scope, receive, body)
+
+        accept = negotiate(headers.get("accept-encoding", ""), list(self.encoders))
+        if accept is None or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        compressing = _CompressingSend(
+            send, accept, self.encoders[accept], self.config.minimum_size
+        )
+        await self.app(scope, receive, compressing)
+
+    async def _read_body(self, receive: Receive, coding: str) -> Optional[bytes]:
+        """Inflated request body, or ``None`` when the client went away first."""
+        limit = self.config.max_request_bytes
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > limit:
+                raise _too_large(limit)
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return decode_body(coding, b"".join(chunks), limit)
+
+    @staticmethod
+    def _replace_body(scope: Scope, receive: Receive, body: bytes):
+        raw = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        raw.append((b"content-length", str(len(body)).encode("latin-1")))
+        delivered = False
+
+        async def replay() -> Message:
+            nonlocal delivered
+            if delivered:
+                return await receive()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return dict(scope, headers=raw), replay
+
+
+__all__ = [
+    "COMPRESSIBLE_TYPES",
+    "CompressionMiddleware",
+    "RequestBodyRejected",
+    "available_encoders",
+    "decode_body",
+    "negotiate",
+]
@@ -6,7 +6,7 @@ import os
 from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 _ALLOWED_ENVIRONMENTS = {"development", "staging", "production", "test"}
 _DEFAULT_DB_PORT = 5432
@@ -36,6 +36,20 @@ def _as_int(value: Optional[str], default: int) -> int:
         return default
 
 
+def _as_tuple(value: Optional[str], default: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Split a comma-separated value, falling back to *default* when it is empty."""
+    items = tuple(item.strip() for item in (value or "").split(",") if item.strip())
+    return items or default
+
+
+def _as_float(value: Optional[str], default: float) -> float:
+    """Safely cast a string to float while falling back to *default*."""
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        return default
+
+
 @dataclass
 class DatabaseConfig:
     """Database connection options used throughout the backend."""
@@ -49,6 +63,13 @@ class DatabaseConfig:
     pool_size: int = 5
     max_overflow: int = 10
     ssl_mode: Optional[str] = None
+    # Per-transaction limits applied to request sessions (0 disables).
+    statement_timeout_ms: int = 30_000
+    lock_timeout_ms: int = 5_000
+    read_statement_timeout_ms: int = 10_000
+    write_lock_timeout_ms: int = 2_000
+    # Hash partitions per history table on a fresh database (0 keeps plain tables).
+    tenant_partitions: int = 0
 
     def sqlalchemy_dsn(self) -> str:
         """Build a SQLAlchemy-friendly DSN string for PostgreSQL."""
@@ -77,6 +98,151 @@ class SecurityConfig:
     password_salt_rounds: int = 12
 
 
+@dataclass
+class CacheConfig:
+    """Time-to-live settings for in-process read caches.
+
+    Identical concurrent reads always share one computation; with
+    ``read_coalesce_ttl_ms`` > 0 its response is also served for that long.
+    """
+
+    stats_ttl_seconds: int = 30
+    read_coalesce_ttl_ms: int = 0
+    read_coalesce_max_entries: int = 1024
+
+
+@dataclass
+class ReportConfig:
+    """Local storage, batching and result-cache options for generated reports.
+
+    Artifacts are reused for identical requests over unchanged data for at
+    most ``cache_max_age_s`` seconds (0 disables reuse); the storage directory
+    is trimmed to ``cache_max_bytes`` by least recent use (0 means unbounded).
+    Incremental builds re-read rows changed up to ``incremental_overlap_s``
+    before the previous generation, covering transactions that committed late.
+    """
+
+    storage_dir: Path = field(
+        default_factory=lambda: Path(__file__).resolve().parents[2] / "var" / "reports"
+    )
+    batch_size: int = 50_000
+    cache_max_age_s: int = 3600
+    cache_max_bytes: int = 1024 ** 3
+    incremental: bool = True
+    incremental_overlap_s: int = 300
+
+
+@dataclass
+class IngestConfig:
+    """Write-behind buffering for high-frequency weight readings.
+
+    With ``weight_write_behind`` enabled, at most ``max_queue`` acknowledged
+    readings, or ``flush_interval_ms`` worth of them, are held only in memory.
+    A non-zero ``compaction_window_s`` collapses bursts of automatic readings
+    and extends that bound by the window length. A batch that fails on a
+    transient database error is retried with backoff capped at
+    ``max_backoff_s``; meanwhile the queue fills and new readings get 503.
+    """
+
+    weight_write_behind: bool = False
+    batch_size: int = 500
+    flush_interval_ms: int = 250
+    max_queue: int = 10_000
+    enqueue_timeout_ms: int = 100
+    compaction_window_s: int = 0
+    compaction_estimator: str = "median"
+    keep_raw_readings: bool = False
+    max_backoff_s: int = 30
+
+
+@dataclass
+class AnomalyConfig:
+    """Sensitivity of the online weight-loss detector."""
+
+    ewma_alpha: float = 0.2
+    z_threshold: float = 3.0
+    min_samples: int = 3
+    min_std_kg: float = 0.25
+
+
+@dataclass
+class RollupConfig:
+    """Daily weight rollups refreshed behind a watermark.
+
+    Readings younger than ``settle_s`` are left to the live part of rollup
+    queries, so transactions still in flight are not skipped by a refresh.
+    ``refresh_interval_s`` set to 0 disables the background refresher.
+    """
+
+    refresh_interval_s: int = 60
+    settle_s: int = 120
+    backfill_days: int = 31
+
+
+@dataclass
+class OutboxConfig:
+    """Change-event dispatch from the ``eventos_outbox`` table.
+
+    The dispatcher runs when at least one sink (NDJSON file or webhook URL) is
+    configured. Failed batches are retried with exponential backoff capped at
+    ``max_backoff_s``; with ``max_attempts`` > 0 events failing that often are
+    set aside. Dispatched events are pruned after ``retention_s``.
+    """
+
+    dispatch_interval_ms: int = 1000
+    batch_size: int = 500
+    file_path: Optional[Path] = None
+    webhook_url: Optional[str] = None
+    webhook_timeout_s: float = 5.0
+    max_backoff_s: int = 300
+    max_attempts: int = 0
+    retention_s: int = 7 * 24 * 3600
+
+
+@dataclass
+class AuditConfig:
+    """Asynchronous audit trail written to ``auditoria``.
+
+    Changes are queued when their transaction commits and written by a
+    background thread with one ``COPY`` per batch. At most ``max_queue``
+    entries, or ``flush_interval_ms`` worth of them, live only in memory;
+    entries that find the queue full for ``enqueue_timeout_ms`` are dropped
+    and counted rather than delaying the committed request. A failed ``COPY``
+    is retried with backoff capped at ``max_backoff_s``.
+    """
+
+    enabled: bool = True
+    batch_size: int = 1000
+    flush_interval_ms: int = 500
+    max_queue: int = 50_000
+    enqueue_timeout_ms: int = 50
+    max_backoff_s: int = 30
+
+
+@dataclass
+class CompressionConfig:
+    """HTTP compression of responses and of uploaded request bodies.
+
+    Responses of at least ``minimum_size`` bytes are compressed with the best
+    codec the client accepts (zstd and brotli only when installed, gzip
+    always). Compressed request bodies are accepted on ``request_paths``
+    prefixes and rejected once they inflate beyond ``max_request_bytes``.
+    """
+
+    enabled: bool = True
+    minimum_size: int = 1024
+    gzip_level: int = 6
+    zstd_level: int = 3
+    brotli_quality: int = 4
+    max_request_bytes: int = 16 * 1024 ** 2
+    request_paths: Tuple[str, ...] = (
+        "/cattle/batch",
+        "/cattle/bulk",
+        "/cattle/weight-records",
+        "/cattle/health-records",
+    )
+
+
 @dataclass
 class AppConfig:
     """Application level metadata used by logging and diagnostics."""
@@ -94,6 +260,14 @@ class Settings:
     database: DatabaseConfig
     security: SecurityConfig
     app: AppConfig
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    reports: ReportConfig = field(default_factory=ReportConfig)
+    ingest: IngestConfig = field(default_factory=IngestConfig)
+    anomaly: AnomalyConfig = field(default_factory=AnomalyConfig)
+    rollup: RollupConfig = field(default_factory=RollupConfig)
+    outbox: OutboxConfig = field(default_factory=OutboxConfig)
+    audit: AuditConfig = field(default_factory=AuditConfig)
+    compression: CompressionConfig = field(default_factory=CompressionConfig)
 
     @classmethod
     def from_env(cls, env: Optional[Dict[str, str]] = None) -> "Settings":
@@ -108,6 +282,11 @@ class Settings:
             pool_size=_as_int(env_map.get("SQL_POOL_SIZE"), 5),
             max_overflow=_as_int(env_map.get("SQL_MAX_OVERFLOW"), 10),
             ssl_mode=_clean(env_map.get("SQL_SSL_MODE")),
+            statement_timeout_ms=_as_int(env_map.get("SQL_STATEMENT_TIMEOUT_MS"), 30_000),
+            lock_timeout_ms=_as_int(env_map.get("SQL_LOCK_TIMEOUT_MS"), 5_000),
+            read_statement_timeout_ms=_as_int(env_map.get("SQL_READ_STATEMENT_TIMEOUT_MS"), 10_000),
+            write_lock_timeout_ms=_as_int(env_map.get("SQL_WRITE_LOCK_TIMEOUT_MS"), 2_000),
+            tenant_partitions=_as_int(env_map.get("DB_TENANT_PARTITIONS"), 0),
         )
         security = SecurityConfig(
             secret_key=_clean(env_map.get("SECRET_KEY"), "change-me"),
@@ -125,7 +304,88 @@ class Settings:
             debug=_as_bool(env_map.get("APP_DEBUG"), env_name != "production"),
             log_level=_clean(env_map.get("LOG_LEVEL"), "INFO"),
         )
-        return cls(database=db, security=security, app=app)
+        cache = CacheConfig(
+            stats_ttl_seconds=_as_int(env_map.get("STATS_CACHE_TTL_SECONDS"), 30),
+            read_coalesce_ttl_ms=_as_int(env_map.get("READ_COALESCE_TTL_MS"), 0),
+            read_coalesce_max_entries=_as_int(env_map.get("READ_COALESCE_MAX_ENTRIES"), 1024),
+        )
+        reports = ReportConfig(
+            batch_size=_as_int(env_map.get("REPORTS_BATCH_SIZE"), 50_000),
+            cache_max_age_s=_as_int(env_map.get("REPORTS_CACHE_MAX_AGE_S"), 3600),
+            cache_max_bytes=_as_int(env_map.get("REPORTS_CACHE_MAX_BYTES"), 1024 ** 3),
+            incremental=_as_bool(env_map.get("REPORTS_INCREMENTAL"), True),
+            incremental_overlap_s=_as_int(env_map.get("REPORTS_INCREMENTAL_OVERLAP_S"), 300),
+        )
+        reports_dir = _clean(env_map.get("REPORTS_DIR"))
+        if reports_dir:
+            reports.storage_dir = Path(reports_dir)
+        ingest = IngestConfig(
+            weight_write_behind=_as_bool(env_map.get("WEIGHT_WRITE_BEHIND"), False),
+            batch_size=_as_int(env_map.get("WEIGHT_BATCH_SIZE"), 500),
+            flush_interval_ms=_as_int(env_map.get("WEIGHT_FLUSH_INTERVAL_MS"), 250),
+            max_queue=_as_int(env_map.get("WEIGHT_MAX_QUEUE"), 10_000),
+            enqueue_timeout_ms=_as_int(env_map.get("WEIGHT_ENQUEUE_TIMEOUT_MS"), 100),
+            compaction_window_s=_as_int(env_map.get("WEIGHT_COMPACTION_WINDOW_S"), 0),
+            compaction_estimator=_clean(env_map.get("WEIGHT_COMPACTION_ESTIMATOR"), "median"),
+            keep_raw_readings=_as_bool(env_map.get("WEIGHT_KEEP_RAW_READINGS"), False),
+            max_backoff_s=_as_int(env_map.get("WEIGHT_MAX_BACKOFF_S"), 30),
+        )
+        anomaly = AnomalyConfig(
+            ewma_alpha=_as_float(env_map.get("WEIGHT_ANOMALY_ALPHA"), 0.2),
+            z_threshold=_as_float(env_map.get("WEIGHT_ANOMALY_Z"), 3.0),
+            min_samples=_as_int(env_map.get("WEIGHT_ANOMALY_MIN_SAMPLES"), 3),
+            min_std_kg=_as_float(env_map.get("WEIGHT_ANOMALY_MIN_STD_KG"), 0.25),
+        )
+        rollup = RollupConfig(
+            refresh_interval_s=_as_int(env_map.get("WEIGHT_ROLLUP_REFRESH_INTERVAL_S"), 60),
+            settle_s=_as_int(env_map.get("WEIGHT_ROLLUP_SETTLE_S"), 120),
+            backfill_days=_as_int(env_map.get("WEIGHT_ROLLUP_BACKFILL_DAYS"), 31),
+        )
+        outbox_file = _clean(env_map.get("OUTBOX_FILE"))
+        outbox = OutboxConfig(
+            dispatch_interval_ms=_as_int(env_map.get("OUTBOX_DISPATCH_INTERVAL_MS"), 1000),
+            batch_size=_as_int(env_map.get("OUTBOX_BATCH_SIZE"), 500),
+            file_path=Path(outbox_file) if outbox_file else None,
+            webhook_url=_clean(env_map.get("OUTBOX_WEBHOOK_URL")),
+            webhook_timeout_s=_as_float(env_map.get("OUTBOX_WEBHOOK_TIMEOUT_S"), 5.0),
+            max_backoff_s=_as_int(env_map.get("OUTBOX_MAX_BACKOFF_S"), 300),
+            max_attempts=_as_int(env_map.get("OUTBOX_MAX_ATTEMPTS"), 0),
+            retention_s=_as_int(env_map.get("OUTBOX_RETENTION_S"), 7 * 24 * 3600),
+        )
+        audit = AuditConfig(
+            enabled=_as_bool(env_map.get("AUDIT_ENABLED"), True),
+            batch_size=_as_int(env_map.get("AUDIT_BATCH_SIZE"), 1000),
+            flush_interval_ms=_as_int(env_map.get("AUDIT_FLUSH_INTERVAL_MS"), 500),
+            max_queue=_as_int(env_map.get("AUDIT_MAX_QUEUE"), 50_000),
+            enqueue_timeout_ms=_as_int(env_map.get("AUDIT_ENQUEUE_TIMEOUT_MS"), 50),
+            max_backoff_s=_as_int(env_map.get("AUDIT_MAX_BACKOFF_S"), 30),
+        )
+        compression = CompressionConfig(
+            enabled=_as_bool(env_map.get("COMPRESSION_ENABLED"), True),
+            minimum_size=_as_int(env_map.get("COMPRESSION_MINIMUM_SIZE"), 1024),
+            gzip_level=_as_int(env_map.get("COMPRESSION_GZIP_LEVEL"), 6),
+            zstd_level=_as_int(env_map.get("COMPRESSION_ZSTD_LEVEL"), 3),
+            brotli_quality=_as_int(env_map.get("COMPRESSION_BROTLI_QUALITY"), 4),
+            max_request_bytes=_as_int(
+                env_map.get("COMPRESSION_MAX_REQUEST_BYTES"), 16 * 1024 ** 2
+            ),
+            request_paths=_as_tuple(
+                env_map.get("COMPRESSION_REQUEST_PATHS"), CompressionConfig.request_paths
+            ),
+        )
+        return cls(
+            database=db,
+            security=security,
+            app=app,
+            cache=cache,
+            reports=reports,
+            ingest=ingest,
+            anomaly=anomaly,
+            rollup=rollup,
+            outbox=outbox,
+            audit=audit,
+            compression=compression,
+        )
 
     def as_dict(self) -> Dict[str, Any]:
         return {
@@ -137,6 +397,27 @@ class Settings:
                 "log_level": self.app.log_level,
                 "project_root": str(self.app.project_root),
             },
+            "cache": self.cache.__dict__,
+            "reports": {
+                "storage_dir": str(self.reports.storage_dir),
+                "batch_size": self.reports.batch_size,
+                "cache_max_age_s": self.reports.cache_max_age_s,
+                "cache_max_bytes": self.reports.cache_max_bytes,
+                "incremental": self.reports.incremental,
+                "incremental_overlap_s": self.reports.incremental_overlap_s,
+            },
+            "ingest": self.ingest.__dict__,
+            "anomaly": self.anomaly.__dict__,
+            "rollup": self.rollup.__dict__,
+            "outbox": {
+                **self.outbox.__dict__,
+                "file_path": str(self.outbox.file_path) if self.outbox.file_path else None,
+            },
+            "audit": self.audit.__dict__,
+            "compression": {
+                **self.compression.__dict__,
+                "request_paths": list(self.compression.request_paths),
+            },
         }
 
 
@@ -151,7 +432,13 @@ settings = get_settings()
 __all__ = [
     "DatabaseConfig",
     "SecurityConfig",
+    "AnomalyConfig",
     "AppConfig",
+    "CacheConfig",
+    "IngestConfig",
+    "OutboxConfig",
+    "ReportConfig",
+    "RollupConfig",
     "Settings",
     "settings",
     "get_settings",
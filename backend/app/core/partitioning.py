@@ -0,0 +1,80 @@
+"""Optional hash partitioning of the history tables by owner.
+
+With ``DatabaseConfig.tenant_partitions`` set, a fresh database is created
+with ``registros_peso`` and ``registros_salud`` declared ``PARTITION BY HASH
+(id_usuario)`` and split into that many partitions, so each owner's history
+lives in one partition and its indexes only grow with the owners hashed there.
+
+PostgreSQL requires the partition key in every unique constraint of a
+partitioned table: their primary keys become ``(id, id_usuario)`` and the raw
+scale samples lose their foreign key to ``registros_peso`` (they still go
+away with their animal through ``id_vaca``). ``vacas`` stays a regular table,
+reached through its owner-leading indexes, because every history table
+references it. Existing tables are never converted; that takes a migration.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import DDL, MetaData, PrimaryKeyConstraint, event, inspect
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = "id_usuario"
+PARTITIONED_TABLES = ("registros_peso", "registros_salud")
+_DETACHED_REFERENCES = {"registros_peso_crudos": "registros_peso"}
+
+
+def partitioned_metadata(metadata: MetaData, partitions: int) -> MetaData:
+    """Copy of *metadata* with the history tables hash-partitioned by owner."""
+    if partitions < 1:
+        raise ValueError("partitions must be positive")
+    copy = MetaData()
+    for table in metadata.sorted_tables:
+        table.to_metadata(copy)
+    for name in PARTITIONED_TABLES:
+        table = copy.tables[name]
+        table.c[PARTITION_KEY].primary_key = True
+        table.append_constraint(PrimaryKeyConstraint("id", PARTITION_KEY))
+        table.dialect_options["postgresql"]["partition_by"] = f"HASH ({PARTITION_KEY})"
+        for remainder in range(partitions):
+            event.listen(
+                table,
+                "after_create",
+                DDL(
+                    f"CREATE TABLE {name}_p{remainder} PARTITION OF {name} "
+                    f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+                ),
+            )
+    for name, referred in _DETACHED_REFERENCES.items():
+        table = copy.tables[name]
+        for constraint in list(table.foreign_key_constraints):
+            if constraint.referred_table.name == referred:
+                table.constraints.discard(constraint)
+                for element in constraint.elements:
+                    element.parent.foreign_keys.discard(element)
+                    table.foreign_keys.discard(element)
+    return copy
+
+
+def create_partitioned_tables(engine: Engine, metadata: MetaData, partitions: int) -> bool:
+    """Create the schema with partitioned history tables on a fresh database.
+
+    Returns ``False`` without touching anything when a history table exists.
+    """
+    existing = [name for name in PARTITIONED_TABLES if inspect(engine).has_table(name)]
+    if existing:
+        logger.info("Not partitioning: %s already exist", ", ".join(existing))
+        return False
+    partitioned_metadata(metadata, partitions).create_all(bind=engine)
+    return True
+
+
+__all__ = [
+    "PARTITIONED_TABLES",
+    "PARTITION_KEY",
+    "create_partitioned_tables",
+    "partitioned_metadata",
+]
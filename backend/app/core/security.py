@@ -0,0 +1,73 @@
+"""JWT access tokens and the principal they identify.
+
+Tokens are signed with ``SecurityConfig.secret_key`` and carry the user id in
+``sub`` and the role in ``role``. Decoding is stateless: a request is scoped
+to the owner named by its token without a lookup of the user row, so a
+deactivated account keeps access until its token expires.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+ADMIN_ROLE = "admin"
+
+
+class InvalidToken(ValueError):
+    """Raised for tokens that are malformed, expired or badly signed."""
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated caller; ``id`` is the owner every query is scoped to."""
+
+    id: uuid.UUID
+    rol: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.rol == ADMIN_ROLE
+
+
+def create_access_token(
+    subject: uuid.UUID,
+    rol: str,
+    expires_minutes: Optional[int] = None,
+    extra_claims: Optional[Dict[str, Any]] = None,
+) -> str:
+    exp_minutes = expires_minutes or settings.security.access_token_exp_minutes
+    payload: Dict[str, Any] = {
+        "sub": str(subject),
+        "role": rol,
+        "exp": datetime.utcnow() + timedelta(minutes=exp_minutes),
+    }
+    if extra_claims:
+        payload.update(extra_claims)
+    return jwt.encode(payload, settings.security.secret_key, algorithm=settings.security.algorithm)
+
+
+def decode_access_token(token: str) -> Principal:
+    """Verify *token* and return its principal, raising :class:`InvalidToken`."""
+    try:
+        claims = jwt.decode(
+            token, settings.security.secret_key, algorithms=[settings.security.algorithm]
+        )
+        return Principal(id=uuid.UUID(str(claims["sub"])), rol=str(claims.get("role", "")))
+    except (JWTError, KeyError, ValueError) as exc:
+        raise InvalidToken("Invalid or expired token") from exc
+
+
+__all__ = [
+    "ADMIN_ROLE",
+    "InvalidToken",
+    "Principal",
+    "create_access_token",
+    "decode_access_token",
+]
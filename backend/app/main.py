@@ -1,18 +1,65 @@
 """FastAPI main application for cattle management system."""
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base
-from app.api import auth_router, cattle_router
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.database import engine, Base, timeout_error_code
+from app.core.partitioning import create_partitioned_tables
+from app.api import (
+    audit_router,
+    auth_router,
+    cache_router,
+    cattle_router,
+    medications_router,
+    outbox_router,
+    reports_router,
+)
+from app.services.audit import audit_writer
+from app.services.outbox import outbox_dispatcher
+from app.services.report_events import report_events
+from app.services.weight_ingest import weight_queue
+from app.services.weight_rollup import rollup_refresher
 
 # Create database tables
+if settings.database.tenant_partitions > 0:
+    create_partitioned_tables(engine, Base.metadata, settings.database.tenant_partitions)
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers and drain them on shutdown."""
+    report_events.bind(asyncio.get_running_loop())
+    if weight_queue.enabled:
+        weight_queue.start()
+    if rollup_refresher.enabled:
+        rollup_refresher.start()
+    if outbox_dispatcher.enabled:
+        outbox_dispatcher.start()
+    if audit_writer.enabled:
+        audit_writer.start()
+    yield
+    # Joining the worker threads blocks, so it happens off the event loop
+    await asyncio.to_thread(weight_queue.stop)
+    await asyncio.to_thread(rollup_refresher.stop)
+    await asyncio.to_thread(outbox_dispatcher.stop)
+    # Last, so entries of changes committed by the workers above are written
+    await asyncio.to_thread(audit_writer.stop)
+    report_events.bind(None)
+
+
 app = FastAPI(
     title="Cattle Management API",
     description="API for managing cattle inventory, health records, and reports",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -23,10 +70,39 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so CORS headers and error responses are compressed too
+app.add_middleware(CompressionMiddleware, config=settings.compression)
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    """A versioned row changed under an ORM flush: report a conflict."""
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Resource was modified concurrently; reload and retry"},
+    )
+
+
+@app.exception_handler(OperationalError)
+async def database_timeout_handler(request: Request, exc: OperationalError):
+    """Statement/lock timeouts and cancelled queries become a retryable 503."""
+    code = timeout_error_code(exc)
+    if code is None:
+        raise exc
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database query took too long and was cancelled", "code": code},
+        headers={"Retry-After": "1"},
+    )
+
 
 # Include routers
 app.include_router(auth_router)
 app.include_router(cattle_router)
+app.include_router(reports_router)
+app.include_router(medications_router)
+app.include_router(outbox_router)
+app.include_router(cache_router)
+app.include_router(audit_router)
 
 
 @app.get("/")
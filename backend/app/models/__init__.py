@@ -10,10 +10,16 @@ from sqlalchemy.orm import DeclarativeMeta
 
 MODEL_MODULES: Tuple[str, ...] = (
     "app.models.usuario",
+    "app.models.medicamento",
     "app.models.vaca",
     "app.models.registro_salud",
     "app.models.registro_peso",
     "app.models.reporte",
+    "app.models.archivo",
+    "app.models.alerta_peso",
+    "app.models.resumen_peso",
+    "app.models.outbox",
+    "app.models.auditoria",
 )
 
 
@@ -82,17 +88,45 @@ def primary_keys_map() -> Dict[str, str]:
 
 from app.models.usuario import Usuario  # noqa: E402
 from app.models.vaca import Vaca  # noqa: E402
+from app.models.medicamento import Medicamento  # noqa: E402
 from app.models.registro_salud import RegistroSalud  # noqa: E402
-from app.models.registro_peso import RegistroPeso  # noqa: E402
+from app.models.registro_peso import RegistroPeso, RegistroPesoCrudo  # noqa: E402
 from app.models.reporte import Reporte  # noqa: E402
+from app.models.alerta_peso import AlertaPeso, EstadoPesoVaca  # noqa: E402
+from app.models.resumen_peso import (  # noqa: E402
+    MarcaAgregacion,
+    ResumenPesoUsuarioDiario,
+    ResumenPesoVacaDiario,
+)
+from app.models.outbox import EventoOutbox  # noqa: E402
+from app.models.auditoria import Auditoria  # noqa: E402
+from app.models.archivo import (  # noqa: E402
+    RegistroPesoArchivado,
+    RegistroPesoCrudoArchivado,
+    RegistroSaludArchivado,
+    VacaArchivada,
+)
 
 
 __all__ = [
     "Usuario",
     "Vaca",
     "RegistroSalud",
+    "Medicamento",
     "RegistroPeso",
+    "RegistroPesoCrudo",
     "Reporte",
+    "VacaArchivada",
+    "RegistroPesoArchivado",
+    "RegistroPesoCrudoArchivado",
+    "RegistroSaludArchivado",
+    "AlertaPeso",
+    "EstadoPesoVaca",
+    "MarcaAgregacion",
+    "ResumenPesoUsuarioDiario",
+    "ResumenPesoVacaDiario",
+    "EventoOutbox",
+    "Auditoria",
     "all_models",
     "model_by_name",
     "metadata_summary",
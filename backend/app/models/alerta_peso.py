@@ -0,0 +1,77 @@
+
+"""Estado del detector de anomalías de peso y alertas generadas."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict
+
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, Numeric, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class EstadoPesoVaca(Base):
+    """Estado compacto por animal: último peso y EWMA de la ganancia diaria."""
+
+    __tablename__ = "estado_peso_vacas"
+    __table_args__ = {"comment": "Estado incremental del detector de anomalías de peso"}
+
+    id_vaca: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("vacas.id", ondelete="CASCADE"), primary_key=True
+    )
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
+    peso_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    ganancia_media: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    ganancia_varianza: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    muestras: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    actualizado: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<EstadoPesoVaca {self.id_vaca} {self.peso_kg} kg {self.fecha}>"
+
+
+class AlertaPeso(Base):
+    """Pérdida de peso fuera de lo esperado para el animal."""
+
+    __tablename__ = "alertas_peso"
+    __table_args__ = (
+        Index("ix_alertas_peso_pendientes", "fecha", postgresql_where=text("NOT atendida")),
+        {"comment": "Alertas de pérdida de peso detectadas al ingresar lecturas"},
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id_vaca: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("vacas.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
+    peso_kg: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    ganancia_diaria: Mapped[float] = mapped_column(Float, nullable=False)
+    ganancia_esperada: Mapped[float] = mapped_column(Float, nullable=False)
+    puntaje_z: Mapped[float] = mapped_column(Float, nullable=False)
+    atendida: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=text("false"))
+    creada: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": str(self.id),
+            "id_vaca": str(self.id_vaca),
+            "fecha": self.fecha.isoformat(),
+            "peso_kg": float(self.peso_kg),
+            "ganancia_diaria": self.ganancia_diaria,
+            "ganancia_esperada": self.ganancia_esperada,
+            "puntaje_z": self.puntaje_z,
+            "atendida": self.atendida,
+            "creada": self.creada.isoformat() if self.creada else None,
+        }
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<AlertaPeso {self.id_vaca} {self.fecha} z={self.puntaje_z:.1f}>"
+
+
+__all__ = ["AlertaPeso", "EstadoPesoVaca"]
@@ -0,0 +1,73 @@
+
+"""Tablas de archivo para animales vendidos o fallecidos."""
+
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Index, Table, func
+
+from app.core.database import Base
+from app.models.registro_peso import RegistroPeso, RegistroPesoCrudo
+from app.models.registro_salud import RegistroSalud
+from app.models.vaca import Vaca
+
+
+def _archive_table(source: Table, name: str, *indexed: str) -> Table:
+    """Copy the columns of *source* without constraints other than the PK.
+
+    Columns are derived from the live table so the archive always mirrors it.
+    """
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in source.columns
+    ]
+    columns.append(
+        Column("archivado_en", DateTime(timezone=True), server_default=func.now(), nullable=False)
+    )
+    indexes = [Index(f"ix_{name}_{column}", column) for column in indexed]
+    return Table(name, Base.metadata, *columns, *indexes, comment=f"Archivo de {source.name}")
+
+
+class VacaArchivada(Base):
+    """Vaca retirada del hato activo (vendida o fallecida)."""
+
+    __tablename__ = "vacas_archivo"
+    __table__ = _archive_table(Vaca.__table__, "vacas_archivo", "identificador", "id_usuario")
+
+
+class RegistroPesoArchivado(Base):
+    """Registro de peso de una vaca archivada."""
+
+    __tablename__ = "registros_peso_archivo"
+    __table__ = _archive_table(RegistroPeso.__table__, "registros_peso_archivo", "id_vaca")
+
+
+class RegistroPesoCrudoArchivado(Base):
+    """Lectura cruda de báscula de una vaca archivada."""
+
+    __tablename__ = "registros_peso_crudos_archivo"
+    __table__ = _archive_table(RegistroPesoCrudo.__table__, "registros_peso_crudos_archivo", "id_vaca")
+
+
+class RegistroSaludArchivado(Base):
+    """Registro de salud de una vaca archivada."""
+
+    __tablename__ = "registros_salud_archivo"
+    __table__ = _archive_table(RegistroSalud.__table__, "registros_salud_archivo", "id_vaca")
+
+
+# (tabla activa, tabla de archivo) en el orden en que se copian
+ARCHIVE_PAIRS = (
+    (RegistroPeso.__table__, RegistroPesoArchivado.__table__),
+    (RegistroPesoCrudo.__table__, RegistroPesoCrudoArchivado.__table__),
+    (RegistroSalud.__table__, RegistroSaludArchivado.__table__),
+    (Vaca.__table__, VacaArchivada.__table__),
+)
+
+
+__all__ = [
+    "ARCHIVE_PAIRS",
+    "RegistroPesoArchivado",
+    "RegistroPesoCrudoArchivado",
+    "RegistroSaludArchivado",
+    "VacaArchivada",
+]
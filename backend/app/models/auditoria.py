@@ -0,0 +1,49 @@
+"""Registro de auditoría de los cambios de vacas y su historial."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import JSON, BigInteger, DateTime, Identity, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class Auditoria(Base):
+    """Quién cambió qué animal o registro y cómo.
+
+    Se escribe en lotes con ``COPY`` después de que la transacción auditada
+    confirma, por eso no tiene claves foráneas: sobrevive a los animales
+    eliminados o archivados. ``cambios`` guarda ``{campo: {"anterior", "nuevo"}}``
+    en las actualizaciones y los valores conocidos en altas y bajas.
+    """
+
+    __tablename__ = "auditoria"
+    __table_args__ = (
+        Index("ix_auditoria_vaca_momento", "id_vaca", "momento", "id"),
+        Index("ix_auditoria_actor_momento", "id_actor", "momento", "id"),
+        {"comment": "Rastro de auditoría de cambios, escrito de forma asíncrona"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    # Momento de la confirmación de la transacción auditada, no de la escritura.
+    momento: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Usuario autenticado que hizo el cambio; nulo para procesos en segundo plano.
+    id_actor: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    # Dueño de los datos cambiados.
+    id_usuario: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    entidad: Mapped[str] = mapped_column(String(32), nullable=False)
+    id_entidad: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    id_vaca: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    operacion: Mapped[str] = mapped_column(String(16), nullable=False)
+    cambios: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<Auditoria {self.id} {self.entidad} {self.id_entidad} {self.operacion}>"
+
+
+__all__ = ["Auditoria"]
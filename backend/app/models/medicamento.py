@@ -0,0 +1,57 @@
+"""Catálogo de medicamentos con sus periodos de retiro."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class Medicamento(Base):
+    """Medicamento veterinario y días de retiro para carne y leche."""
+
+    __tablename__ = "medicamentos"
+    __table_args__ = (
+        Index("uq_medicamentos_nombre", text("lower(nombre)"), unique=True),
+        {"comment": "Catálogo de medicamentos y periodos de retiro"},
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    nombre: Mapped[str] = mapped_column(String(255), nullable=False)
+    principio_activo: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    dias_retiro_carne: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    dias_retiro_leche: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    creado: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @staticmethod
+    def _fin(fecha: date, dias: int) -> Optional[date]:
+        return fecha + timedelta(days=dias) if dias > 0 else None
+
+    def fin_retiro_carne(self, fecha: date) -> Optional[date]:
+        """Último día en que el animal no puede venderse para consumo."""
+        return self._fin(fecha, self.dias_retiro_carne)
+
+    def fin_retiro_leche(self, fecha: date) -> Optional[date]:
+        """Último día en que la leche del animal debe descartarse."""
+        return self._fin(fecha, self.dias_retiro_leche)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": str(self.id),
+            "nombre": self.nombre,
+            "principio_activo": self.principio_activo,
+            "dias_retiro_carne": self.dias_retiro_carne,
+            "dias_retiro_leche": self.dias_retiro_leche,
+        }
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<Medicamento {self.nombre} carne={self.dias_retiro_carne}d leche={self.dias_retiro_leche}d>"
+
+
+__all__ = ["Medicamento"]
@@ -0,0 +1,74 @@
+"""Bandeja de salida transaccional de eventos de cambio."""
+
+from __future__ import annotations
+
+import enum
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import JSON, BigInteger, DateTime, Identity, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class OperacionOutbox(str, enum.Enum):
+    """Tipo de cambio registrado sobre un agregado."""
+
+    CREADO = "creado"
+    ACTUALIZADO = "actualizado"
+    ELIMINADO = "eliminado"
+    ARCHIVADO = "archivado"
+
+
+class EventoOutbox(Base):
+    """Cambio de una vaca o de su historial, escrito en la misma transacción que el cambio.
+
+    El despachador los entrega en orden de ``id``; ``despachado`` queda nulo
+    hasta que todos los destinos los aceptan.
+    """
+
+    __tablename__ = "eventos_outbox"
+    __table_args__ = (
+        Index(
+            "ix_eventos_outbox_pendientes",
+            "id",
+            postgresql_where=text("despachado IS NULL AND abandonado IS NULL"),
+        ),
+        Index(
+            "ix_eventos_outbox_despachado",
+            "despachado",
+            postgresql_where=text("despachado IS NOT NULL"),
+        ),
+        {"comment": "Eventos de cambio pendientes de entregar a sistemas externos"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    agregado: Mapped[str] = mapped_column(String(32), nullable=False)
+    id_agregado: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    operacion: Mapped[str] = mapped_column(String(16), nullable=False)
+    datos: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+    creado: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    intentos: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
+    ultimo_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    despachado: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Eventos descartados tras agotar los reintentos (cola de mensajes muertos).
+    abandonado: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "agregado": self.agregado,
+            "id_agregado": str(self.id_agregado),
+            "operacion": self.operacion,
+            "datos": self.datos,
+            "creado": self.creado.isoformat() if self.creado else None,
+        }
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<EventoOutbox {self.id} {self.agregado} {self.operacion}>"
+
+
+__all__ = ["EventoOutbox", "OperacionOutbox"]
@@ -8,8 +8,21 @@ import uuid
 from datetime import date, datetime
 from typing import Any, Dict, Optional, TYPE_CHECKING
 
-from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Numeric, func
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Enum as SAEnum,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    Numeric,
+    case,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -18,6 +31,9 @@ if TYPE_CHECKING:  # pragma: no cover
     from app.models.vaca import Vaca
 
 
+KILOS_POR_LIBRA = 0.453592
+
+
 class UnidadPeso(str, enum.Enum):
     """Unidades soportadas para el registro de peso."""
 
@@ -25,7 +41,7 @@ class UnidadPeso(str, enum.Enum):
     LIBRA = "lb"
 
     def to_kilos(self, value: float) -> float:
-        return value if self == UnidadPeso.KILOGRAMO else value * 0.453592
+        return value if self == UnidadPeso.KILOGRAMO else value * KILOS_POR_LIBRA
 
 
 class MetodoPesaje(str, enum.Enum):
@@ -40,18 +56,29 @@ class RegistroPeso(Base):
     """Modelo ORM que guarda cada registro de peso."""
 
     __tablename__ = "registros_peso"
-    __table_args__ = {"comment": "Historial de pesaje"}
+    __table_args__ = (
+        Index("ix_registros_peso_timestamp", "timestamp"),
+        Index("ix_registros_peso_vaca_fecha", "id_vaca", "fecha"),
+        ForeignKeyConstraint(
+            ["id_vaca", "id_usuario"],
+            ["vacas.id", "vacas.id_usuario"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        {"comment": "Historial de pesaje"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    id_vaca: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("vacas.id", ondelete="CASCADE"), nullable=False, index=True
-    )
+    id_vaca: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    # Propietario de la vaca, copiado para acotar y particionar el historial por usuario.
+    id_usuario: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     fecha: Mapped[date] = mapped_column(Date, nullable=False)
     peso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     unidad: Mapped[UnidadPeso] = mapped_column(SAEnum(UnidadPeso, name="unidad_peso"), nullable=False)
     metodo: Mapped[MetodoPesaje] = mapped_column(
         SAEnum(MetodoPesaje, name="metodo_pesaje"), nullable=False, default=MetodoPesaje.MANUAL
     )
+    muestras: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default=text("1"))
     timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     vaca: Mapped["Vaca"] = relationship("Vaca", back_populates="registros_peso")
@@ -64,6 +91,16 @@ class RegistroPeso(Base):
     def peso_en_kilos(self) -> float:
         return self.unidad.to_kilos(float(self.peso))
 
+    @hybrid_property
+    def peso_kg(self) -> float:
+        """Weight in kilograms, usable both on instances and in SQL."""
+        return self.peso_en_kilos()
+
+    @peso_kg.inplace.expression
+    @classmethod
+    def _peso_kg_expression(cls):
+        return case((cls.unidad == UnidadPeso.LIBRA, cls.peso * KILOS_POR_LIBRA), else_=cls.peso)
+
     def variacion_respecto(self, anterior: Optional["RegistroPeso"]) -> Optional[float]:
         if not anterior:
             return None
@@ -93,6 +130,7 @@ class RegistroPeso(Base):
             "peso": float(self.peso),
             "unidad": self.unidad.value,
             "metodo": self.metodo.value,
+            "muestras": self.muestras,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None,
         }
 
@@ -120,4 +158,25 @@ class RegistroPeso(Base):
         return f"<RegistroPeso {self.peso} {self.unidad.value} {self.fecha}>"
 
 
-__all__ = ["RegistroPeso", "UnidadPeso", "MetodoPesaje"]
+class RegistroPesoCrudo(Base):
+    """Lectura individual de báscula conservada tras compactar una ráfaga."""
+
+    __tablename__ = "registros_peso_crudos"
+    __table_args__ = {"comment": "Lecturas crudas de básculas automáticas (almacenamiento frío)"}
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id_registro: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("registros_peso.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    id_vaca: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("vacas.id", ondelete="CASCADE"), nullable=False
+    )
+    peso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    unidad: Mapped[UnidadPeso] = mapped_column(SAEnum(UnidadPeso, name="unidad_peso"), nullable=False)
+    recibido: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<RegistroPesoCrudo {self.peso} {self.unidad.value} {self.recibido}>"
+
+
+__all__ = ["KILOS_POR_LIBRA", "RegistroPeso", "RegistroPesoCrudo", "UnidadPeso", "MetodoPesaje"]
@@ -5,16 +5,28 @@ from __future__ import annotations
 
 import enum
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import Any, Dict, Optional, TYPE_CHECKING
 
-from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, String, Text, func
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Enum as SAEnum,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    String,
+    Text,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
 
 if TYPE_CHECKING:  # pragma: no cover
+    from app.models.medicamento import Medicamento
     from app.models.vaca import Vaca
 
 
@@ -40,24 +52,81 @@ class TipoSalud(str, enum.Enum):
         """Return True when the record type typically needs follow-up checks."""
         return self in {TipoSalud.TRATAMIENTO, TipoSalud.REVISION}
 
+    def dias_seguimiento(self) -> Optional[int]:
+        """Return the days until the follow-up check is due, if any."""
+        return _DIAS_SEGUIMIENTO.get(self)
+
+
+_DIAS_SEGUIMIENTO: Dict[TipoSalud, int] = {
+    TipoSalud.TRATAMIENTO: 7,
+    TipoSalud.REVISION: 30,
+}
+
 
 class RegistroSalud(Base):
     """Evento médico registrado para una vaca."""
 
     __tablename__ = "registros_salud"
-    __table_args__ = {"comment": "Historial médico detallado"}
+    __table_args__ = (
+        Index("ix_registros_salud_vaca_fecha", "id_vaca", "fecha"),
+        Index("ix_registros_salud_usuario_fecha", "id_usuario", "fecha"),
+        Index(
+            "ix_registros_salud_usuario_seguimiento",
+            "id_usuario",
+            "fecha_seguimiento",
+            postgresql_where=text("fecha_seguimiento IS NOT NULL"),
+        ),
+        Index(
+            "ix_registros_salud_vaca_fin_retiro",
+            "id_vaca",
+            "fecha_fin_retiro",
+            postgresql_where=text("fecha_fin_retiro IS NOT NULL"),
+        ),
+        Index(
+            "ix_registros_salud_usuario_fin_retiro",
+            "id_usuario",
+            "fecha_fin_retiro",
+            postgresql_where=text("fecha_fin_retiro IS NOT NULL"),
+        ),
+        Index(
+            "ix_registros_salud_usuario_fin_retiro_leche",
+            "id_usuario",
+            "fecha_fin_retiro_leche",
+            postgresql_where=text("fecha_fin_retiro_leche IS NOT NULL"),
+        ),
+        Index(
+            "ix_registros_salud_usuario_fecha_actualizacion", "id_usuario", "fecha_actualizacion"
+        ),
+        ForeignKeyConstraint(
+            ["id_vaca", "id_usuario"],
+            ["vacas.id", "vacas.id_usuario"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        {"comment": "Historial médico detallado"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    id_vaca: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("vacas.id", ondelete="CASCADE"), nullable=False, index=True
-    )
+    id_vaca: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    # Propietario de la vaca, copiado para acotar y particionar el historial por usuario.
+    id_usuario: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     fecha: Mapped[date] = mapped_column(Date, nullable=False)
     tipo: Mapped[TipoSalud] = mapped_column(SAEnum(TipoSalud, name="tipo_salud"), nullable=False)
     descripcion: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     medicamento: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     dosis: Mapped[Optional[str]] = mapped_column(String(120), nullable=True)
     veterinario: Mapped[Optional[str]] = mapped_column(String(120), nullable=True)
+    id_medicamento: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("medicamentos.id", ondelete="SET NULL"), nullable=True
+    )
+    fecha_fin_retiro: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    fecha_fin_retiro_leche: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    fecha_seguimiento: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Última modificación; permite regenerar reportes sólo con los registros cambiados.
+    fecha_actualizacion: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
 
     vaca: Mapped["Vaca"] = relationship("Vaca", back_populates="registros_salud")
 
@@ -86,6 +155,25 @@ class RegistroSalud(Base):
             raise ValueError("Debe especificarse el nombre del veterinario")
         self.veterinario = nombre.strip()
 
+    def calcular_fecha_seguimiento(self) -> Optional[date]:
+        """Return the follow-up due date implied by the event type and date."""
+        dias = TipoSalud(self.tipo).dias_seguimiento()
+        if dias is None or self.fecha is None:
+            return None
+        return self.fecha + timedelta(days=dias)
+
+    def aplicar_retiro(self, medicamento: "Medicamento") -> None:
+        """Link the catalog entry and store the withdrawal end dates it implies."""
+        self.id_medicamento = medicamento.id
+        self.medicamento = self.medicamento or medicamento.nombre
+        self.fecha_fin_retiro = medicamento.fin_retiro_carne(self.fecha)
+        self.fecha_fin_retiro_leche = medicamento.fin_retiro_leche(self.fecha)
+
+    def en_retiro(self, fecha: Optional[date] = None) -> bool:
+        fecha = fecha or date.today()
+        fines = (self.fecha_fin_retiro, self.fecha_fin_retiro_leche)
+        return any(fin is not None and fin >= fecha for fin in fines)
+
     def resumen(self) -> str:
         desc = self.descripcion_resumida or "sin descripcion"
         return f"{self.fecha.isoformat()} - {self.tipo.value} ({desc})"
@@ -100,7 +188,16 @@ class RegistroSalud(Base):
             "medicamento": self.medicamento,
             "dosis": self.dosis,
             "veterinario": self.veterinario,
+            "id_medicamento": str(self.id_medicamento) if self.id_medicamento else None,
+            "fecha_fin_retiro": self.fecha_fin_retiro.isoformat() if self.fecha_fin_retiro else None,
+            "fecha_fin_retiro_leche": (
+                self.fecha_fin_retiro_leche.isoformat() if self.fecha_fin_retiro_leche else None
+            ),
+            "fecha_seguimiento": self.fecha_seguimiento.isoformat() if self.fecha_seguimiento else None,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "fecha_actualizacion": (
+                self.fecha_actualizacion.isoformat() if self.fecha_actualizacion else None
+            ),
         }
 
     def update_from_payload(self, payload: Dict[str, Any]) -> None:
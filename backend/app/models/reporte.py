@@ -8,7 +8,7 @@ import uuid
 from datetime import datetime
 from typing import Any, Dict, Optional, TYPE_CHECKING
 
-from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, JSON, Text, func
+from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, Index, JSON, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.mutable import MutableDict
@@ -24,10 +24,13 @@ class TipoReporte(str, enum.Enum):
 
     INVENTARIO = "inventario"
     SALUD = "salud"
+    PESOS = "pesos"
 
     def descripcion(self) -> str:
         if self == TipoReporte.INVENTARIO:
             return "Listado completo de ganado con filtros básicos"
+        if self == TipoReporte.PESOS:
+            return "Resumen diario de pesajes por animal y rango de fechas"
         return "Detalle de registros de salud por rango de fechas"
 
     @staticmethod
@@ -35,6 +38,31 @@ class TipoReporte(str, enum.Enum):
         return tuple(item.value for item in TipoReporte)
 
 
+class FormatoReporte(str, enum.Enum):
+    """Formatos de salida disponibles para un reporte."""
+
+    CSV = "csv"
+    JSON = "json"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+    @property
+    def extension(self) -> str:
+        return {"arrow": "arrows"}.get(self.value, self.value)
+
+    @property
+    def media_type(self) -> str:
+        return {
+            FormatoReporte.CSV: "text/csv",
+            FormatoReporte.JSON: "application/json",
+            FormatoReporte.PARQUET: "application/vnd.apache.parquet",
+            FormatoReporte.ARROW: "application/vnd.apache.arrow.stream",
+        }[self]
+
+    def es_columnar(self) -> bool:
+        return self in {FormatoReporte.PARQUET, FormatoReporte.ARROW}
+
+
 class EstadoReporte(str, enum.Enum):
     PENDIENTE = "pendiente"
     PROCESANDO = "procesando"
@@ -46,18 +74,28 @@ class Reporte(Base):
     """Modelo de reporte exportable almacenado en S3."""
 
     __tablename__ = "reportes"
-    __table_args__ = {"comment": "Solicitudes de generación de reportes"}
+    __table_args__ = (
+        Index("ix_reportes_clave_cache", "clave_cache", "fecha_generacion"),
+        Index("ix_reportes_usuario_tipo_generacion", "id_usuario", "tipo", "fecha_generacion"),
+        {"comment": "Solicitudes de generación de reportes"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     id_usuario: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True
     )
     tipo: Mapped[TipoReporte] = mapped_column(SAEnum(TipoReporte, name="tipo_reporte"), nullable=False)
+    formato: Mapped[FormatoReporte] = mapped_column(
+        SAEnum(FormatoReporte, name="formato_reporte"), nullable=False, default=FormatoReporte.CSV
+    )
     parametros: Mapped[Dict[str, Any]] = mapped_column(MutableDict.as_mutable(JSON), nullable=False, default=dict)
     estado: Mapped[EstadoReporte] = mapped_column(
         SAEnum(EstadoReporte, name="estado_reporte"), nullable=False, default=EstadoReporte.PENDIENTE
     )
     url_s3: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Huella de tipo, formato, parámetros y versión de los datos; reportes con la
+    # misma clave comparten el artefacto.
+    clave_cache: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     fecha_solicitud: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     fecha_generacion: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
@@ -67,19 +105,21 @@ class Reporte(Base):
     def crear(
         cls,
         *,
-        autor: Optional["Usuario"],
+        id_usuario: Optional[uuid.UUID],
         tipo: TipoReporte,
         parametros: Optional[Dict[str, Any]] = None,
+        formato: FormatoReporte = FormatoReporte.CSV,
     ) -> "Reporte":
-        return cls(autor=autor, tipo=tipo, parametros=parametros or {})
+        return cls(id_usuario=id_usuario, tipo=tipo, formato=formato, parametros=parametros or {})
 
     def marcar_en_proceso(self) -> None:
         self.estado = EstadoReporte.PROCESANDO
 
-    def marcar_completado(self, url: str) -> None:
+    def marcar_completado(self, url: str, generado: Optional[datetime] = None) -> None:
+        """Marca el reporte como listo; *generado* es el instante de los datos leídos."""
         self.estado = EstadoReporte.COMPLETADO
         self.url_s3 = url
-        self.fecha_generacion = datetime.utcnow()
+        self.fecha_generacion = generado or datetime.utcnow()
 
     def marcar_fallido(self) -> None:
         self.estado = EstadoReporte.FALLIDO
@@ -95,9 +135,11 @@ class Reporte(Base):
         return {
             "id": str(self.id),
             "tipo": self.tipo.value,
+            "formato": self.formato.value,
             "estado": self.estado.value,
             "parametros": self.parametros,
             "url_s3": self.url_s3,
+            "clave_cache": self.clave_cache,
             "fecha_solicitud": self.fecha_solicitud.isoformat() if self.fecha_solicitud else None,
             "fecha_generacion": self.fecha_generacion.isoformat() if self.fecha_generacion else None,
         }
@@ -106,4 +148,4 @@ class Reporte(Base):
         return f"<Reporte {self.tipo.value} {self.estado.value}>"
 
 
-__all__ = ["Reporte", "TipoReporte", "EstadoReporte"]
+__all__ = ["Reporte", "TipoReporte", "EstadoReporte", "FormatoReporte"]
@@ -0,0 +1,73 @@
+"""Resúmenes diarios de peso por animal y por propietario."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, Float, Integer, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class _ResumenDiario:
+    """Columnas comunes: mínimo, máximo, suma y número de lecturas en kg."""
+
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    min_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    max_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    suma_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    lecturas: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    @property
+    def promedio_kg(self) -> float:
+        return self.suma_kg / self.lecturas if self.lecturas else 0.0
+
+
+class ResumenPesoVacaDiario(_ResumenDiario, Base):
+    """Un renglón por animal y día.
+
+    Sin llave foránea: el resumen conserva la historia de animales archivados.
+    """
+
+    __tablename__ = "resumen_peso_vaca_diario"
+    __table_args__ = {"comment": "Resumen diario de pesajes por animal"}
+
+    id_vaca: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ResumenPesoVacaDiario {self.id_vaca} {self.fecha} n={self.lecturas}>"
+
+
+class ResumenPesoUsuarioDiario(_ResumenDiario, Base):
+    """Un renglón por propietario y día, sobre todos sus animales."""
+
+    __tablename__ = "resumen_peso_usuario_diario"
+    __table_args__ = {"comment": "Resumen diario de pesajes por propietario"}
+
+    id_usuario: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ResumenPesoUsuarioDiario {self.id_usuario} {self.fecha} n={self.lecturas}>"
+
+
+class MarcaAgregacion(Base):
+    """Marca de agua de un resumen: lecturas con ``timestamp`` <= ``hasta`` ya están sumadas."""
+
+    __tablename__ = "marcas_agregacion"
+    __table_args__ = {"comment": "Marcas de agua de los resúmenes incrementales"}
+
+    nombre: Mapped[str] = mapped_column(String(64), primary_key=True)
+    hasta: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    actualizado: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<MarcaAgregacion {self.nombre} hasta={self.hasta}>"
+
+
+__all__ = ["MarcaAgregacion", "ResumenPesoUsuarioDiario", "ResumenPesoVacaDiario"]
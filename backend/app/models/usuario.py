@@ -5,17 +5,16 @@ from __future__ import annotations
 
 import enum
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, List, Optional, TYPE_CHECKING
 
-from jose import jwt
 from passlib.context import CryptContext
 from sqlalchemy import Boolean, DateTime, Enum as SAEnum, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.config import settings
 from app.core.database import Base
+from app.core.security import create_access_token
 
 if TYPE_CHECKING:  # pragma: no cover - typing helpers only
     from app.models.vaca import Vaca
@@ -62,6 +61,7 @@ class Usuario(Base):
         "Vaca",
         back_populates="propietario",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         lazy="selectin",
     )
     reportes: Mapped[List["Reporte"]] = relationship(
@@ -84,15 +84,7 @@ class Usuario(Base):
         expires_minutes: Optional[int] = None,
         extra_claims: Optional[Dict[str, Any]] = None,
     ) -> str:
-        exp_minutes = expires_minutes or settings.security.access_token_exp_minutes
-        payload: Dict[str, Any] = {
-            "sub": str(self.id),
-            "role": self.rol.value,
-            "exp": datetime.utcnow() + timedelta(minutes=exp_minutes),
-        }
-        if extra_claims:
-            payload.update(extra_claims)
-        return jwt.encode(payload, settings.security.secret_key, algorithm=settings.security.algorithm)
+        return create_access_token(self.id, self.rol.value, expires_minutes, extra_claims)
 
     @property
     def is_admin(self) -> bool:
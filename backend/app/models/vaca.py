@@ -6,14 +6,28 @@ from __future__ import annotations
 import enum
 import uuid
 from datetime import date, datetime
-from typing import List, Optional, TYPE_CHECKING
-
-from sqlalchemy import Date, DateTime, Enum as SAEnum, ForeignKey, Numeric, String, UniqueConstraint, func
+from typing import Dict, FrozenSet, List, Optional, TYPE_CHECKING
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Enum as SAEnum,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    UniqueConstraint,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
 
+from app.models.registro_salud import TipoSalud
+
 if TYPE_CHECKING:  # pragma: no cover
     from app.models.usuario import Usuario
     from app.models.registro_salud import RegistroSalud
@@ -31,11 +45,35 @@ class EstadoVaca(str, enum.Enum):
     VENDIDA = "vendida"
     FALLECIDA = "fallecida"
 
+    def puede_cambiar_a(self, destino: "EstadoVaca") -> bool:
+        """Return True when moving from this state to *destino* is allowed."""
+        return destino == self or destino in TRANSICIONES_ESTADO[self]
+
+    @classmethod
+    def origenes_para(cls, destino: "EstadoVaca") -> FrozenSet["EstadoVaca"]:
+        """States from which *destino* can be reached (including itself)."""
+        return frozenset(origen for origen in cls if origen.puede_cambiar_a(destino))
+
+
+# Vendida y fallecida son estados terminales.
+TRANSICIONES_ESTADO: Dict[EstadoVaca, FrozenSet[EstadoVaca]] = {
+    EstadoVaca.ACTIVA: frozenset({EstadoVaca.ENFERMA, EstadoVaca.VENDIDA, EstadoVaca.FALLECIDA}),
+    EstadoVaca.ENFERMA: frozenset({EstadoVaca.ACTIVA, EstadoVaca.VENDIDA, EstadoVaca.FALLECIDA}),
+    EstadoVaca.VENDIDA: frozenset(),
+    EstadoVaca.FALLECIDA: frozenset(),
+}
+
 
 class Vaca(Base):
     __tablename__ = "vacas"
+    # Todo acceso va acotado al propietario: los índices empiezan por id_usuario
+    # para que el costo de cada consulta dependa sólo del hato de ese usuario.
     __table_args__ = (
-        UniqueConstraint("identificador", name="uq_vacas_identificador"),
+        UniqueConstraint("id_usuario", "identificador", name="uq_vacas_usuario_identificador"),
+        # Destino de las claves foráneas (id_vaca, id_usuario) del historial.
+        UniqueConstraint("id_usuario", "id", name="uq_vacas_usuario_id"),
+        Index("ix_vacas_usuario_estado", "id_usuario", "estado"),
+        Index("ix_vacas_usuario_fecha_actualizacion", "id_usuario", "fecha_actualizacion"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -49,12 +87,17 @@ class Vaca(Base):
         nullable=False,
         default=EstadoVaca.ACTIVA,
     )
+    # Último estado conocido, mantenido al insertar registros (peso en kg).
     peso_actual: Mapped[Optional[float]] = mapped_column(Numeric(10, 2), nullable=True)
+    fecha_peso_actual: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    ultimo_evento_salud: Mapped[Optional[TipoSalud]] = mapped_column(
+        SAEnum(TipoSalud, name="tipo_salud"), nullable=True
+    )
+    fecha_ultimo_evento_salud: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     id_usuario: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("usuarios.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     fecha_registro: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -62,12 +105,17 @@ class Vaca(Base):
     fecha_actualizacion: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
+    # Versión para control de concurrencia optimista (ETag / If-Match).
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": version}
 
     propietario: Mapped["Usuario"] = relationship("Usuario", back_populates="vacas")
     registros_salud: Mapped[List["RegistroSalud"]] = relationship(
         "RegistroSalud",
         back_populates="vaca",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         lazy="selectin",
         order_by="RegistroSalud.fecha.desc()",
     )
@@ -75,6 +123,7 @@ class Vaca(Base):
         "RegistroPeso",
         back_populates="vaca",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         lazy="selectin",
         order_by="RegistroPeso.fecha.desc()",
     )
@@ -83,11 +132,14 @@ class Vaca(Base):
         if nuevo_peso <= 0:
             raise ValueError("El peso debe ser positivo")
         self.peso_actual = round(float(nuevo_peso), 2)
+        self.fecha_peso_actual = date.today()
 
     def actualizar_estado(self, nuevo_estado: EstadoVaca) -> None:
         """Update the cattle status ensuring consistent transitions."""
         if not isinstance(nuevo_estado, EstadoVaca):
             raise ValueError("Estado inválido para la vaca")
+        if self.estado is not None and not EstadoVaca(self.estado).puede_cambiar_a(nuevo_estado):
+            raise ValueError(f"Transición de estado no permitida: {self.estado} -> {nuevo_estado}")
         self.estado = nuevo_estado
 
     @property
@@ -106,4 +158,4 @@ class Vaca(Base):
         return f"<Vaca {self.identificador} ({self.estado})>"
 
 
-__all__ = ["Vaca", "SexoVaca", "EstadoVaca"]
+__all__ = ["Vaca", "SexoVaca", "EstadoVaca", "TRANSICIONES_ESTADO"]
@@ -1,13 +1,22 @@
 """Pydantic schemas package."""
-from .auth import UserLogin, UserRegister, Token, UserResponse
+from .audit import AuditEntryResponse
+from .auth import UserLogin, UserRegister, UserRoleUpdate, Token, UserResponse
 from .cattle import CattleCreate, CattleUpdate, CattleResponse
+from .medications import MedicationCreate, MedicationResponse
+from .reports import ReportCreate, ReportResponse
 
 __all__ = [
+    "AuditEntryResponse",
     "UserLogin",
     "UserRegister", 
+    "UserRoleUpdate",
     "Token",
     "UserResponse",
     "CattleCreate",
     "CattleUpdate",
     "CattleResponse",
+    "MedicationCreate",
+    "MedicationResponse",
+    "ReportCreate",
+    "ReportResponse",
 ]
@@ -0,0 +1,20 @@
+"""Audit trail schemas."""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class AuditEntryResponse(BaseModel):
+    id: int
+    momento: datetime
+    id_actor: Optional[UUID]
+    id_usuario: Optional[UUID]
+    entidad: str
+    id_entidad: UUID
+    id_vaca: Optional[UUID]
+    operacion: str
+    cambios: Dict[str, Any]
+
+    class Config:
+        from_attributes = True
@@ -11,7 +11,10 @@ class UserRegister(BaseModel):
     nombre: str = Field(..., min_length=2, max_length=120)
     email: EmailStr
     password: str = Field(..., min_length=8)
-    rol: str = Field(default="field")
+
+
+class UserRoleUpdate(BaseModel):
+    rol: str = Field(..., pattern="^(admin|field)$")
 
 
 class Token(BaseModel):
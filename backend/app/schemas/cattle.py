@@ -1,7 +1,8 @@
 """Cattle management schemas."""
-from datetime import date
-from typing import Optional
-from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field, model_validator
 
 
 class CattleCreate(BaseModel):
@@ -16,12 +17,20 @@ class CattleCreate(BaseModel):
 class CattleUpdate(BaseModel):
     nombre: Optional[str] = Field(None, max_length=120)
     raza: Optional[str] = Field(None, max_length=120)
-    estado: Optional[str] = None
+    estado: Optional[str] = Field(None, pattern="^(activa|enferma|vendida|fallecida)$")
     peso_actual: Optional[float] = Field(None, gt=0)
 
+    @model_validator(mode="after")
+    def _required_not_null(self) -> "CattleUpdate":
+        # Omitted means unchanged; an explicit null would hit a NOT NULL column
+        for campo in ("nombre", "estado"):
+            if campo in self.model_fields_set and getattr(self, campo) is None:
+                raise ValueError(f"{campo} cannot be null")
+        return self
+
 
 class CattleResponse(BaseModel):
-    id: str
+    id: UUID
     identificador: str
     nombre: str
     raza: Optional[str]
@@ -29,6 +38,11 @@ class CattleResponse(BaseModel):
     sexo: str
     estado: str
     peso_actual: Optional[float]
+    fecha_peso_actual: Optional[date] = None
+    ultimo_evento_salud: Optional[str] = None
+    fecha_ultimo_evento_salud: Optional[date] = None
+    version: int = 1
+    archivada: bool = False
     
     class Config:
         from_attributes = True
@@ -37,16 +51,194 @@ class CattleResponse(BaseModel):
 class HealthRecordCreate(BaseModel):
     id_vaca: str
     fecha: date
-    tipo: str
+    tipo: str = Field(..., pattern="^(vacunacion|desparasitacion|revision|tratamiento|otro)$")
     descripcion: Optional[str] = None
     medicamento: Optional[str] = None
     dosis: Optional[str] = None
     veterinario: Optional[str] = None
+    id_medicamento: Optional[UUID] = None
 
 
 class WeightRecordCreate(BaseModel):
     id_vaca: str
     fecha: date
     peso: float = Field(..., gt=0)
-    unidad: str = Field(default="kg")
-    metodo: str = Field(default="manual")
+    unidad: str = Field(default="kg", pattern="^(kg|lb)$")
+    metodo: str = Field(default="manual", pattern="^(manual|bascula|automatico)$")
+
+
+class FollowUpDueResponse(BaseModel):
+    id: UUID
+    id_vaca: UUID
+    identificador: str
+    nombre: str
+    tipo: str
+    fecha: date
+    fecha_seguimiento: date
+    medicamento: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class HerdStatsResponse(BaseModel):
+    total: int
+    por_estado: Dict[str, int]
+    por_sexo: Dict[str, int]
+    por_raza: Dict[str, int]
+    por_edad: Dict[str, int]
+    generado: datetime
+
+
+class CattleFilter(BaseModel):
+    estado: Optional[str] = Field(None, pattern="^(activa|enferma|vendida|fallecida)$")
+    sexo: Optional[str] = Field(None, pattern="^(H|M)$")
+    raza: Optional[str] = Field(None, max_length=120)
+    nacimiento_desde: Optional[date] = None
+    nacimiento_hasta: Optional[date] = None
+
+    @model_validator(mode="after")
+    def _not_empty(self) -> "CattleFilter":
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("filtro must set at least one criterion")
+        return self
+
+
+class CattleSelection(BaseModel):
+    ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=10_000)
+    filtro: Optional[CattleFilter] = None
+
+    @model_validator(mode="after")
+    def _one_selector(self) -> "CattleSelection":
+        if (self.ids is None) == (self.filtro is None):
+            raise ValueError("Provide exactly one of 'ids' or 'filtro'")
+        return self
+
+
+class CattleBatchGet(BaseModel):
+    ids: Optional[List[UUID]] = Field(None, max_length=1000)
+    identificadores: Optional[List[str]] = Field(None, max_length=1000)
+
+    @model_validator(mode="after")
+    def _some_key(self) -> "CattleBatchGet":
+        if not self.ids and not self.identificadores:
+            raise ValueError("Provide 'ids' and/or 'identificadores'")
+        return self
+
+
+class CattleBatchMissing(BaseModel):
+    ids: List[UUID] = []
+    identificadores: List[str] = []
+
+
+class CattleBatchGetResponse(BaseModel):
+    vacas: List[CattleResponse]
+    faltantes: CattleBatchMissing
+
+
+class BulkDeleteResponse(BaseModel):
+    eliminados: int
+
+
+class ArchiveRunResponse(BaseModel):
+    archivadas: int
+
+
+class CattleBulkUpdate(CattleSelection):
+    cambios: CattleUpdate
+
+
+class BulkRejection(BaseModel):
+    id: UUID
+    motivo: str
+
+
+class BulkUpdateResponse(BaseModel):
+    actualizadas: List[CattleResponse]
+    rechazadas: List[BulkRejection] = Field(default_factory=list)
+
+
+class CattleBatchCreate(BaseModel):
+    items: List[CattleCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class BatchItemResult(BaseModel):
+    indice: int
+    identificador: str
+    estado: str
+    id: Optional[UUID] = None
+
+
+class BatchCreateResponse(BaseModel):
+    creadas: int
+    duplicadas: int
+    resultados: List[BatchItemResult]
+
+
+class WithdrawalResponse(BaseModel):
+    id: UUID
+    identificador: str
+    nombre: str
+    estado: str
+    retiro_carne_hasta: Optional[date]
+    retiro_leche_hasta: Optional[date]
+
+
+class WeightRollupResponse(BaseModel):
+    fecha: date
+    min_kg: float
+    max_kg: float
+    promedio_kg: float
+    lecturas: int
+
+
+class RollupBackfillResponse(BaseModel):
+    dias: int
+    filas: int
+
+
+class CardWeight(BaseModel):
+    fecha: date
+    peso_kg: float
+    metodo: str
+
+
+class CardHealthEvent(BaseModel):
+    fecha: date
+    tipo: str
+    descripcion: Optional[str] = None
+    medicamento: Optional[str] = None
+    fecha_fin_retiro: Optional[date] = None
+
+
+class CattleCardResponse(BaseModel):
+    id: UUID
+    identificador: str
+    nombre: str
+    raza: Optional[str]
+    sexo: str
+    estado: str
+    fecha_nacimiento: Optional[date]
+    edad_en_dias: Optional[int]
+    peso_actual: Optional[float]
+    fecha_peso_actual: Optional[date] = None
+    version: int = 1
+    ganancia_media_diaria: Optional[float] = None
+    ultimos_pesos: List[CardWeight] = []
+    ultimos_eventos: List[CardHealthEvent] = []
+
+
+class WeightAlertResponse(BaseModel):
+    id: UUID
+    id_vaca: UUID
+    identificador: str
+    fecha: date
+    peso_kg: float
+    ganancia_diaria: float
+    ganancia_esperada: float
+    puntaje_z: float
+    atendida: bool
+    creada: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,22 @@
+"""Medication catalog schemas."""
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class MedicationCreate(BaseModel):
+    nombre: str = Field(..., min_length=1, max_length=255)
+    principio_activo: Optional[str] = Field(None, max_length=255)
+    dias_retiro_carne: int = Field(default=0, ge=0, le=3650)
+    dias_retiro_leche: int = Field(default=0, ge=0, le=3650)
+
+
+class MedicationResponse(BaseModel):
+    id: UUID
+    nombre: str
+    principio_activo: Optional[str]
+    dias_retiro_carne: int
+    dias_retiro_leche: int
+
+    class Config:
+        from_attributes = True
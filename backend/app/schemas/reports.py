@@ -0,0 +1,23 @@
+"""Report request schemas."""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class ReportCreate(BaseModel):
+    tipo: str = Field(..., pattern="^(inventario|salud|pesos)$")
+    formato: str = Field(default="csv", pattern="^(csv|json|parquet|arrow)$")
+    parametros: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ReportResponse(BaseModel):
+    id: UUID
+    tipo: str
+    formato: str
+    estado: str
+    parametros: Dict[str, Any]
+    url_descarga: Optional[str] = None
+    url_eventos: Optional[str] = None
+    fecha_solicitud: Optional[datetime]
+    fecha_generacion: Optional[datetime]
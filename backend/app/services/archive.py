@@ -0,0 +1,107 @@
+"""Hot/cold archival of animals that left the herd.
+
+Sold and deceased animals are moved, together with their history, into the
+``*_archivo`` tables in batches. Each batch copies the rows with
+``INSERT ... SELECT`` and then deletes the animals, letting ``ON DELETE
+CASCADE`` clear their history from the active tables. The archive stays
+queryable through :func:`cattle_with_archive`. Each archived animal is
+recorded in the outbox and the audit trail as ``archivado``.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import Select, delete, false, insert, select, true, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.archivo import ARCHIVE_PAIRS, VacaArchivada
+from app.models.outbox import OperacionOutbox
+from app.models.vaca import EstadoVaca, Vaca
+from app.services.audit import record_changes
+from app.services.outbox import VACA, record_events
+
+INACTIVE_STATES = (EstadoVaca.VENDIDA, EstadoVaca.FALLECIDA)
+DEFAULT_BATCH_SIZE = 500
+
+
+def archive_batch(db: Session, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Archive up to *batch_size* inactive animals in the current transaction."""
+    archived = db.execute(
+        select(Vaca.id, Vaca.id_usuario)
+        .where(Vaca.estado.in_(INACTIVE_STATES))
+        .order_by(Vaca.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not archived:
+        return 0
+    ids = [row.id for row in archived]
+    for source, target in ARCHIVE_PAIRS:
+        key = source.c.id if source.name == Vaca.__tablename__ else source.c.id_vaca
+        columns = [column.name for column in source.columns]
+        db.execute(
+            insert(target).from_select(columns, select(*source.columns).where(key.in_(ids)))
+        )
+    db.execute(
+        delete(Vaca).where(Vaca.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+    record_events(db, VACA, OperacionOutbox.ARCHIVADO, [{"id": cattle_id} for cattle_id in ids])
+    record_changes(db, VACA, OperacionOutbox.ARCHIVADO, [row._mapping for row in archived])
+    return len(ids)
+
+
+def archive_inactive(
+    session_factory: Callable[[], Session],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Archive inactive animals batch by batch, committing after each one."""
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with session_factory() as db:
+            moved = archive_batch(db, batch_size)
+            db.commit()
+        if not moved:
+            break
+        total += moved
+        batches += 1
+    return total
+
+
+def cattle_with_archive(
+    criteria: Callable[[object], Sequence[ColumnElement[bool]]],
+    include_archived: bool,
+    columns: Optional[List[str]] = None,
+) -> Select:
+    """SELECT over ``vacas`` (plus ``vacas_archivo`` when requested).
+
+    *criteria* receives the table-like entity (``Vaca`` or ``VacaArchivada``)
+    and returns the WHERE criteria to apply to it; rows carry an ``archivada``
+    flag telling where they came from.
+    """
+    names = columns or [column.name for column in Vaca.__table__.columns]
+
+    def branch(entity, archived: bool) -> Select:
+        table = entity.__table__
+        return select(
+            *(table.c[name] for name in names),
+            (true() if archived else false()).label("archivada"),
+        ).where(*criteria(entity))
+
+    active = branch(Vaca, False)
+    if not include_archived:
+        return active
+    combined = union_all(active, branch(VacaArchivada, True)).subquery("vacas_con_archivo")
+    return select(combined)
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "INACTIVE_STATES",
+    "archive_batch",
+    "archive_inactive",
+    "cattle_with_archive",
+]
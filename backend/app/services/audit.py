@@ -0,0 +1,346 @@
+"""Asynchronous, batched audit trail of data changes.
+
+Changes to animals, weight readings and health records are captured without
+touching the audited transaction: ORM flushes through a session listener,
+set-based statements through :func:`record_changes` called with the rows
+they returned. Entries wait in ``session.info`` and are queued only when the
+transaction commits; a rolled-back transaction or savepoint drops its own.
+
+:class:`AuditWriter` drains the queue from a background thread and writes
+each batch into ``auditoria`` with a single ``COPY``. The actor is the
+authenticated user of the request (:data:`actor`), ``None`` for background
+work such as write-behind ingestion.
+
+Durability bound: committed changes whose entries are still queued, at most
+``max_queue`` of them and ``flush_interval_ms`` plus one ``COPY`` old, are
+lost if the process dies; :meth:`AuditWriter.stop` writes everything queued
+on clean shutdown. A failed ``COPY`` is retried with backoff rather than
+dropped; entries committed meanwhile wait in the queue and are only dropped
+once it is full.
+"""
+
+from __future__ import annotations
+
+import csv
+import enum
+import io
+import json
+import logging
+import queue
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import Table, event, inspect, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.sql.elements import Label
+
+from app.core.config import AuditConfig, settings
+from app.core.database import SessionLocal
+from app.models.auditoria import Auditoria
+from app.models.outbox import OperacionOutbox
+from app.models.vaca import Vaca
+from app.services.batching import BatchStats, BatchingWorker
+from app.services.outbox import VACA, flushed_changes
+
+logger = logging.getLogger(__name__)
+
+# Authenticated user on whose behalf the current request writes
+actor: ContextVar[Optional[uuid.UUID]] = ContextVar("audit_actor", default=None)
+
+COLUMNS = (
+    "momento",
+    "id_actor",
+    "id_usuario",
+    "entidad",
+    "id_entidad",
+    "id_vaca",
+    "operacion",
+    "cambios",
+)
+COPY_SQL = f"COPY {Auditoria.__tablename__} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+PREVIOUS_PREFIX = "anterior_"
+_PENDING = "auditoria_pendiente"
+_auditoria = Auditoria.__table__
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+@dataclass(frozen=True)
+class AuditEntry:
+    """One audited change, stamped with its actor and commit time."""
+
+    momento: datetime
+    id_actor: Optional[uuid.UUID]
+    id_usuario: Optional[uuid.UUID]
+    entidad: str
+    id_entidad: uuid.UUID
+    id_vaca: Optional[uuid.UUID]
+    operacion: str
+    cambios: Dict[str, Any]
+
+    def as_csv_row(self) -> List[Any]:
+        # csv writes None unquoted, which COPY reads as NULL
+        return [
+            self.momento.isoformat(),
+            self.id_actor,
+            self.id_usuario,
+            self.entidad,
+            self.id_entidad,
+            self.id_vaca,
+            self.operacion,
+            json.dumps(self.cambios, ensure_ascii=False, default=_json_default),
+        ]
+
+
+def _change(
+    entidad: str, operacion: OperacionOutbox, datos: Mapping[str, Any], cambios: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Entry fields known at capture time; actor and moment are added at commit."""
+    return {
+        "id_usuario": datos.get("id_usuario"),
+        "entidad": entidad,
+        "id_entidad": datos["id"],
+        "id_vaca": datos["id"] if entidad == VACA else datos.get("id_vaca"),
+        "operacion": operacion.value,
+        "cambios": cambios,
+    }
+
+
+def _stash(session: Session, changes: Iterable[Dict[str, Any]]) -> None:
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    pending = session.info.setdefault(_PENDING, [])
+    pending.extend((transaction, change) for change in changes)
+
+
+def previous_values(table: Table, campos: Sequence[str]) -> List[Label]:
+    """``RETURNING`` columns carrying the pre-update value of *campos* from *table*.
+
+    *table* is an alias of the updated table joined on its primary key
+    (``UPDATE ... FROM vacas AS anterior``), whose rows are read before the update.
+    """
+    return [table.c[campo].label(PREVIOUS_PREFIX + campo) for campo in campos]
+
+
+def record_changes(
+    db: Session,
+    entidad: str,
+    operacion: OperacionOutbox,
+    rows: Iterable[Mapping[str, Any]],
+    campos: Optional[Sequence[str]] = None,
+) -> None:
+    """Audit rows written by a set-based statement, once the transaction commits.
+
+    For updates, *campos* names the changed columns; their old values are read
+    from the ``anterior_*`` keys added by :func:`previous_values`, when present.
+    """
+    if not audit_writer.enabled:
+        return
+    changes = []
+    for row in rows:
+        if campos is None:
+            cambios = {
+                key: value for key, value in row.items() if not key.startswith(PREVIOUS_PREFIX)
+            }
+        else:
+            cambios = {
+                campo: {"anterior": row.get(PREVIOUS_PREFIX + campo), "nuevo": row.get(campo)}
+                for campo in campos
+            }
+        changes.append(_change(entidad, operacion, row, cambios))
+    _stash(db, changes)
+
+
+def _keep_previous(target: Any, value: Any, oldvalue: Any, initiator: Any) -> None:
+    """No-op; registering it with ``active_history`` makes the old value load on set."""
+
+
+# An expired animal would otherwise lose the previous value of a changed field
+for _column in inspect(Vaca).column_attrs:
+    event.listen(_column.class_attribute, "set", _keep_previous, active_history=True)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _capture_flush(session: Session, flush_context) -> None:
+    """Audit ORM changes with the old and new value of every changed column."""
+    if not audit_writer.enabled:
+        return
+    changes = []
+    for change in flushed_changes(session):
+        if change.operacion is OperacionOutbox.ACTUALIZADO:
+            cambios = {
+                key: {
+                    "anterior": history.deleted[0] if history.deleted else None,
+                    "nuevo": history.added[0] if history.added else None,
+                }
+                for key, history in change.historial.items()
+            }
+        else:
+            cambios = change.datos
+        changes.append(_change(change.agregado, change.operacion, change.datos, cambios))
+    if changes:
+        _stash(session, changes)
+
+
+def _within(transaction: Optional[SessionTransaction], ancestor: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction: SessionTransaction) -> None:
+    pending = session.info.get(_PENDING)
+    if pending:
+        pending[:] = [
+            (transaction, change)
+            for transaction, change in pending
+            if not _within(transaction, previous_transaction)
+        ]
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _queue_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    momento = datetime.now(timezone.utc)
+    id_actor = actor.get()
+    audit_writer.submit(
+        [AuditEntry(momento=momento, id_actor=id_actor, **change) for _, change in pending]
+    )
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _forget_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def copy_entries(db: Session, entries: Sequence[AuditEntry]) -> int:
+    """Write *entries* with one ``COPY`` in the session's current transaction."""
+    if not entries:
+        return 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for entry in entries:
+        writer.writerow(entry.as_csv_row())
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(COPY_SQL, buffer)
+    finally:
+        cursor.close()
+    return len(entries)
+
+
+def audit_trail(
+    db: Session,
+    *,
+    id_vaca: Optional[uuid.UUID] = None,
+    id_actor: Optional[uuid.UUID] = None,
+    id_usuario: Optional[uuid.UUID] = None,
+    antes: Optional[datetime] = None,
+    antes_id: Optional[int] = None,
+    limit: int = 100,
+) -> List[Row]:
+    """Newest entries of an animal or an actor, optionally restricted to one owner.
+
+    Pages backwards from the last entry seen, given by its ``momento`` (*antes*)
+    and ``id`` (*antes_id*): every entry of a commit shares its ``momento``, so
+    ``momento`` alone would skip the rest of a commit split across pages.
+    """
+    if id_vaca is None and id_actor is None:
+        raise ValueError("id_vaca or id_actor is required")
+    stmt = select(_auditoria)
+    if id_vaca is not None:
+        stmt = stmt.where(_auditoria.c.id_vaca == id_vaca)
+    if id_actor is not None:
+        stmt = stmt.where(_auditoria.c.id_actor == id_actor)
+    if id_usuario is not None:
+        stmt = stmt.where(_auditoria.c.id_usuario == id_usuario)
+    if antes is not None and antes_id is not None:
+        stmt = stmt.where(tuple_(_auditoria.c.momento, _auditoria.c.id) < tuple_(antes, antes_id))
+    elif antes is not None:
+        stmt = stmt.where(_auditoria.c.momento < antes)
+    stmt = stmt.order_by(_auditoria.c.momento.desc(), _auditoria.c.id.desc()).limit(limit)
+    return db.execute(stmt).all()
+
+
+@dataclass
+class AuditStats(BatchStats):
+    queued: int = 0
+    dropped: int = 0
+
+
+class AuditWriter(BatchingWorker[AuditEntry]):
+    """Bounded buffer copied into ``auditoria`` by a background thread."""
+
+    thread_name = "audit-writer"
+    item_name = "audit entries"
+
+    def __init__(
+        self,
+        config: AuditConfig,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        super().__init__(config, AuditStats())
+        self.session_factory = session_factory
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def submit(self, entries: Sequence[AuditEntry]) -> None:
+        """Queue *entries*; the change is committed already, so a full queue drops them."""
+        deadline = time.monotonic() + self.config.enqueue_timeout_ms / 1000
+        for index, entry in enumerate(entries):
+            try:
+                self._queue.put(entry, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                dropped = len(entries) - index
+                self.stats.dropped += dropped
+                logger.error("Audit queue full: dropped %s entries", dropped)
+                return
+            self.stats.queued += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, **super().snapshot()}
+
+    def _write(self, batch: List[AuditEntry]) -> int:
+        with self.session_factory() as db:
+            written = copy_entries(db, batch)
+            db.commit()
+        return written
+
+
+audit_writer = AuditWriter(settings.audit)
+
+
+__all__ = [
+    "AuditEntry",
+    "AuditStats",
+    "AuditWriter",
+    "COPY_SQL",
+    "actor",
+    "audit_trail",
+    "audit_writer",
+    "copy_entries",
+    "previous_values",
+    "record_changes",
+]
@@ -0,0 +1,152 @@
+"""Bounded in-process queues drained in batches by a background thread.
+
+:class:`BatchingWorker` holds what write-behind ingestion and the audit
+writer share: the queue, the worker thread and its lifecycle, batching by
+size or ``flush_interval_ms``, and a flush that retries a failed batch with
+exponential backoff capped at ``max_backoff_s`` instead of dropping it. While
+a batch is retried nothing more is taken from the queue, so producers feel
+the backpressure once it fills up.
+
+Subclasses implement :meth:`BatchingWorker._write`, which stores a batch and
+returns how many items were kept; items the database rejects for good are
+the subclass's to isolate and are counted as ``failed``.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class BatchStats:
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    retries: int = 0
+    last_error: Optional[str] = None
+    last_flush_at: Optional[datetime] = None
+
+
+class BatchingWorker(Generic[T]):
+    """Background thread writing queued items in batches, retrying failures.
+
+    *config* provides ``batch_size``, ``flush_interval_ms``, ``max_queue`` and
+    ``max_backoff_s``.
+    """
+
+    thread_name = "batching-worker"
+    item_name = "items"
+
+    def __init__(self, config: Any, stats: BatchStats) -> None:
+        self.config = config
+        self.stats = stats
+        self._queue: "queue.Queue[T]" = queue.Queue(maxsize=config.max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop the worker after it has written every queued item (blocking)."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "depth": self._queue.qsize(),
+            "capacity": self.config.max_queue,
+            **self.stats.__dict__,
+        }
+
+    def _next_batch(self) -> List[T]:
+        interval = self.config.flush_interval_ms / 1000
+        batch: List[T] = []
+        try:
+            batch.append(self._queue.get(timeout=interval))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + interval
+        while len(batch) < self.config.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _ready(self, batch: List[T]) -> List[T]:
+        """Items of *batch* to write now; overridden to hold items back."""
+        return batch
+
+    def _leftover(self) -> List[T]:
+        """Items held back by :meth:`_ready`, written once on shutdown."""
+        return []
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = self._ready(self._next_batch())
+                if batch:
+                    self._flush(batch)
+            except Exception:
+                # Never let the worker die: the queue would only fill up behind it
+                logger.exception("%s worker error", self.thread_name)
+        leftover = self._leftover()
+        if leftover:
+            self._flush(leftover)
+
+    def _flush(self, batch: List[T]) -> None:
+        """Write *batch*, retrying transient failures until it is stored."""
+        delay = self.config.flush_interval_ms / 1000
+        while True:
+            try:
+                written = self._write(batch)
+                break
+            except Exception as exc:
+                self.stats.retries += 1
+                self.stats.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception(
+                    "%s flush failed; retrying %s %s in %.1fs",
+                    self.thread_name,
+                    len(batch),
+                    self.item_name,
+                    delay,
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, self.config.max_backoff_s)
+        self.stats.written += written
+        self.stats.failed += len(batch) - written
+        self.stats.batches += 1
+        self.stats.last_flush_at = datetime.now(timezone.utc)
+
+    def _write(self, batch: List[T]) -> int:
+        """Store *batch* and return how many items were kept; raise to retry."""
+        raise NotImplementedError
+
+
+__all__ = ["BatchStats", "BatchingWorker"]
@@ -0,0 +1,322 @@
+"""Set-based operations over many animals at once.
+
+Every operation runs as a single statement whose WHERE clause is built from a
+:class:`CattleSelection` (explicit ids or a filter) and is always limited to
+the animals of one owner. History rows are removed
+by the ``ON DELETE CASCADE`` foreign keys, never loaded into the session.
+The rows returned by each statement are recorded in the outbox.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.vaca import EstadoVaca, SexoVaca, Vaca
+from app.models.outbox import OperacionOutbox
+from app.schemas.cattle import CattleCreate, CattleSelection
+from app.services.archive import cattle_with_archive
+from app.services.audit import previous_values, record_changes
+from app.services.outbox import VACA, record_events
+from app.services.withdrawal import under_withdrawal
+
+CATTLE_COLUMNS = tuple(Vaca.__table__.columns)
+FIELD_NAMES = tuple(column.name for column in CATTLE_COLUMNS) + ("archivada",)
+
+NOT_FOUND = "not_found"
+INVALID_TRANSITION = "invalid_transition"
+UNDER_WITHDRAWAL = "under_withdrawal"
+VERSION_MISMATCH = "version_mismatch"
+CREATED = "created"
+DUPLICATE = "duplicate"
+
+
+def _insert_row(item: CattleCreate, owner: uuid.UUID) -> Dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "identificador": item.identificador,
+        "nombre": item.nombre,
+        "raza": item.raza,
+        "fecha_nacimiento": item.fecha_nacimiento,
+        "sexo": SexoVaca(item.sexo),
+        "estado": EstadoVaca.ACTIVA,
+        "peso_actual": item.peso_actual,
+        "fecha_peso_actual": date.today() if item.peso_actual is not None else None,
+        "id_usuario": owner,
+    }
+
+
+def _cattle_fields(row: Row) -> Dict[str, Any]:
+    return {column.name: row._mapping[column.name] for column in CATTLE_COLUMNS}
+
+
+def create_cattle(db: Session, item: CattleCreate, owner: uuid.UUID) -> Optional[Row]:
+    """Insert one animal with ``INSERT ... ON CONFLICT DO NOTHING RETURNING``.
+
+    Returns ``None`` when *owner* already has an animal with that ``identificador``.
+    """
+    stmt = (
+        pg_insert(Vaca)
+        .values(**_insert_row(item, owner))
+        .on_conflict_do_nothing(index_elements=[Vaca.id_usuario, Vaca.identificador])
+        .returning(*CATTLE_COLUMNS)
+    )
+    row = db.execute(stmt).first()
+    if row is not None:
+        record_events(db, VACA, OperacionOutbox.CREADO, [row._mapping])
+        record_changes(db, VACA, OperacionOutbox.CREADO, [row._mapping])
+    return row
+
+
+def create_cattle_batch(
+    db: Session, items: Sequence[CattleCreate], owner: uuid.UUID
+) -> List[Dict[str, Any]]:
+    """Insert many animals in one multi-row statement with per-item results.
+
+    Repeated identificadores inside the batch keep their first occurrence.
+    """
+    first_seen: Dict[str, int] = {}
+    for index, item in enumerate(items):
+        first_seen.setdefault(item.identificador, index)
+    unique = [items[index] for index in first_seen.values()]
+    created: Dict[str, uuid.UUID] = {}
+    if unique:
+        stmt = (
+            pg_insert(Vaca)
+            .values([_insert_row(item, owner) for item in unique])
+            .on_conflict_do_nothing(index_elements=[Vaca.id_usuario, Vaca.identificador])
+            .returning(*CATTLE_COLUMNS)
+        )
+        rows = db.execute(stmt).all()
+        record_events(db, VACA, OperacionOutbox.CREADO, [row._mapping for row in rows])
+        record_changes(db, VACA, OperacionOutbox.CREADO, [row._mapping for row in rows])
+        created = {row.identificador: row.id for row in rows}
+
+    results = []
+    for index, item in enumerate(items):
+        fresh = first_seen[item.identificador] == index and item.identificador in created
+        results.append(
+            {
+                "indice": index,
+                "identificador": item.identificador,
+                "estado": CREATED if fresh else DUPLICATE,
+                "id": created[item.identificador] if fresh else None,
+            }
+        )
+    return results
+
+
+def selection_criteria(
+    selection: CattleSelection, id_usuario: uuid.UUID
+) -> List[ColumnElement[bool]]:
+    """Translate *selection* into WHERE criteria on the ``vacas`` of *id_usuario*."""
+    criteria: List[ColumnElement[bool]] = [Vaca.id_usuario == id_usuario]
+    if selection.ids is not None:
+        return [*criteria, Vaca.id.in_(selection.ids)]
+    filtro = selection.filtro
+    if filtro.estado:
+        criteria.append(Vaca.estado == EstadoVaca(filtro.estado))
+    if filtro.sexo:
+        criteria.append(Vaca.sexo == SexoVaca(filtro.sexo))
+    if filtro.raza:
+        criteria.append(Vaca.raza == filtro.raza)
+    if filtro.nacimiento_desde:
+        criteria.append(Vaca.fecha_nacimiento >= filtro.nacimiento_desde)
+    if filtro.nacimiento_hasta:
+        criteria.append(Vaca.fecha_nacimiento <= filtro.nacimiento_hasta)
+    return criteria
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a ``fields=a,b`` sparse fieldset; ``id`` is always included.
+
+    Raises :class:`ValueError` naming unknown fields.
+    """
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(FIELD_NAMES))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(["id", *requested]))
+
+
+def sparse_rows(rows: Sequence[Row], names: Sequence[str]) -> List[Dict[str, Any]]:
+    return [{name: row._mapping[name] for name in names} for row in rows]
+
+
+def batch_get(
+    db: Session,
+    id_usuario: uuid.UUID,
+    ids: Optional[Sequence[uuid.UUID]],
+    identificadores: Optional[Sequence[str]],
+    fields: Optional[Sequence[str]] = None,
+    include_archived: bool = False,
+) -> Tuple[List[Row], Dict[str, List[Any]]]:
+    """Fetch animals of *id_usuario* by ids and/or identificadores in one ``IN`` query.
+
+    Only the requested columns are read (plus ``id`` and ``identificador`` to
+    match the keys), from the archive too when *include_archived*; returns the
+    rows and the keys that matched nothing.
+    """
+    names = [name for name in fields or FIELD_NAMES if name != "archivada"]
+    names = list(dict.fromkeys([*names, "id", "identificador"]))
+
+    def criteria(entity) -> List[ColumnElement[bool]]:
+        keys = []
+        if ids:
+            keys.append(entity.id.in_(ids))
+        if identificadores:
+            keys.append(entity.identificador.in_(identificadores))
+        return [entity.id_usuario == id_usuario, or_(*keys)]
+
+    rows = db.execute(cattle_with_archive(criteria, include_archived, names)).all()
+    found_ids = {row.id for row in rows}
+    found_tags = {row.identificador for row in rows}
+    faltantes = {
+        "ids": [cattle_id for cattle_id in ids or () if cattle_id not in found_ids],
+        "identificadores": [tag for tag in identificadores or () if tag not in found_tags],
+    }
+    return rows, faltantes
+
+
+def delete_where(db: Session, criteria: Sequence[ColumnElement[bool]]) -> int:
+    """Delete the animals matching *criteria* in one statement and return how many went."""
+    rows = db.execute(
+        delete(Vaca)
+        .where(*criteria)
+        .returning(*CATTLE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).all()
+    record_events(db, VACA, OperacionOutbox.ELIMINADO, [{"id": row.id} for row in rows])
+    record_changes(db, VACA, OperacionOutbox.ELIMINADO, [row._mapping for row in rows])
+    return len(rows)
+
+
+def delete_cattle(db: Session, selection: CattleSelection, id_usuario: uuid.UUID) -> int:
+    """Delete the selected animals of *id_usuario* in one statement and return how many went."""
+    return delete_where(db, selection_criteria(selection, id_usuario))
+
+
+def update_cattle(
+    db: Session,
+    criteria: Sequence[ColumnElement[bool]],
+    cambios: Dict[str, Any],
+    version: Optional[int] = None,
+) -> List[Row]:
+    """Apply *cambios* to the matching animals with ``UPDATE ... RETURNING``.
+
+    A change of ``estado`` is validated set-wise: only rows whose current state
+    may move to the target are matched, so invalid transitions are skipped by
+    the same statement instead of being checked one animal at a time. Sales
+    additionally skip animals with a meat withdrawal in force.
+
+    Every matched row gets ``version = version + 1``, as the ORM does for
+    ``version_id_col``; with *version* only rows still at that version match,
+    which makes the update a compare-and-set that needs no row lock up front.
+
+    The statement joins ``vacas`` to itself to return each row's previous
+    values for the audit trail as ``anterior_<campo>`` columns.
+    """
+    values = dict(cambios, version=Vaca.version + 1)
+    where = list(criteria)
+    if version is not None:
+        where.append(Vaca.version == version)
+    if values.get("estado") is not None:
+        destino = EstadoVaca(values["estado"])
+        values["estado"] = destino
+        where.append(Vaca.estado.in_(EstadoVaca.origenes_para(destino)))
+        if destino is EstadoVaca.VENDIDA:
+            where.append(~under_withdrawal())
+    if values.get("peso_actual") is not None:
+        values.setdefault("fecha_peso_actual", date.today())
+    campos = sorted(values)
+    anterior = Vaca.__table__.alias("anterior")
+    stmt = (
+        update(Vaca)
+        .where(Vaca.id == anterior.c.id, *where)
+        .values(**values)
+        .returning(*CATTLE_COLUMNS, *previous_values(anterior, campos))
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(stmt).all()
+    record_events(
+        db,
+        VACA,
+        OperacionOutbox.ACTUALIZADO,
+        [{**_cattle_fields(row), "campos": campos} for row in rows],
+    )
+    record_changes(db, VACA, OperacionOutbox.ACTUALIZADO, [row._mapping for row in rows], campos)
+    return rows
+
+
+def explain_rejections(
+    db: Session,
+    id_usuario: uuid.UUID,
+    requested: Sequence[Any],
+    updated: Sequence[Row],
+    destino: Optional[str] = None,
+    version: Optional[int] = None,
+) -> List[Tuple[Any, str]]:
+    """Explain why *requested* ids were not updated.
+
+    Tells apart missing animals (including those of other owners), stale
+    versions, invalid transitions and withdrawals. Only runs a query when
+    something was rejected.
+    """
+    done = {row.id for row in updated}
+    missing = [uuid.UUID(str(cattle_id)) for cattle_id in requested]
+    missing = [cattle_id for cattle_id in missing if cattle_id not in done]
+    if not missing:
+        return []
+    venta = destino is not None and EstadoVaca(destino) is EstadoVaca.VENDIDA
+    en_retiro = under_withdrawal() if venta else literal(False)
+    existing = {
+        row.id: row
+        for row in db.execute(
+            select(Vaca.id, Vaca.estado, Vaca.version, en_retiro.label("en_retiro")).where(
+                Vaca.id_usuario == id_usuario, Vaca.id.in_(missing)
+            )
+        )
+    }
+
+    def motivo(cattle_id: uuid.UUID) -> str:
+        row = existing.get(cattle_id)
+        if row is None:
+            return NOT_FOUND
+        if version is not None and row.version != version:
+            return VERSION_MISMATCH
+        if row.en_retiro and row.estado.puede_cambiar_a(EstadoVaca.VENDIDA):
+            return UNDER_WITHDRAWAL
+        return INVALID_TRANSITION
+
+    return [(cattle_id, motivo(cattle_id)) for cattle_id in missing]
+
+
+__all__ = [
+    "CATTLE_COLUMNS",
+    "CREATED",
+    "DUPLICATE",
+    "FIELD_NAMES",
+    "INVALID_TRANSITION",
+    "NOT_FOUND",
+    "batch_get",
+    "UNDER_WITHDRAWAL",
+    "VERSION_MISMATCH",
+    "create_cattle",
+    "create_cattle_batch",
+    "delete_cattle",
+    "delete_where",
+    "explain_rejections",
+    "parse_fields",
+    "selection_criteria",
+    "sparse_rows",
+    "update_cattle",
+]
@@ -0,0 +1,141 @@
+"""Animal detail card in a single statement.
+
+The card combines the animal, its last *n* weights and health events, its age
+and its average daily gain. Each history is read through a ``LATERAL`` subquery
+with ``ORDER BY fecha DESC LIMIT n`` over the ``(id_vaca, fecha)`` index and
+folded with ``json_agg``, so the cost depends on *n*, not on history length.
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Float, Select, cast, func, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.models.registro_peso import MetodoPesaje, RegistroPeso
+from app.models.registro_salud import RegistroSalud, TipoSalud
+from app.models.vaca import Vaca
+
+DEFAULT_HISTORY = 5
+MAX_HISTORY = 50
+
+
+def _recent(stmt: Select, name: str, *fields: str):
+    """Aggregate the rows of correlated *stmt* into a JSON array column ``lista``."""
+    rows = stmt.lateral(f"{name}_filas")
+    pairs = [part for field in fields for part in (field, rows.c[field])]
+    order = (rows.c.fecha.desc(), rows.c.timestamp.desc())
+    lista = func.json_agg(aggregate_order_by(func.json_build_object(*pairs), *order))
+    return select(lista.label("lista")).select_from(rows).lateral(name)
+
+
+def _weight_at(newest: bool):
+    order = (RegistroPeso.fecha, RegistroPeso.timestamp)
+    if newest:
+        order = tuple(column.desc() for column in order)
+    return (
+        select(RegistroPeso.fecha, RegistroPeso.peso_kg.label("peso_kg"))
+        .where(RegistroPeso.id_vaca == Vaca.id)
+        .correlate(Vaca)
+        .order_by(*order)
+        .limit(1)
+        .lateral("ultimo_peso" if newest else "primer_peso")
+    )
+
+
+def card_statement(
+    id_usuario: uuid.UUID, cattle_id: uuid.UUID, n: int = DEFAULT_HISTORY
+) -> Select:
+    pesos = _recent(
+        select(
+            RegistroPeso.fecha,
+            RegistroPeso.peso_kg.label("peso_kg"),
+            RegistroPeso.metodo,
+            RegistroPeso.timestamp,
+        )
+        .where(RegistroPeso.id_vaca == Vaca.id)
+        .correlate(Vaca)
+        .order_by(RegistroPeso.fecha.desc(), RegistroPeso.timestamp.desc())
+        .limit(n),
+        "pesos",
+        "fecha",
+        "peso_kg",
+        "metodo",
+    )
+    eventos = _recent(
+        select(
+            RegistroSalud.fecha,
+            RegistroSalud.tipo,
+            RegistroSalud.descripcion,
+            RegistroSalud.medicamento,
+            RegistroSalud.fecha_fin_retiro,
+            RegistroSalud.timestamp,
+        )
+        .where(RegistroSalud.id_vaca == Vaca.id)
+        .correlate(Vaca)
+        .order_by(RegistroSalud.fecha.desc(), RegistroSalud.timestamp.desc())
+        .limit(n),
+        "eventos",
+        "fecha",
+        "tipo",
+        "descripcion",
+        "medicamento",
+        "fecha_fin_retiro",
+    )
+    primero, ultimo = _weight_at(newest=False), _weight_at(newest=True)
+    ganancia = cast(ultimo.c.peso_kg - primero.c.peso_kg, Float) / func.nullif(
+        ultimo.c.fecha - primero.c.fecha, 0
+    )
+    return (
+        select(
+            Vaca.id,
+            Vaca.identificador,
+            Vaca.nombre,
+            Vaca.raza,
+            Vaca.sexo,
+            Vaca.estado,
+            Vaca.fecha_nacimiento,
+            (func.current_date() - Vaca.fecha_nacimiento).label("edad_en_dias"),
+            Vaca.peso_actual,
+            Vaca.fecha_peso_actual,
+            Vaca.version,
+            ganancia.label("ganancia_media_diaria"),
+            pesos.c.lista.label("ultimos_pesos"),
+            eventos.c.lista.label("ultimos_eventos"),
+        )
+        .select_from(Vaca)
+        .outerjoin(pesos, true())
+        .outerjoin(eventos, true())
+        .outerjoin(primero, true())
+        .outerjoin(ultimo, true())
+        .where(Vaca.id == cattle_id, Vaca.id_usuario == id_usuario)
+    )
+
+
+def _enum_values(
+    items: Optional[List[Dict[str, Any]]], key: str, enum_class
+) -> List[Dict[str, Any]]:
+    # Enum columns are stored by member name; expose their values as elsewhere
+    for item in items or ():
+        if item.get(key) is not None:
+            item[key] = enum_class[item[key]].value
+    return items or []
+
+
+def cattle_card(
+    db: Session, id_usuario: uuid.UUID, cattle_id: uuid.UUID, n: int = DEFAULT_HISTORY
+) -> Optional[Dict[str, Any]]:
+    """Return the card of *cattle_id*, or ``None`` when *id_usuario* has no such animal."""
+    row = db.execute(card_statement(id_usuario, cattle_id, n)).first()
+    if row is None:
+        return None
+    card = row._asdict()
+    card["ultimos_pesos"] = _enum_values(card["ultimos_pesos"], "metodo", MetodoPesaje)
+    card["ultimos_eventos"] = _enum_values(card["ultimos_eventos"], "tipo", TipoSalud)
+    return card
+
+
+__all__ = ["DEFAULT_HISTORY", "MAX_HISTORY", "card_statement", "cattle_card"]
@@ -0,0 +1,222 @@
+"""Columnar (Arrow IPC / Parquet) writers for herd and history tables.
+
+Rows are read through a server-side cursor and converted into Arrow record
+batches one partition at a time, so memory stays bounded by the batch size
+regardless of the table size. Enum columns are dictionary-encoded against the
+full set of enum values, which keeps every batch on the same dictionary.
+
+``pyarrow`` is an optional dependency (``pip install cattle-backend[export]``);
+:func:`require_pyarrow` raises :class:`ColumnarUnavailable` when it is missing.
+"""
+
+from __future__ import annotations
+
+import enum
+import json
+import uuid
+from typing import Any, Callable, Iterator, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Enum as SAEnum, Integer, JSON, Numeric, Table, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.models.reporte import FormatoReporte
+
+try:  # pragma: no cover - exercised only when the extra is installed
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+DEFAULT_BATCH_SIZE = 50_000
+
+
+class ColumnarUnavailable(RuntimeError):
+    """Raised when a columnar format is requested without ``pyarrow``."""
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ColumnarUnavailable("Columnar export requires the optional 'pyarrow' dependency")
+
+
+def _enum_values(column_type: SAEnum) -> List[str]:
+    return [member.value for member in column_type.enum_class]
+
+
+def _arrow_field(column) -> "pa.Field":
+    column_type = column.type
+    if isinstance(column_type, SAEnum) and column_type.enum_class is not None:
+        arrow_type = pa.dictionary(pa.int8(), pa.string())
+    elif isinstance(column_type, DateTime):
+        arrow_type = pa.timestamp("us", tz="UTC")
+    elif isinstance(column_type, Date):
+        arrow_type = pa.date32()
+    elif isinstance(column_type, Numeric):
+        arrow_type = pa.float64()
+    elif isinstance(column_type, Boolean):
+        arrow_type = pa.bool_()
+    elif isinstance(column_type, Integer):
+        arrow_type = pa.int64()
+    else:
+        arrow_type = pa.string()
+    return pa.field(column.name, arrow_type, nullable=column.nullable)
+
+
+def _converter(column) -> Callable[[List[Any]], "pa.Array"]:
+    column_type = column.type
+    if isinstance(column_type, SAEnum) and column_type.enum_class is not None:
+        values = _enum_values(column_type)
+        dictionary = pa.array(values, type=pa.string())
+        positions = {value: index for index, value in enumerate(values)}
+
+        def encode_enum(items: List[Any]) -> "pa.Array":
+            indices = pa.array(
+                [None if item is None else positions[getattr(item, "value", item)] for item in items],
+                type=pa.int8(),
+            )
+            return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+        return encode_enum
+
+    field = _arrow_field(column)
+    if isinstance(column_type, Numeric):
+        return lambda items: pa.array([None if v is None else float(v) for v in items], type=field.type)
+    if isinstance(column_type, JSON):
+        return lambda items: pa.array(
+            [None if v is None else json.dumps(v, default=str) for v in items], type=field.type
+        )
+    if pa.types.is_string(field.type):
+        return lambda items: pa.array(
+            [None if v is None else _as_text(v) for v in items], type=field.type
+        )
+    return lambda items: pa.array(items, type=field.type)
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, (uuid.UUID, enum.Enum)):
+        return str(getattr(value, "value", value))
+    return value if isinstance(value, str) else str(value)
+
+
+def arrow_schema(table: Table) -> "pa.Schema":
+    """Build the Arrow schema mirroring the columns of *table*."""
+    require_pyarrow()
+    return pa.schema([_arrow_field(column) for column in table.columns])
+
+
+def iter_record_batches(
+    db: Session,
+    table: Table,
+    stmt: Optional[Select] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator["pa.RecordBatch"]:
+    """Stream *stmt* (all of *table* by default) as Arrow record batches."""
+    require_pyarrow()
+    schema = arrow_schema(table)
+    converters = [_converter(column) for column in table.columns]
+    stmt = stmt if stmt is not None else select(*table.columns)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        columns = list(zip(*partition))
+        arrays = [convert(list(values)) for convert, values in zip(converters, columns)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written so far."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ColumnarWriter:
+    """Write record batches as Parquet (one row group per batch) or Arrow IPC."""
+
+    def __init__(self, sink: Any, schema: "pa.Schema", formato: FormatoReporte) -> None:
+        require_pyarrow()
+        if formato is FormatoReporte.PARQUET:
+            self._writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        elif formato is FormatoReporte.ARROW:
+            self._writer = pa.ipc.new_stream(sink, schema)
+        else:
+            raise ValueError(f"'{formato.value}' is not a columnar format")
+        self.formato = formato
+        self.rows = 0
+
+    def write(self, batch: "pa.RecordBatch") -> None:
+        if self.formato is FormatoReporte.PARQUET:
+            self._writer.write_batch(batch, row_group_size=max(batch.num_rows, 1))
+        else:
+            self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def stream_columnar(
+    session_factory: Callable[[], Session],
+    table: Table,
+    formato: FormatoReporte,
+    stmt: Optional[Select] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """Yield the encoded file chunk by chunk as each batch is written.
+
+    The generator opens its own session because it keeps running after the
+    request-scoped session has been closed.
+    """
+    require_pyarrow()
+    schema = arrow_schema(table)
+    sink = _ChunkSink()
+    with session_factory() as db:
+        with ColumnarWriter(sink, schema, formato) as writer:
+            for batch in iter_record_batches(db, table, stmt, batch_size):
+                writer.write(batch)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+__all__ = [
+    "ColumnarUnavailable",
+    "ColumnarWriter",
+    "DEFAULT_BATCH_SIZE",
+    "arrow_schema",
+    "iter_record_batches",
+    "require_pyarrow",
+    "stream_columnar",
+]
@@ -0,0 +1,134 @@
+"""Follow-up schedule for health events.
+
+Each :class:`RegistroSalud` whose type needs a follow-up stores its due date in
+``fecha_seguimiento``. Only the latest pending event per animal keeps a due
+date, so the partial ``(id_usuario, fecha_seguimiento)`` index holds each
+owner's live schedule and the due list is answered from the index without
+touching the rest of the history.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.outbox import OperacionOutbox
+from app.models.registro_salud import RegistroSalud
+from app.models.vaca import Vaca
+from app.services.audit import previous_values, record_changes
+from app.services.outbox import REGISTRO_SALUD, record_events
+
+DEFAULT_WINDOW_DAYS = 7
+_CAMPOS = ("fecha_seguimiento",)
+_registros = RegistroSalud.__table__
+
+
+def _record_fields(row: Row) -> Dict[str, Any]:
+    return {column.name: row._mapping[column.name] for column in _registros.columns}
+
+
+def schedule_follow_up(db: Session, registro: RegistroSalud) -> Optional[date]:
+    """Set the due date of *registro* and retire the schedule it supersedes.
+
+    A new treatment or revision closes every earlier pending follow-up of the
+    same animal, while a back-dated one never reopens a newer schedule. Must run
+    inside the transaction that writes *registro*; the retired schedules are
+    recorded in the outbox and the audit trail like any other update.
+    """
+    due = registro.calcular_fecha_seguimiento()
+    if due is not None:
+        newer = db.scalar(
+            select(RegistroSalud.id)
+            .where(
+                RegistroSalud.id_vaca == registro.id_vaca,
+                RegistroSalud.fecha_seguimiento.is_not(None),
+                RegistroSalud.fecha > registro.fecha,
+            )
+            .limit(1)
+        )
+        if newer is not None:
+            due = None
+    registro.fecha_seguimiento = due
+    if due is not None:
+        anterior = _registros.alias("anterior")
+        stmt = (
+            update(RegistroSalud)
+            .where(
+                RegistroSalud.id == anterior.c.id,
+                RegistroSalud.id_vaca == registro.id_vaca,
+                RegistroSalud.fecha_seguimiento.is_not(None),
+                RegistroSalud.fecha <= registro.fecha,
+            )
+            .values(fecha_seguimiento=None)
+            .returning(*_registros.columns, *previous_values(anterior, _CAMPOS))
+            .execution_options(synchronize_session=False)
+        )
+        if registro.id is not None:
+            stmt = stmt.where(RegistroSalud.id != registro.id)
+        rows = db.execute(stmt).all()
+        record_events(
+            db,
+            REGISTRO_SALUD,
+            OperacionOutbox.ACTUALIZADO,
+            [{**_record_fields(row), "campos": list(_CAMPOS)} for row in rows],
+        )
+        record_changes(
+            db, REGISTRO_SALUD, OperacionOutbox.ACTUALIZADO, [row._mapping for row in rows], _CAMPOS
+        )
+    return due
+
+
+def due_window(desde: Optional[date], hasta: Optional[date]) -> Tuple[date, date]:
+    """Normalize the requested range, defaulting to the coming week."""
+    start = desde or date.today()
+    end = hasta or start + timedelta(days=DEFAULT_WINDOW_DAYS)
+    if end < start:
+        raise ValueError("'hasta' must not be earlier than 'desde'")
+    return start, end
+
+
+def list_due(
+    db: Session,
+    id_usuario: uuid.UUID,
+    desde: date,
+    hasta: date,
+    *,
+    include_overdue: bool = False,
+    limit: int = 500,
+) -> List[Row]:
+    """Return pending follow-ups of *id_usuario* due in ``[desde, hasta]`` by due date.
+
+    Only scalar columns are selected so the animals' histories are never loaded.
+    """
+    due_filter = RegistroSalud.fecha_seguimiento <= hasta
+    if not include_overdue:
+        due_filter = due_filter & (RegistroSalud.fecha_seguimiento >= desde)
+    stmt = (
+        select(
+            RegistroSalud.id,
+            RegistroSalud.id_vaca,
+            Vaca.identificador,
+            Vaca.nombre,
+            RegistroSalud.tipo,
+            RegistroSalud.fecha,
+            RegistroSalud.fecha_seguimiento,
+            RegistroSalud.medicamento,
+        )
+        .join(Vaca, Vaca.id == RegistroSalud.id_vaca)
+        .where(
+            RegistroSalud.id_usuario == id_usuario,
+            RegistroSalud.fecha_seguimiento.is_not(None),
+            due_filter,
+        )
+        .order_by(RegistroSalud.fecha_seguimiento, RegistroSalud.id_vaca)
+        .limit(limit)
+    )
+    return list(db.execute(stmt))
+
+
+__all__ = ["DEFAULT_WINDOW_DAYS", "due_window", "list_due", "schedule_follow_up"]
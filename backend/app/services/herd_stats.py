@@ -0,0 +1,120 @@
+"""Herd composition aggregates for dashboards.
+
+Counts by estado, sexo, raza and age band of one owner's herd are produced
+by a single ``GROUP BY GROUPING SETS`` query and kept in a
+:class:`SingleFlightCache` keyed by owner.
+The cache is invalidated when a transaction that wrote ``Vaca`` rows commits,
+either through the unit of work or through bulk ORM statements.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.cache import SingleFlightCache
+from app.core.config import settings
+from app.models.vaca import Vaca
+
+UNKNOWN = "desconocida"
+
+# (label, upper bound in days, exclusive)
+AGE_BANDS: Tuple[Tuple[str, int], ...] = (
+    ("0-6m", 183),
+    ("6-12m", 365),
+    ("1-2a", 730),
+    ("2-5a", 1826),
+)
+OLDEST_BAND = "5a+"
+
+_VACA_WRITES_KEY = "herd_stats.vaca_writes"
+
+stats_cache = SingleFlightCache(ttl_seconds=settings.cache.stats_ttl_seconds)
+
+
+def _age_band_expression():
+    age_days = func.current_date() - Vaca.fecha_nacimiento
+    whens = [(age_days < upper, label) for label, upper in AGE_BANDS]
+    return case((Vaca.fecha_nacimiento.is_(None), None), *whens, else_=OLDEST_BAND)
+
+
+def compute_herd_stats(db: Session, id_usuario: uuid.UUID) -> Dict[str, Any]:
+    """Run the aggregation query and shape it into per-dimension counters."""
+    base = (
+        select(
+            Vaca.estado,
+            Vaca.sexo,
+            Vaca.raza,
+            _age_band_expression().label("banda"),
+        )
+        .where(Vaca.id_usuario == id_usuario)
+        .subquery()
+    )
+    dimensions = (base.c.estado, base.c.sexo, base.c.raza, base.c.banda)
+    stmt = select(
+        *dimensions,
+        *(func.grouping(column) for column in dimensions),
+        func.count(),
+    ).group_by(func.grouping_sets(*dimensions))
+
+    result: Dict[str, Any] = {
+        "total": 0,
+        "por_estado": {},
+        "por_sexo": {},
+        "por_raza": {},
+        "por_edad": {},
+    }
+    buckets = ("por_estado", "por_sexo", "por_raza", "por_edad")
+    for row in db.execute(stmt):
+        values, grouped, count = row[:4], row[4:8], row[8]
+        # GROUPING() is 0 for the column that defines the current set.
+        position = grouped.index(0)
+        value = values[position]
+        label = getattr(value, "value", value) or UNKNOWN
+        # NULL and '' raza are separate groups sharing the UNKNOWN label
+        bucket = result[buckets[position]]
+        bucket[label] = bucket.get(label, 0) + count
+        if position == 0:
+            result["total"] += count
+    result["generado"] = datetime.now(timezone.utc)
+    return result
+
+
+def get_herd_stats(db: Session, id_usuario: uuid.UUID) -> Dict[str, Any]:
+    """Return cached herd stats of *id_usuario*, coalescing concurrent recomputations."""
+    return stats_cache.get_or_compute(
+        ("herd", id_usuario), lambda: compute_herd_stats(db, id_usuario)
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_unit_of_work(session: Session, flush_context: Any) -> None:
+    touched = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, Vaca) for obj in touched):
+        session.info[_VACA_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(state: ORMExecuteState) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    if state.bind_mapper is not None and state.bind_mapper.class_ is Vaca:
+        state.session.info[_VACA_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_VACA_WRITES_KEY, False):
+        stats_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_VACA_WRITES_KEY, None)
+
+
+__all__ = ["AGE_BANDS", "compute_herd_stats", "get_herd_stats", "stats_cache"]
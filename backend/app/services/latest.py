@@ -0,0 +1,121 @@
+"""Denormalized "latest" fields on :class:`Vaca`.
+
+``peso_actual``/``fecha_peso_actual`` and ``ultimo_evento_salud``/
+``fecha_ultimo_evento_salud`` are advanced in the same transaction as every
+history insert, so listings show the current status without reading the
+history tables. The guarded UPDATE only moves the fields forward in time, which
+keeps them correct under concurrent and out-of-order inserts.
+:func:`repair_latest` recomputes everything set-wise from the history.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.registro_peso import RegistroPeso
+from app.models.registro_salud import RegistroSalud, TipoSalud
+from app.models.vaca import Vaca
+
+_vacas = Vaca.__table__
+
+_ADVANCE_WEIGHT = (
+    update(_vacas)
+    .where(
+        _vacas.c.id == bindparam("b_id"),
+        or_(_vacas.c.fecha_peso_actual.is_(None), _vacas.c.fecha_peso_actual <= bindparam("b_fecha")),
+    )
+    .values(peso_actual=bindparam("b_valor"), fecha_peso_actual=bindparam("b_fecha"))
+)
+
+_ADVANCE_HEALTH = (
+    update(_vacas)
+    .where(
+        _vacas.c.id == bindparam("b_id"),
+        or_(
+            _vacas.c.fecha_ultimo_evento_salud.is_(None),
+            _vacas.c.fecha_ultimo_evento_salud <= bindparam("b_fecha"),
+        ),
+    )
+    .values(ultimo_evento_salud=bindparam("b_valor"), fecha_ultimo_evento_salud=bindparam("b_fecha"))
+)
+
+
+def _newest_per_animal(entries: Iterable[Tuple[uuid.UUID, date, object]]) -> list:
+    newest: Dict[uuid.UUID, Tuple[date, object]] = {}
+    for id_vaca, fecha, valor in entries:
+        current = newest.get(id_vaca)
+        if current is None or fecha >= current[0]:
+            newest[id_vaca] = (fecha, valor)
+    return [
+        {"b_id": id_vaca, "b_fecha": fecha, "b_valor": valor}
+        for id_vaca, (fecha, valor) in newest.items()
+    ]
+
+
+def advance_latest_weights(db: Session, entries: Iterable[Tuple[uuid.UUID, date, float]]) -> None:
+    """Advance ``peso_actual`` with ``(id_vaca, fecha, kilos)`` entries."""
+    params = _newest_per_animal(
+        (id_vaca, fecha, round(float(kilos), 2)) for id_vaca, fecha, kilos in entries
+    )
+    if params:
+        db.execute(_ADVANCE_WEIGHT, params)
+
+
+def advance_latest_health(db: Session, entries: Iterable[Tuple[uuid.UUID, date, TipoSalud]]) -> None:
+    """Advance ``ultimo_evento_salud`` with ``(id_vaca, fecha, tipo)`` entries."""
+    params = _newest_per_animal(
+        (id_vaca, fecha, TipoSalud(tipo)) for id_vaca, fecha, tipo in entries
+    )
+    if params:
+        db.execute(_ADVANCE_HEALTH, params)
+
+
+def repair_latest(db: Session) -> Dict[str, int]:
+    """Recompute the latest fields from the history; return rows changed."""
+    weights = (
+        select(
+            RegistroPeso.id_vaca,
+            RegistroPeso.fecha,
+            RegistroPeso.peso_kg.label("kilos"),
+        )
+        .distinct(RegistroPeso.id_vaca)
+        .order_by(RegistroPeso.id_vaca, RegistroPeso.fecha.desc(), RegistroPeso.timestamp.desc())
+        .subquery()
+    )
+    events = (
+        select(RegistroSalud.id_vaca, RegistroSalud.fecha, RegistroSalud.tipo)
+        .distinct(RegistroSalud.id_vaca)
+        .order_by(RegistroSalud.id_vaca, RegistroSalud.fecha.desc(), RegistroSalud.timestamp.desc())
+        .subquery()
+    )
+    pesos = db.execute(
+        update(_vacas)
+        .where(
+            _vacas.c.id == weights.c.id_vaca,
+            or_(
+                _vacas.c.peso_actual.is_distinct_from(weights.c.kilos),
+                _vacas.c.fecha_peso_actual.is_distinct_from(weights.c.fecha),
+            ),
+        )
+        .values(peso_actual=weights.c.kilos, fecha_peso_actual=weights.c.fecha)
+    ).rowcount
+    salud = db.execute(
+        update(_vacas)
+        .where(
+            _vacas.c.id == events.c.id_vaca,
+            or_(
+                _vacas.c.ultimo_evento_salud.is_distinct_from(events.c.tipo),
+                _vacas.c.fecha_ultimo_evento_salud.is_distinct_from(events.c.fecha),
+            ),
+        )
+        .values(ultimo_evento_salud=events.c.tipo, fecha_ultimo_evento_salud=events.c.fecha)
+    ).rowcount
+    return {"pesos": pesos, "salud": salud}
+
+
+__all__ = ["advance_latest_health", "advance_latest_weights", "repair_latest"]
@@ -0,0 +1,411 @@
+"""Transactional outbox of cattle change events.
+
+Changes to animals, weight readings and health records append an
+:class:`EventoOutbox` row in the same transaction, so an event exists exactly
+when its change committed. ORM flushes are captured by a session listener;
+set-based paths (``INSERT/UPDATE/DELETE ... RETURNING``, write-behind
+ingestion, archival) call :func:`record_events` with the rows they touched.
+
+:class:`OutboxDispatcher` drains pending events in ``id`` order, one batch per
+transaction, into every configured sink. A transaction-scoped advisory lock
+lets a single dispatcher drain at a time across processes, and a batch is
+only marked dispatched once every sink accepted it: delivery is at-least-once
+and consumers deduplicate by event ``id``.
+"""
+
+from __future__ import annotations
+
+import enum
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+)
+
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import History
+
+from app.core.config import OutboxConfig, settings
+from app.core.database import SessionLocal
+from app.models.outbox import EventoOutbox, OperacionOutbox
+from app.models.registro_peso import RegistroPeso
+from app.models.registro_salud import RegistroSalud
+from app.models.vaca import Vaca
+
+logger = logging.getLogger(__name__)
+
+VACA = "vaca"
+REGISTRO_PESO = "registro_peso"
+REGISTRO_SALUD = "registro_salud"
+AGREGADOS: Dict[type, str] = {
+    Vaca: VACA,
+    RegistroPeso: REGISTRO_PESO,
+    RegistroSalud: REGISTRO_SALUD,
+}
+
+# pg_advisory lock key serializing dispatchers ("outbox" in ASCII)
+_LOCK_KEY = 0x6F7574626F78
+_outbox = EventoOutbox.__table__
+_pending = (_outbox.c.despachado.is_(None), _outbox.c.abandonado.is_(None))
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def event_row(
+    agregado: str, operacion: OperacionOutbox, datos: Mapping[str, Any]
+) -> Dict[str, Any]:
+    """Outbox row for a change of the *agregado* whose columns are *datos*."""
+    plain = {key: _plain(value) for key, value in datos.items()}
+    return {
+        "agregado": agregado,
+        "id_agregado": uuid.UUID(str(plain["id"])),
+        "operacion": operacion.value,
+        "datos": plain,
+    }
+
+
+def record_events(
+    db: Session, agregado: str, operacion: OperacionOutbox, rows: Iterable[Mapping[str, Any]]
+) -> int:
+    """Append one event per row (each carrying at least ``id``) in the current transaction."""
+    events = [event_row(agregado, operacion, row) for row in rows]
+    if events:
+        db.execute(insert(_outbox), events)
+    return len(events)
+
+
+@dataclass(frozen=True)
+class FlushedChange:
+    """A tracked object written by a flush, with its loaded columns."""
+
+    agregado: str
+    operacion: OperacionOutbox
+    datos: Dict[str, Any]
+    # Changed columns and their history; empty unless ``operacion`` is ACTUALIZADO
+    historial: Dict[str, History]
+
+
+def flushed_changes(session: Session) -> Iterator[FlushedChange]:
+    """Tracked objects inserted, updated or deleted by the flush just done.
+
+    Only attributes already loaded are read, so no query runs mid-flush;
+    server-side defaults therefore do not appear in ``datos``. Updates that
+    changed no column are skipped.
+    """
+    for operacion, objects in (
+        (OperacionOutbox.CREADO, session.new),
+        (OperacionOutbox.ACTUALIZADO, session.dirty),
+        (OperacionOutbox.ELIMINADO, session.deleted),
+    ):
+        for obj in objects:
+            agregado = AGREGADOS.get(type(obj))
+            if agregado is None:
+                continue
+            state = inspect(obj)
+            columns = state.mapper.column_attrs.keys()
+            datos = {key: state.dict[key] for key in columns if key in state.dict}
+            historial: Dict[str, History] = {}
+            if operacion is OperacionOutbox.ACTUALIZADO:
+                for key in columns:
+                    history = state.attrs[key].history
+                    if history.has_changes():
+                        historial[key] = history
+                if not historial:
+                    continue
+            yield FlushedChange(agregado, operacion, datos, historial)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _capture_flush(session: Session, flush_context) -> None:
+    """Record the ORM changes of tracked models flushed in this transaction."""
+    events = []
+    for change in flushed_changes(session):
+        datos = change.datos
+        if change.operacion is OperacionOutbox.ACTUALIZADO:
+            datos = {**datos, "campos": list(change.historial)}
+        events.append(event_row(change.agregado, change.operacion, datos))
+    if events:
+        session.connection().execute(insert(_outbox), events)
+
+
+class Sink(Protocol):
+    name: str
+
+    def send(self, events: Sequence[Dict[str, Any]]) -> None:
+        """Deliver *events* or raise; partial deliveries are retried whole."""
+
+
+class NdjsonFileSink:
+    """Appends one JSON object per event to a file, fsynced per batch."""
+
+    name = "file"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def send(self, events: Sequence[Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            for item in events:
+                handle.write(json.dumps(item, ensure_ascii=False) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+class WebhookSink:
+    """POSTs each batch as ``{"eventos": [...]}``; any non-2xx answer is a failure."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout_s: float) -> None:
+        self.url = url
+        self.timeout_s = timeout_s
+
+    def send(self, events: Sequence[Dict[str, Any]]) -> None:
+        body = json.dumps({"eventos": list(events)}, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+            if not 200 <= response.status < 300:
+                raise RuntimeError(f"Webhook answered {response.status}")
+
+
+def configured_sinks(config: OutboxConfig) -> List[Sink]:
+    sinks: List[Sink] = []
+    if config.file_path is not None:
+        sinks.append(NdjsonFileSink(config.file_path))
+    if config.webhook_url:
+        sinks.append(WebhookSink(config.webhook_url, config.webhook_timeout_s))
+    return sinks
+
+
+def claim_batch(db: Session, batch_size: int) -> Optional[List[Row]]:
+    """Oldest pending events, or ``None`` when another dispatcher is draining.
+
+    The advisory lock is held until the caller's transaction ends.
+    """
+    if not db.scalar(select(func.pg_try_advisory_xact_lock(_LOCK_KEY))):
+        return None
+    stmt = (
+        select(
+            _outbox.c.id,
+            _outbox.c.agregado,
+            _outbox.c.id_agregado,
+            _outbox.c.operacion,
+            _outbox.c.datos,
+            _outbox.c.creado,
+        )
+        .where(*_pending)
+        .order_by(_outbox.c.id)
+        .limit(batch_size)
+    )
+    return db.execute(stmt).all()
+
+
+def _as_event(row: Row) -> Dict[str, Any]:
+    return {key: _plain(value) for key, value in row._mapping.items()}
+
+
+def mark_dispatched(db: Session, ids: Sequence[int]) -> None:
+    db.execute(update(_outbox).where(_outbox.c.id.in_(ids)).values(despachado=func.now()))
+
+
+def record_failure(db: Session, ids: Sequence[int], error: str, max_attempts: int = 0) -> None:
+    """Count a failed attempt; with *max_attempts* > 0, set aside events that reached it."""
+    values: Dict[str, Any] = {"intentos": _outbox.c.intentos + 1, "ultimo_error": error[:2000]}
+    if max_attempts > 0:
+        values["abandonado"] = case((_outbox.c.intentos + 1 >= max_attempts, func.now()))
+    db.execute(update(_outbox).where(_outbox.c.id.in_(ids)).values(**values))
+
+
+def prune_dispatched(db: Session, retention_s: int, batch_size: int = 10_000) -> int:
+    """Delete up to *batch_size* events dispatched more than *retention_s* ago."""
+    expired = (
+        select(_outbox.c.id)
+        .where(_outbox.c.despachado < func.now() - timedelta(seconds=retention_s))
+        .limit(batch_size)
+    )
+    return db.execute(delete(_outbox).where(_outbox.c.id.in_(expired))).rowcount
+
+
+def outbox_status(db: Session) -> Dict[str, Any]:
+    """Backlog size and age, set-aside events and the last dispatch time."""
+    pendientes, mas_antiguo = db.execute(
+        select(func.count(), func.min(_outbox.c.creado)).where(*_pending)
+    ).one()
+    abandonados = db.scalar(select(func.count()).where(_outbox.c.abandonado.is_not(None)))
+    ultimo = db.scalar(select(func.max(_outbox.c.despachado)))
+    ahora = db.scalar(select(func.now()))
+    return {
+        "pendientes": pendientes,
+        "mas_antiguo": mas_antiguo,
+        "retraso_s": (ahora - mas_antiguo).total_seconds() if mas_antiguo else 0.0,
+        "abandonados": abandonados,
+        "ultimo_despacho": ultimo,
+    }
+
+
+@dataclass
+class DispatchStats:
+    batches: int = 0
+    delivered: int = 0
+    failures: int = 0
+    pruned: int = 0
+    last_error: Optional[str] = None
+    last_dispatch_at: Optional[datetime] = None
+
+
+class OutboxDispatcher:
+    """Background thread delivering outbox batches to the configured sinks."""
+
+    PRUNE_EVERY_S = 60.0
+
+    def __init__(
+        self,
+        config: OutboxConfig,
+        session_factory: Callable[[], Session] = SessionLocal,
+        sinks: Optional[List[Sink]] = None,
+    ) -> None:
+        self.config = config
+        self.session_factory = session_factory
+        self.sinks = configured_sinks(config) if sinks is None else sinks
+        self.stats = DispatchStats()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "sinks": [sink.name for sink in self.sinks],
+            **self.stats.__dict__,
+        }
+
+    def run_once(self) -> int:
+        """Deliver one batch and return its size; raises when a sink failed."""
+        with self.session_factory() as db:
+            rows = claim_batch(db, self.config.batch_size)
+            if not rows:
+                db.rollback()
+                return 0
+            ids = [row.id for row in rows]
+            events = [_as_event(row) for row in rows]
+            try:
+                for sink in self.sinks:
+                    sink.send(events)
+            except Exception as exc:
+                self.stats.failures += 1
+                self.stats.last_error = f"{type(exc).__name__}: {exc}"
+                record_failure(db, ids, self.stats.last_error, self.config.max_attempts)
+                db.commit()
+                raise
+            mark_dispatched(db, ids)
+            db.commit()
+        self.stats.batches += 1
+        self.stats.delivered += len(ids)
+        self.stats.last_dispatch_at = datetime.now(timezone.utc)
+        return len(ids)
+
+    def _prune(self) -> None:
+        with self.session_factory() as db:
+            self.stats.pruned += prune_dispatched(db, self.config.retention_s)
+            db.commit()
+
+    def _run(self) -> None:
+        interval = self.config.dispatch_interval_ms / 1000
+        failures = 0
+        last_prune = float("-inf")
+        while not self._stop.is_set():
+            delay = interval
+            try:
+                delivered = self.run_once()
+                failures = 0
+                if delivered >= self.config.batch_size:
+                    delay = 0
+                elif delivered == 0 and time.monotonic() - last_prune >= self.PRUNE_EVERY_S:
+                    last_prune = time.monotonic()
+                    self._prune()
+            except Exception:
+                failures += 1
+                delay = min(self.config.max_backoff_s, interval * 2 ** failures)
+                logger.exception("Outbox dispatch failed (attempt %s)", failures)
+            self._stop.wait(delay)
+
+
+outbox_dispatcher = OutboxDispatcher(settings.outbox)
+
+
+__all__ = [
+    "AGREGADOS",
+    "DispatchStats",
+    "FlushedChange",
+    "NdjsonFileSink",
+    "OutboxDispatcher",
+    "REGISTRO_PESO",
+    "REGISTRO_SALUD",
+    "VACA",
+    "WebhookSink",
+    "claim_batch",
+    "configured_sinks",
+    "event_row",
+    "flushed_changes",
+    "mark_dispatched",
+    "outbox_dispatcher",
+    "outbox_status",
+    "prune_dispatched",
+    "record_events",
+    "record_failure",
+]
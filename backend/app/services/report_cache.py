@@ -0,0 +1,116 @@
+"""Content-addressed keys for report results.
+
+A report is identified by its owner, type, format, canonical parameters and
+a version of the data it reads: a cheap fingerprint (latest change timestamp,
+row count and similar aggregates) of the owner's rows in the backing table.
+Requests with the same key can share one artifact; keys never match across
+owners, and one owner's writes do not expire another owner's artifacts. The
+fingerprint can miss an update made by a transaction that commits long after
+it started, so hits are additionally bounded by ``ReportConfig.cache_max_age_s``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.registro_salud import RegistroSalud
+from app.models.reporte import EstadoReporte, FormatoReporte, Reporte, TipoReporte
+from app.models.resumen_peso import MarcaAgregacion, ResumenPesoVacaDiario
+from app.models.vaca import Vaca
+from app.services.weight_rollup import ROLLUP
+
+
+def canonical_parameters(parametros: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty values and normalize the rest so equal filters compare equal."""
+    canonical: Dict[str, Any] = {}
+    for key, value in parametros.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ""):
+            continue
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        elif key.startswith("id_"):
+            try:
+                value = str(uuid.UUID(str(value)))
+            except ValueError:
+                pass
+        canonical[key] = value
+    return canonical
+
+
+def data_version(db: Session, tipo: TipoReporte, id_usuario: Optional[uuid.UUID]) -> List[Any]:
+    """Fingerprint of the rows of *id_usuario* a report of *tipo* reads."""
+    if tipo is TipoReporte.INVENTARIO:
+        stmt = select(
+            func.max(Vaca.fecha_actualizacion), func.count(), func.sum(Vaca.version)
+        ).where(Vaca.id_usuario == id_usuario)
+    elif tipo is TipoReporte.PESOS:
+        table = ResumenPesoVacaDiario.__table__
+        marca = select(MarcaAgregacion.hasta).where(MarcaAgregacion.nombre == ROLLUP)
+        owned = select(Vaca.id).where(Vaca.id_usuario == id_usuario)
+        stmt = select(marca.scalar_subquery(), func.count(), func.sum(table.c.lecturas))
+        stmt = stmt.select_from(table).where(table.c.id_vaca.in_(owned))
+    else:
+        stmt = select(func.max(RegistroSalud.fecha_actualizacion), func.count()).where(
+            RegistroSalud.id_usuario == id_usuario
+        )
+    return list(db.execute(stmt).one())
+
+
+def cache_key(
+    id_usuario: Optional[uuid.UUID],
+    tipo: TipoReporte,
+    formato: FormatoReporte,
+    parametros: Dict[str, Any],
+    version: List[Any],
+) -> str:
+    """SHA-256 over the canonical JSON of the owner, report definition and data version."""
+    payload = {
+        "usuario": str(id_usuario) if id_usuario else None,
+        "tipo": tipo.value,
+        "formato": formato.value,
+        "parametros": canonical_parameters(parametros),
+        "version": version,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def cached_artifacts(
+    db: Session, clave: str, max_age_s: int, limit: int = 5
+) -> List[Tuple[str, datetime]]:
+    """``(url_s3, fecha_generacion)`` of completed reports with key *clave*.
+
+    Only artifacts generated within *max_age_s* are returned, newest first.
+    """
+    stmt = (
+        select(Reporte.url_s3, Reporte.fecha_generacion)
+        .where(
+            Reporte.clave_cache == clave,
+            Reporte.estado == EstadoReporte.COMPLETADO,
+            Reporte.url_s3.is_not(None),
+            Reporte.fecha_generacion >= func.now() - timedelta(seconds=max_age_s),
+        )
+        .order_by(Reporte.fecha_generacion.desc())
+        .limit(limit)
+    )
+    return [tuple(row) for row in db.execute(stmt)]
+
+
+def report_key(db: Session, reporte: Reporte) -> str:
+    """Key of *reporte* against the current data."""
+    version = data_version(db, reporte.tipo, reporte.id_usuario)
+    return cache_key(
+        reporte.id_usuario, reporte.tipo, reporte.formato, reporte.parametros or {}, version
+    )
+
+
+__all__ = ["cache_key", "cached_artifacts", "canonical_parameters", "data_version", "report_key"]
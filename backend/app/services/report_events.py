@@ -0,0 +1,146 @@
+"""In-process publish/subscribe of report progress.
+
+Report workers run in threads; :meth:`ReportEventBroker.publish` hands each
+event to the event loop with ``call_soon_threadsafe`` and the loop fans it out
+to the ``asyncio.Queue`` of every subscriber of that report. The last event
+of recent reports is kept so a late subscriber starts from the current state.
+Subscribers only see reports generated by this process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, TypeVar
+
+from app.models.reporte import EstadoReporte
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ReportEvent:
+    """Progress of one report; ``total`` is ``None`` until it is known."""
+
+    estado: EstadoReporte
+    filas: int = 0
+    total: Optional[int] = None
+
+    @property
+    def final(self) -> bool:
+        return self.estado in (EstadoReporte.COMPLETADO, EstadoReporte.FALLIDO)
+
+    @property
+    def porcentaje(self) -> Optional[float]:
+        if self.estado is EstadoReporte.COMPLETADO:
+            return 100.0
+        if not self.total:
+            return None
+        return round(min(self.filas / self.total, 1.0) * 100, 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["estado"] = self.estado.value
+        data["porcentaje"] = self.porcentaje
+        return data
+
+
+class ReportEventBroker:
+    """Fan report events out to the subscribers waiting on the event loop."""
+
+    def __init__(self, max_reports: int = 1024, queue_size: int = 16) -> None:
+        self.max_reports = max_reports
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._last: "OrderedDict[uuid.UUID, ReportEvent]" = OrderedDict()
+        self._subscribers: Dict[uuid.UUID, Set[asyncio.Queue]] = {}
+
+    def bind(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Deliver events on *loop* (``None`` stops delivery)."""
+        self._loop = loop
+
+    def publish(self, report_id: uuid.UUID, event: ReportEvent) -> None:
+        """Record *event* and deliver it to subscribers; safe from any thread."""
+        with self._lock:
+            self._last[report_id] = event
+            self._last.move_to_end(report_id)
+            while len(self._last) > self.max_reports:
+                self._last.popitem(last=False)
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, report_id, event)
+
+    def last(self, report_id: uuid.UUID) -> Optional[ReportEvent]:
+        with self._lock:
+            return self._last.get(report_id)
+
+    def subscribe(self, report_id: uuid.UUID) -> "asyncio.Queue[ReportEvent]":
+        """Register a queue for *report_id*, primed with its last event. Loop thread only."""
+        queue: "asyncio.Queue[ReportEvent]" = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(report_id, set()).add(queue)
+        last = self.last(report_id)
+        if last is not None:
+            queue.put_nowait(last)
+        return queue
+
+    def unsubscribe(self, report_id: uuid.UUID, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(report_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[report_id]
+
+    def _deliver(self, report_id: uuid.UUID, event: ReportEvent) -> None:
+        for queue in self._subscribers.get(report_id, ()):
+            if queue.full():
+                # A slow subscriber only needs the newest progress
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+class ProgressReporter:
+    """Publishes the rows written by one report at most every ``interval_s``."""
+
+    def __init__(
+        self, broker: ReportEventBroker, report_id: uuid.UUID, interval_s: float = 0.5
+    ) -> None:
+        self.broker = broker
+        self.report_id = report_id
+        self.interval_s = interval_s
+        self.filas = 0
+        self.total: Optional[int] = None
+        self._published = 0.0
+
+    def start(self, total: Optional[int] = None) -> None:
+        self.filas, self.total = 0, total
+        self._publish(EstadoReporte.PROCESANDO)
+
+    def advance(self, rows: int = 1) -> None:
+        self.filas += rows
+        if time.monotonic() - self._published >= self.interval_s:
+            self._publish(EstadoReporte.PROCESANDO)
+
+    def track(self, rows: Iterable[T]) -> Iterator[T]:
+        """Yield *rows*, counting each one."""
+        for row in rows:
+            yield row
+            self.advance()
+
+    def finish(self, estado: EstadoReporte) -> None:
+        self._publish(estado)
+
+    def _publish(self, estado: EstadoReporte) -> None:
+        self._published = time.monotonic()
+        self.broker.publish(self.report_id, ReportEvent(estado, self.filas, self.total))
+
+
+report_events = ReportEventBroker()
+
+
+__all__ = ["ProgressReporter", "ReportEvent", "ReportEventBroker", "report_events"]
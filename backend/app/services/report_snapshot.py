@@ -0,0 +1,70 @@
+"""Row snapshots kept next to report artifacts for incremental builds.
+
+A snapshot is an NDJSON file: a header object naming the columns, then one
+JSON array of plain values per row, in report order. The next build of the
+same report streams it back, drops the rows that changed or disappeared and
+merges the changed rows in by the same sort key, so only the changes are read
+from the database.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+from pathlib import Path
+from typing import Any, Callable, Collection, Iterable, Iterator, List, Sequence, TextIO, Tuple
+
+SUFFIX = ".ndjson"
+
+Row = List[Any]
+
+
+def tee_rows(rows: Iterable[Row], columns: Sequence[str], handle: TextIO) -> Iterator[Row]:
+    """Yield *rows* unchanged while writing them as a snapshot into *handle*."""
+    handle.write(json.dumps({"columnas": list(columns)}) + "\n")
+    for row in rows:
+        handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+        yield row
+
+
+def snapshot_columns(path: Path) -> List[str]:
+    """Columns recorded in the header of the snapshot at *path*."""
+    with open(path, encoding="utf-8") as handle:
+        return json.loads(handle.readline())["columnas"]
+
+
+def read_snapshot(path: Path) -> Iterator[Row]:
+    """Stream the rows of the snapshot at *path*."""
+    with open(path, encoding="utf-8") as handle:
+        handle.readline()
+        for line in handle:
+            yield json.loads(line)
+
+
+def sort_key(columns: Sequence[str], order: Sequence[str]) -> Callable[[Row], Tuple]:
+    """Key ordering rows like ``ORDER BY order`` (ascending, ``NULL`` last, byte-wise)."""
+    positions = [columns.index(name) for name in order]
+
+    def key(row: Row) -> Tuple:
+        return tuple((row[i] is None, "" if row[i] is None else row[i]) for i in positions)
+
+    return key
+
+
+def merge(
+    previous: Iterable[Row],
+    changed: Iterable[Row],
+    drop: Collection[Any],
+    id_position: int,
+    key: Callable[[Row], Tuple],
+) -> Iterator[Row]:
+    """Merge sorted *changed* rows into sorted *previous* ones.
+
+    Previous rows whose id is in *drop* (every changed id, matching the report
+    filters or not) are skipped; the changed rows take their place.
+    """
+    kept = (row for row in previous if row[id_position] not in drop)
+    return heapq.merge(kept, sorted(changed, key=key), key=key)
+
+
+__all__ = ["SUFFIX", "merge", "read_snapshot", "snapshot_columns", "sort_key", "tee_rows"]
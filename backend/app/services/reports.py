@@ -0,0 +1,481 @@
+"""Report generation pipeline and local artifact storage.
+
+A :class:`Reporte` describes what to export (``tipo`` plus ``parametros``) and
+how (``formato``). :func:`generate_report` resolves the rows, writes the
+artifact to :class:`LocalReportStorage` and records its URI in ``url_s3``.
+
+Artifacts are named after the report's content key (see
+:mod:`app.services.report_cache`), so a request matching a fresh artifact is
+completed with it instead of being generated again.
+
+Text reports over tables in :data:`INCREMENTAL` also leave a row snapshot
+next to the artifact (see :mod:`app.services.report_snapshot`). The next
+report with the same parameters starts from the newest snapshot and reads
+only the rows changed since its ``fecha_generacion``; deletions are found by
+comparing row counts and, when they differ, the set of live ids.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.registro_peso import RegistroPeso
+from app.models.registro_salud import RegistroSalud, TipoSalud
+from app.models.reporte import EstadoReporte, FormatoReporte, Reporte, TipoReporte
+from app.models.resumen_peso import ResumenPesoVacaDiario
+from app.models.vaca import EstadoVaca, SexoVaca, Vaca
+from app.services.columnar import ColumnarWriter, arrow_schema, iter_record_batches
+from app.services.report_cache import cached_artifacts, canonical_parameters, report_key
+from app.services.report_events import ProgressReporter, report_events
+from app.services.report_snapshot import (
+    SUFFIX,
+    merge,
+    read_snapshot,
+    snapshot_columns,
+    sort_key,
+    tee_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TABLES: Dict[str, Table] = {
+    "vacas": Vaca.__table__,
+    "registros_peso": RegistroPeso.__table__,
+    "registros_salud": RegistroSalud.__table__,
+}
+
+# Reports buildable from a previous snapshot: change-tracking column and the
+# sort columns of their ORDER BY (compared byte-wise, hence COLLATE "C").
+INCREMENTAL: Dict[TipoReporte, Tuple[str, Tuple[str, ...]]] = {
+    TipoReporte.INVENTARIO: ("fecha_actualizacion", ("identificador",)),
+    TipoReporte.SALUD: ("fecha_actualizacion", ("fecha", "id")),
+}
+
+
+class LocalReportStorage:
+    """Stores report artifacts as files under a single directory.
+
+    With ``max_bytes`` set, publishing trims the directory back under that
+    size by deleting the artifacts whose modification time, refreshed on every
+    reuse and download, is oldest.
+    """
+
+    scheme = "local://"
+
+    def __init__(self, root: Path, max_bytes: int = 0) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, name: str) -> Path:
+        return self.root / name
+
+    def uri_for(self, name: str) -> str:
+        return f"{self.scheme}{name}"
+
+    def resolve(self, uri: Optional[str]) -> Optional[Path]:
+        """Return the local path of *uri* when it exists in this storage."""
+        if not uri or not uri.startswith(self.scheme):
+            return None
+        path = self.path_for(uri[len(self.scheme):])
+        return path if path.is_file() else None
+
+    def temp_path_for(self, name: str) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.path_for(f".{name}.{uuid.uuid4().hex}.tmp")
+
+    def publish(self, temp_path: Path, name: str) -> str:
+        """Atomically move a finished temp file into place and return its URI."""
+        os.replace(temp_path, self.path_for(name))
+        self.evict(keep=name)
+        return self.uri_for(name)
+
+    def touch(self, path: Path) -> None:
+        """Mark *path* as recently used."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used artifacts until the total fits ``max_bytes``."""
+        if self.max_bytes <= 0 or not self.root.is_dir():
+            return 0
+        removed = 0
+        with self._lock:
+            files: List[Tuple[float, int, Path]] = []
+            for path in self.root.iterdir():
+                if path.name.startswith(".") or path.name == keep:
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            kept = self.path_for(keep) if keep else None
+            if kept is not None and kept.is_file():
+                total += kept.stat().st_size
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        if removed:
+            logger.info("Evicted %s report artifacts", removed)
+        return removed
+
+
+storage = LocalReportStorage(settings.reports.storage_dir, settings.reports.cache_max_bytes)
+
+
+def _parse_date(parametros: Dict[str, Any], key: str) -> Optional[date]:
+    value = parametros.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return value if isinstance(value, date) else date.fromisoformat(str(value))
+    except ValueError as exc:
+        raise ValueError(f"Parámetro '{key}' debe ser una fecha ISO") from exc
+
+
+def report_source(
+    tipo: TipoReporte, parametros: Dict[str, Any], id_usuario: Optional[uuid.UUID]
+) -> Tuple[Table, Select]:
+    """Return the table and SELECT, filtered to the rows of *id_usuario*, backing a report.
+
+    Raises :class:`ValueError` for malformed parameters so requests can be
+    rejected before a job is queued.
+    """
+    if tipo is TipoReporte.INVENTARIO:
+        table = Vaca.__table__
+        stmt = select(*table.columns).where(Vaca.id_usuario == id_usuario)
+        stmt = stmt.order_by(Vaca.identificador.collate("C"))
+        if parametros.get("estado"):
+            stmt = stmt.where(Vaca.estado == EstadoVaca(parametros["estado"]))
+        if parametros.get("sexo"):
+            stmt = stmt.where(Vaca.sexo == SexoVaca(parametros["sexo"]))
+        if parametros.get("raza"):
+            stmt = stmt.where(Vaca.raza == parametros["raza"])
+        return table, stmt
+
+    if tipo is TipoReporte.PESOS:
+        # Daily rollup rows as of the last refresh, not the raw readings
+        table = ResumenPesoVacaDiario.__table__
+        owned = select(Vaca.id).where(Vaca.id_usuario == id_usuario)
+        stmt = select(*table.columns).where(table.c.id_vaca.in_(owned))
+        stmt = stmt.order_by(table.c.fecha, table.c.id_vaca)
+        desde = _parse_date(parametros, "desde")
+        hasta = _parse_date(parametros, "hasta")
+        if desde:
+            stmt = stmt.where(table.c.fecha >= desde)
+        if hasta:
+            stmt = stmt.where(table.c.fecha <= hasta)
+        if parametros.get("id_vaca"):
+            stmt = stmt.where(table.c.id_vaca == uuid.UUID(str(parametros["id_vaca"])))
+        return table, stmt
+
+    table = RegistroSalud.__table__
+    stmt = select(*table.columns).where(RegistroSalud.id_usuario == id_usuario)
+    stmt = stmt.order_by(RegistroSalud.fecha, RegistroSalud.id)
+    desde = _parse_date(parametros, "desde")
+    hasta = _parse_date(parametros, "hasta")
+    if desde:
+        stmt = stmt.where(RegistroSalud.fecha >= desde)
+    if hasta:
+        stmt = stmt.where(RegistroSalud.fecha <= hasta)
+    if parametros.get("tipo"):
+        stmt = stmt.where(RegistroSalud.tipo == TipoSalud(parametros["tipo"]))
+    if parametros.get("id_vaca"):
+        stmt = stmt.where(RegistroSalud.id_vaca == uuid.UUID(str(parametros["id_vaca"])))
+    return table, stmt
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    if value is not None and not isinstance(value, (int, float, str, bool, dict, list)):
+        return float(value)
+    return value
+
+
+def _write_text(
+    rows: Iterable[Any], columns: Tuple[str, ...], handle: TextIO, formato: FormatoReporte
+) -> int:
+    count = 0
+    if formato is FormatoReporte.CSV:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(["" if value is None else _plain(value) for value in row])
+            count += 1
+        return count
+
+    handle.write("[")
+    for row in rows:
+        handle.write(",\n" if count else "\n")
+        handle.write(json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False))
+        count += 1
+    handle.write("\n]\n")
+    return count
+
+
+def _plain_row(row: Iterable[Any]) -> List[Any]:
+    return [_plain(value) for value in row]
+
+
+def _count(db: Session, stmt: Select) -> int:
+    return db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+
+def write_artifact(
+    db: Session,
+    reporte: Reporte,
+    path: Path,
+    snapshot_path: Optional[Path] = None,
+    progress: Optional[ProgressReporter] = None,
+) -> int:
+    """Write the rows of *reporte* into *path* and return how many were written.
+
+    Text formats also write a row snapshot into *snapshot_path* when given;
+    *progress* is told the row total up front and each row written.
+    """
+    table, stmt = report_source(reporte.tipo, reporte.parametros or {}, reporte.id_usuario)
+    batch_size = settings.reports.batch_size
+    if progress is not None:
+        progress.start(_count(db, stmt))
+    if reporte.formato.es_columnar():
+        with open(path, "wb") as handle:
+            with ColumnarWriter(handle, arrow_schema(table), reporte.formato) as writer:
+                for batch in iter_record_batches(db, table, stmt, batch_size):
+                    writer.write(batch)
+                    if progress is not None:
+                        progress.advance(batch.num_rows)
+            return writer.rows
+
+    columns = tuple(column.name for column in table.columns)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    if progress is not None:
+        result = progress.track(result)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        if snapshot_path is None:
+            return _write_text(result, columns, handle, reporte.formato)
+        with open(snapshot_path, "w", encoding="utf-8") as snapshot:
+            rows = tee_rows(map(_plain_row, result), columns, snapshot)
+            return _write_text(rows, columns, handle, reporte.formato)
+
+
+def _snapshot_base(db: Session, reporte: Reporte) -> Optional[Tuple[Path, datetime]]:
+    """Newest stored snapshot of a completed report with the same owner, type and parameters."""
+    wanted = canonical_parameters(reporte.parametros or {})
+    stmt = (
+        select(Reporte.url_s3, Reporte.parametros, Reporte.fecha_generacion)
+        .where(
+            Reporte.id_usuario == reporte.id_usuario,
+            Reporte.tipo == reporte.tipo,
+            Reporte.estado == EstadoReporte.COMPLETADO,
+            Reporte.url_s3.is_not(None),
+            Reporte.fecha_generacion.is_not(None),
+            Reporte.id != reporte.id,
+        )
+        .order_by(Reporte.fecha_generacion.desc())
+        .limit(20)
+    )
+    for uri, parametros, generado in db.execute(stmt):
+        if canonical_parameters(parametros or {}) != wanted:
+            continue
+        path = storage.resolve(uri + SUFFIX)
+        if path is not None:
+            return path, generado
+    return None
+
+
+def write_incremental(
+    db: Session,
+    reporte: Reporte,
+    base: Path,
+    desde: datetime,
+    path: Path,
+    snapshot_path: Path,
+    progress: Optional[ProgressReporter] = None,
+) -> Optional[int]:
+    """Write *reporte* by merging the rows changed since *desde* into snapshot *base*.
+
+    Returns ``None`` when the snapshot's columns no longer match the table.
+    """
+    table, stmt = report_source(reporte.tipo, reporte.parametros or {}, reporte.id_usuario)
+    changed_column, order = INCREMENTAL[reporte.tipo]
+    columns = tuple(column.name for column in table.columns)
+    if tuple(snapshot_columns(base)) != columns:
+        return None
+
+    overlap = timedelta(seconds=settings.reports.incremental_overlap_s)
+    since = (
+        table.c.id_usuario == reporte.id_usuario,
+        table.c[changed_column] > desde - overlap,
+    )
+    # Every changed id leaves the snapshot, including rows that stopped matching
+    drop = {str(value) for value in db.scalars(select(table.c.id).where(*since))}
+    changed = [_plain_row(row) for row in db.execute(stmt.where(*since))]
+    expected = _count(db, stmt)
+    id_position = columns.index("id")
+    key = sort_key(columns, order)
+
+    def emit(live: Optional[set]) -> int:
+        kept: Iterator[List[Any]] = read_snapshot(base)
+        if live is not None:
+            kept = (row for row in kept if row[id_position] in live)
+        merged = merge(kept, changed, drop, id_position, key)
+        if progress is not None:
+            progress.start(expected)
+            merged = progress.track(merged)
+        with open(path, "w", encoding="utf-8", newline="") as handle, open(
+            snapshot_path, "w", encoding="utf-8"
+        ) as snapshot:
+            rows = tee_rows(merged, columns, snapshot)
+            return _write_text(rows, columns, handle, reporte.formato)
+
+    count = emit(None)
+    if count != expected:
+        live_ids = stmt.with_only_columns(table.c.id).order_by(None)
+        count = emit({str(value) for value in db.scalars(live_ids)})
+    logger.info(
+        "Report %s merged %s changed rows into %s (%s rows)",
+        reporte.id,
+        len(drop),
+        base.name,
+        count,
+    )
+    return count
+
+
+def build_artifact(
+    db: Session,
+    reporte: Reporte,
+    path: Path,
+    snapshot_path: Optional[Path] = None,
+    progress: Optional[ProgressReporter] = None,
+) -> int:
+    """Write *reporte* incrementally when a usable snapshot exists, fully otherwise."""
+    if snapshot_path is not None and settings.reports.incremental:
+        base = _snapshot_base(db, reporte)
+        if base is not None:
+            rows = write_incremental(db, reporte, *base, path, snapshot_path, progress)
+            if rows is not None:
+                return rows
+    return write_artifact(db, reporte, path, snapshot_path, progress)
+
+
+def reuse_artifact(db: Session, reporte: Reporte) -> bool:
+    """Key *reporte* and complete it with a fresh stored artifact of that key.
+
+    Returns ``False`` when caching is disabled or no reusable artifact exists.
+    A reused report keeps the original ``fecha_generacion``, so reuse does not
+    extend how long an artifact counts as fresh.
+    """
+    max_age_s = settings.reports.cache_max_age_s
+    if max_age_s <= 0:
+        return False
+    reporte.clave_cache = report_key(db, reporte)
+    for uri, generado in cached_artifacts(db, reporte.clave_cache, max_age_s):
+        path = storage.resolve(uri)
+        if path is not None:
+            storage.touch(path)
+            reporte.marcar_completado(uri, generado)
+            return True
+    return False
+
+
+def generate_report(db: Session, reporte: Reporte) -> None:
+    """Produce the artifact of *reporte*, recording success or failure on it.
+
+    Progress and the outcome are published to :data:`report_events`.
+    """
+    progress = ProgressReporter(report_events, reporte.id)
+    reporte.marcar_en_proceso()
+    db.commit()
+    progress.start()
+    try:
+        reused = reuse_artifact(db, reporte)
+    except Exception:
+        logger.exception("Report %s cache lookup failed", reporte.id)
+        reused = False
+    if reused:
+        db.commit()
+        progress.finish(EstadoReporte.COMPLETADO)
+        logger.info("Report %s served from cached artifact %s", reporte.id, reporte.url_s3)
+        return
+    db.rollback()
+
+    # One snapshot for the data version, the change window and every read, so
+    # the key and the generation time describe exactly the rows written.
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    generado = db.scalar(select(func.now()))
+    clave = report_key(db, reporte) if settings.reports.cache_max_age_s > 0 else None
+    name = f"{clave or reporte.id}.{reporte.formato.extension}"
+    temp_path = storage.temp_path_for(name)
+    snapshot_path = None
+    if reporte.tipo in INCREMENTAL and not reporte.formato.es_columnar():
+        snapshot_path = storage.temp_path_for(name + SUFFIX)
+    try:
+        rows = build_artifact(db, reporte, temp_path, snapshot_path, progress)
+        if snapshot_path is not None:
+            storage.publish(snapshot_path, name + SUFFIX)
+        uri = storage.publish(temp_path, name)
+    except Exception:
+        logger.exception("Report %s failed", reporte.id)
+        db.rollback()
+        temp_path.unlink(missing_ok=True)
+        if snapshot_path is not None:
+            snapshot_path.unlink(missing_ok=True)
+        reporte.marcar_fallido()
+        db.commit()
+        progress.finish(EstadoReporte.FALLIDO)
+        return
+    reporte.clave_cache = clave
+    reporte.marcar_completado(uri, generado)
+    db.commit()
+    progress.finish(EstadoReporte.COMPLETADO)
+    logger.info("Report %s completed with %s rows", reporte.id, rows)
+
+
+def run_report(reporte_id: uuid.UUID) -> None:
+    """Background-task entry point generating a report in its own session."""
+    with SessionLocal() as db:
+        reporte = db.get(Reporte, reporte_id)
+        if reporte is not None:
+            generate_report(db, reporte)
+
+
+__all__ = [
+    "EXPORT_TABLES",
+    "INCREMENTAL",
+    "LocalReportStorage",
+    "build_artifact",
+    "generate_report",
+    "report_source",
+    "reuse_artifact",
+    "run_report",
+    "storage",
+    "write_artifact",
+    "write_incremental",
+]
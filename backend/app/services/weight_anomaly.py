@@ -0,0 +1,183 @@
+"""Online detection of sudden weight loss.
+
+Each animal keeps a tiny state row (:class:`EstadoPesoVaca`): its last weight
+and an exponentially weighted mean and variance of its daily gain. A new
+reading updates that state in O(1) and raises an :class:`AlertaPeso` when the
+observed gain falls ``z_threshold`` standard deviations below the expected one.
+:func:`replay` rebuilds states and alerts by streaming the whole history.
+"""
+
+from __future__ import annotations
+
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import AnomalyConfig, settings
+from app.models.alerta_peso import AlertaPeso, EstadoPesoVaca
+from app.models.registro_peso import RegistroPeso
+
+Reading = Tuple[uuid.UUID, date, float]
+
+
+@dataclass
+class DetectorState:
+    fecha: date
+    peso_kg: float
+    ganancia_media: float = 0.0
+    ganancia_varianza: float = 0.0
+    muestras: int = 0
+
+    def as_row(self, id_vaca: uuid.UUID) -> Dict[str, object]:
+        return {"id_vaca": id_vaca, **self.__dict__}
+
+
+@dataclass(frozen=True)
+class Anomaly:
+    fecha: date
+    peso_kg: float
+    ganancia_diaria: float
+    ganancia_esperada: float
+    puntaje_z: float
+
+
+def observe(
+    state: Optional[DetectorState],
+    fecha: date,
+    peso_kg: float,
+    config: AnomalyConfig = settings.anomaly,
+) -> Tuple[Optional[DetectorState], Optional[Anomaly]]:
+    """Fold one reading into *state*, returning the new state and any anomaly.
+
+    Readings on or before the last seen date do not move the state.
+    """
+    if state is None:
+        return DetectorState(fecha=fecha, peso_kg=peso_kg), None
+    days = (fecha - state.fecha).days
+    if days <= 0:
+        return state, None
+
+    gain = (peso_kg - state.peso_kg) / days
+    anomaly = None
+    if state.muestras >= config.min_samples:
+        std = max(math.sqrt(state.ganancia_varianza), config.min_std_kg)
+        z = (gain - state.ganancia_media) / std
+        if z <= -config.z_threshold and gain < 0:
+            anomaly = Anomaly(
+                fecha, round(peso_kg, 2), round(gain, 3), round(state.ganancia_media, 3), round(z, 2)
+            )
+
+    alpha = config.ewma_alpha if state.muestras else 1.0
+    diff = gain - state.ganancia_media
+    increment = alpha * diff
+    state.ganancia_media += increment
+    state.ganancia_varianza = (1 - alpha) * (state.ganancia_varianza + diff * increment)
+    state.fecha = fecha
+    state.peso_kg = peso_kg
+    state.muestras += 1
+    return state, anomaly
+
+
+def _alert_row(id_vaca: uuid.UUID, anomaly: Anomaly) -> Dict[str, object]:
+    return {"id": uuid.uuid4(), "id_vaca": id_vaca, **anomaly.__dict__}
+
+
+def _save(db: Session, states: Dict[uuid.UUID, DetectorState], alerts: List[Dict[str, object]]) -> None:
+    if states:
+        stmt = pg_insert(EstadoPesoVaca)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[EstadoPesoVaca.id_vaca],
+                set_={
+                    name: stmt.excluded[name]
+                    for name in ("fecha", "peso_kg", "ganancia_media", "ganancia_varianza", "muestras")
+                },
+            ),
+            [state.as_row(id_vaca) for id_vaca, state in states.items()],
+        )
+    if alerts:
+        db.execute(pg_insert(AlertaPeso), alerts)
+
+
+def process_readings(db: Session, readings: Iterable[Reading]) -> int:
+    """Update detector state for new ``(id_vaca, fecha, kilos)`` readings.
+
+    Runs in the caller's transaction; the touched state rows are locked so
+    concurrent batches for the same animal are applied one after the other.
+    Returns the number of alerts raised.
+    """
+    ordered = sorted(readings, key=lambda reading: (str(reading[0]), reading[1]))
+    if not ordered:
+        return 0
+    ids = {uuid.UUID(str(id_vaca)) for id_vaca, _, _ in ordered}
+    states: Dict[uuid.UUID, DetectorState] = {
+        row.id_vaca: DetectorState(
+            row.fecha, row.peso_kg, row.ganancia_media, row.ganancia_varianza, row.muestras
+        )
+        for row in db.execute(
+            select(EstadoPesoVaca.__table__).where(EstadoPesoVaca.id_vaca.in_(ids)).with_for_update()
+        )
+    }
+    alerts = []
+    for id_vaca, fecha, kilos in ordered:
+        key = uuid.UUID(str(id_vaca))
+        states[key], anomaly = observe(states.get(key), fecha, float(kilos))
+        if anomaly is not None:
+            alerts.append(_alert_row(key, anomaly))
+    _save(db, states, alerts)
+    return len(alerts)
+
+
+def replay(
+    session_factory: Callable[[], Session],
+    batch_size: int = 10_000,
+    reset_alerts: bool = True,
+) -> Dict[str, int]:
+    """Rebuild detector state (and alerts) from the whole weight history.
+
+    The history is streamed ordered by animal and date through a server-side
+    cursor, so only the state of the animal being replayed is held in memory;
+    finished states and alerts are written every *batch_size* readings.
+    """
+    totals = {"lecturas": 0, "animales": 0, "alertas": 0}
+    with session_factory() as reader, session_factory() as writer:
+        writer.execute(delete(EstadoPesoVaca))
+        if reset_alerts:
+            writer.execute(delete(AlertaPeso))
+        writer.commit()
+
+        stmt = select(RegistroPeso.id_vaca, RegistroPeso.fecha, RegistroPeso.peso_kg).order_by(
+            RegistroPeso.id_vaca, RegistroPeso.fecha, RegistroPeso.timestamp
+        )
+        finished: Dict[uuid.UUID, DetectorState] = {}
+        alerts: List[Dict[str, object]] = []
+        current: Optional[uuid.UUID] = None
+        state: Optional[DetectorState] = None
+        for partition in reader.execute(stmt.execution_options(yield_per=batch_size)).partitions():
+            for id_vaca, fecha, kilos in partition:
+                if id_vaca != current:
+                    if current is not None:
+                        finished[current] = state
+                    current, state = id_vaca, None
+                    totals["animales"] += 1
+                state, anomaly = observe(state, fecha, float(kilos))
+                if anomaly is not None:
+                    alerts.append(_alert_row(id_vaca, anomaly))
+            totals["lecturas"] += len(partition)
+            totals["alertas"] += len(alerts)
+            _save(writer, finished, alerts)
+            writer.commit()
+            finished, alerts = {}, []
+        if current is not None:
+            _save(writer, {current: state}, [])
+            writer.commit()
+    return totals
+
+
+__all__ = ["Anomaly", "DetectorState", "observe", "process_readings", "replay"]
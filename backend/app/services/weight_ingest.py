@@ -0,0 +1,325 @@
+"""Write-behind ingestion of weight readings.
+
+Automatic scales post readings several times per second. In write-behind mode
+a reading is validated, acknowledged and appended to a bounded in-process
+queue; a background thread drains the queue and inserts the readings in
+batches, so one commit covers up to ``batch_size`` readings.
+
+Bursts of ``AUTOMATICO`` readings for the same animal can additionally be
+collapsed by :class:`BurstCompactor` into one row holding a robust estimate
+(median or trimmed mean) and the number of samples behind it. The raw samples
+are optionally kept in the cold ``registros_peso_crudos`` table.
+
+Durability bound: readings acknowledged but not yet flushed live only in
+memory. At most ``max_queue`` readings, received during the last
+``flush_interval_ms`` (plus ``compaction_window_s`` when compaction is on) and
+the time of one flush, can be lost if the process dies;
+:meth:`WeightWriteBehindQueue.stop` flushes everything on clean shutdown.
+A batch that fails on a transient error (connection loss, failover, lock
+timeout) is kept and retried with backoff; the worker takes nothing from the
+queue meanwhile, so once it is full new readings are refused with 503.
+Readings the database rejects (unknown animal, out-of-range value) are
+isolated and dropped one by one.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import statistics
+import uuid
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import IngestConfig, settings
+from app.core.database import SessionLocal
+from app.models.outbox import OperacionOutbox
+from app.models.registro_peso import MetodoPesaje, RegistroPeso, RegistroPesoCrudo, UnidadPeso
+from app.services.audit import record_changes
+from app.services.batching import BatchStats, BatchingWorker
+from app.services.latest import advance_latest_weights
+from app.services.outbox import REGISTRO_PESO, record_events
+from app.services.weight_anomaly import process_readings
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(RuntimeError):
+    """Raised when the buffer stays full for longer than the enqueue timeout."""
+
+
+@dataclass(frozen=True)
+class WeightReading:
+    """A validated reading waiting to be written."""
+
+    id_vaca: uuid.UUID
+    id_usuario: uuid.UUID
+    fecha: date
+    peso: float
+    unidad: UnidadPeso
+    metodo: MetodoPesaje
+    recibido: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    muestras: int = 1
+    crudas: Tuple["WeightReading", ...] = ()
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], id_usuario: uuid.UUID) -> "WeightReading":
+        """Build a reading of an animal of *id_usuario*, raising ``ValueError`` when invalid.
+
+        Ownership is not checked here: a reading for an animal of another owner
+        violates the ``(id_vaca, id_usuario)`` foreign key and is rejected when
+        flushed, like one for an unknown animal.
+        """
+        peso = float(payload["peso"])
+        if peso <= 0:
+            raise ValueError("El peso debe ser positivo")
+        return cls(
+            id_vaca=uuid.UUID(str(payload["id_vaca"])),
+            id_usuario=id_usuario,
+            fecha=payload["fecha"],
+            peso=round(peso, 2),
+            unidad=UnidadPeso(payload.get("unidad") or UnidadPeso.KILOGRAMO),
+            metodo=MetodoPesaje(payload.get("metodo") or MetodoPesaje.MANUAL),
+        )
+
+    def as_row(self) -> Dict[str, Any]:
+        # ``timestamp`` is left to the database's now() at insert, not ``recibido``:
+        # compacted and retried batches are written long after they arrived and
+        # would land behind the rollup watermark. Raw samples keep the arrival time.
+        return {
+            "id": self.id,
+            "id_vaca": self.id_vaca,
+            "id_usuario": self.id_usuario,
+            "fecha": self.fecha,
+            "peso": self.peso,
+            "unidad": self.unidad,
+            "metodo": self.metodo,
+            "muestras": self.muestras,
+        }
+
+
+def trimmed_mean(values: Sequence[float], proportion: float = 0.1) -> float:
+    """Mean of *values* after dropping *proportion* of them at each end."""
+    ordered = sorted(values)
+    cut = int(len(ordered) * proportion)
+    kept = ordered[cut:len(ordered) - cut] or ordered
+    return sum(kept) / len(kept)
+
+
+ESTIMATORS: Dict[str, Callable[[Sequence[float]], float]] = {
+    "median": statistics.median,
+    "trimmed_mean": trimmed_mean,
+}
+
+
+class BurstCompactor:
+    """Collapse bursts of automatic readings per animal into one estimate.
+
+    A burst starts with the first ``AUTOMATICO`` reading of an animal and
+    absorbs the following ones received within ``window_s`` on the same date
+    and unit. Other methods pass through untouched.
+    """
+
+    def __init__(self, window_s: float, estimator: str = "median", keep_raw: bool = False) -> None:
+        if estimator not in ESTIMATORS:
+            raise ValueError(f"Unknown compaction estimator '{estimator}'")
+        self.window_s = window_s
+        self.estimate = ESTIMATORS[estimator]
+        self.keep_raw = keep_raw
+        self._open: Dict[Tuple[uuid.UUID, UnidadPeso], List[WeightReading]] = {}
+
+    @property
+    def pending(self) -> int:
+        return sum(len(burst) for burst in self._open.values())
+
+    def feed(self, readings: Sequence[WeightReading]) -> List[WeightReading]:
+        """Absorb *readings* and return those ready to be written."""
+        ready: List[WeightReading] = []
+        for reading in readings:
+            if reading.metodo is not MetodoPesaje.AUTOMATICO:
+                ready.append(reading)
+                continue
+            key = (reading.id_vaca, reading.unidad)
+            burst = self._open.get(key)
+            if burst and self._fits(burst[0], reading):
+                burst.append(reading)
+                continue
+            if burst:
+                ready.append(self._collapse(burst))
+            self._open[key] = [reading]
+        return ready
+
+    def drain(self, now: Optional[datetime] = None, force: bool = False) -> List[WeightReading]:
+        """Close the bursts whose window has elapsed (all of them with *force*)."""
+        now = now or datetime.now(timezone.utc)
+        closed = [
+            key
+            for key, burst in self._open.items()
+            if force or (now - burst[0].recibido).total_seconds() > self.window_s
+        ]
+        return [self._collapse(self._open.pop(key)) for key in closed]
+
+    def _fits(self, first: WeightReading, reading: WeightReading) -> bool:
+        elapsed = (reading.recibido - first.recibido).total_seconds()
+        return reading.fecha == first.fecha and 0 <= elapsed <= self.window_s
+
+    def _collapse(self, burst: List[WeightReading]) -> WeightReading:
+        if len(burst) == 1:
+            return burst[0]
+        estimate = self.estimate([reading.peso for reading in burst])
+        return replace(
+            burst[-1],
+            id=uuid.uuid4(),
+            peso=round(float(estimate), 2),
+            muestras=sum(reading.muestras for reading in burst),
+            crudas=tuple(burst) if self.keep_raw else (),
+        )
+
+
+@dataclass
+class IngestStats(BatchStats):
+    accepted: int = 0
+    rejected_full: int = 0
+    compacted: int = 0
+
+
+def write_readings(db: Session, readings: List[WeightReading]) -> int:
+    """Insert *readings* (and their raw samples) in the current transaction.
+
+    The animals' ``peso_actual`` and weight-anomaly state are advanced, and
+    the readings recorded in the outbox, in the same transaction; they are
+    audited once it commits.
+    """
+    if not readings:
+        return 0
+    rows = [reading.as_row() for reading in readings]
+    db.execute(insert(RegistroPeso), rows)
+    record_events(db, REGISTRO_PESO, OperacionOutbox.CREADO, rows)
+    record_changes(db, REGISTRO_PESO, OperacionOutbox.CREADO, rows)
+    kilos = [
+        (reading.id_vaca, reading.fecha, reading.unidad.to_kilos(reading.peso)) for reading in readings
+    ]
+    advance_latest_weights(db, kilos)
+    process_readings(db, kilos)
+    raw = [
+        {
+            "id": uuid.uuid4(),
+            "id_registro": reading.id,
+            "id_vaca": reading.id_vaca,
+            "peso": sample.peso,
+            "unidad": sample.unidad,
+            "recibido": sample.recibido,
+        }
+        for reading in readings
+        for sample in reading.crudas
+    ]
+    if raw:
+        db.execute(insert(RegistroPesoCrudo), raw)
+    return len(readings)
+
+
+class WeightWriteBehindQueue(BatchingWorker[WeightReading]):
+    """Bounded buffer flushed to ``registros_peso`` by a background thread."""
+
+    thread_name = "weight-write-behind"
+    item_name = "readings"
+
+    def __init__(
+        self,
+        config: IngestConfig,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        super().__init__(config, IngestStats())
+        self.session_factory = session_factory
+        self.compactor: Optional[BurstCompactor] = None
+        if config.compaction_window_s > 0:
+            self.compactor = BurstCompactor(
+                config.compaction_window_s,
+                estimator=config.compaction_estimator,
+                keep_raw=config.keep_raw_readings,
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.weight_write_behind
+
+    def submit(self, reading: WeightReading) -> None:
+        """Queue *reading*, blocking briefly for room before raising :class:`QueueFull`."""
+        try:
+            self._queue.put(reading, timeout=self.config.enqueue_timeout_ms / 1000)
+        except queue.Full:
+            self.stats.rejected_full += 1
+            raise QueueFull("Weight ingest queue is full") from None
+        self.stats.accepted += 1
+
+    @property
+    def max_flush_delay_ms(self) -> int:
+        return self.config.flush_interval_ms + self.config.compaction_window_s * 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_flush_delay_ms": self.max_flush_delay_ms,
+            "compaction_pending": self.compactor.pending if self.compactor else 0,
+            **super().snapshot(),
+        }
+
+    def _ready(self, batch: List[WeightReading]) -> List[WeightReading]:
+        if self.compactor is None:
+            return batch
+        return self._tally(self.compactor.feed(batch) + self.compactor.drain())
+
+    def _leftover(self) -> List[WeightReading]:
+        if self.compactor is None:
+            return []
+        return self._tally(self.compactor.drain(force=True))
+
+    def _tally(self, ready: List[WeightReading]) -> List[WeightReading]:
+        """Count the readings folded into compacted rows."""
+        self.stats.compacted += sum(reading.muestras - 1 for reading in ready)
+        return ready
+
+    def _write(self, batch: List[WeightReading]) -> int:
+        try:
+            with self.session_factory() as db:
+                written = write_readings(db, batch)
+                db.commit()
+            return written
+        except (IntegrityError, DataError):
+            return self._flush_one_by_one(batch)
+
+    def _flush_one_by_one(self, batch: List[WeightReading]) -> int:
+        """Isolate the readings the database rejects (e.g. unknown animal).
+
+        Nothing is committed until every reading was tried, so a transient
+        error here leaves the whole batch to be retried.
+        """
+        written = 0
+        with self.session_factory() as db:
+            for reading in batch:
+                try:
+                    with db.begin_nested():
+                        written += write_readings(db, [reading])
+                except (IntegrityError, DataError):
+                    logger.warning("Rejected weight reading %s for %s", reading.id, reading.id_vaca)
+            db.commit()
+        return written
+
+
+weight_queue = WeightWriteBehindQueue(settings.ingest)
+
+
+__all__ = [
+    "IngestStats",
+    "QueueFull",
+    "WeightReading",
+    "WeightWriteBehindQueue",
+    "weight_queue",
+    "write_readings",
+]
@@ -0,0 +1,297 @@
+"""Daily weight rollups maintained behind a watermark.
+
+``resumen_peso_vaca_diario`` and ``resumen_peso_usuario_diario`` keep the min,
+max, sum and count of kilos per animal (and per owner) and day.
+:func:`refresh_rollups` folds the readings whose ``timestamp`` lies between the
+stored watermark and ``now() - settle_s`` into them with ``ON CONFLICT``
+upserts, then moves the watermark; its first run only sets the watermark,
+and the history before it is built by :func:`backfill_rollups` (``POST
+/cattle/maintenance/rollups``). :func:`daily_series` reads the rollup and
+adds the readings newer than the watermark on the fly, so answers are current
+while month- and year-long ranges only touch one row per day.
+
+``timestamp`` is the database time of the insert, write-behind included, so a
+reading is only missed by the refresh when its transaction commits more than
+``settle_s`` after it started; :func:`backfill_rollups` recomputes date ranges
+from the live and archived history and repairs it. Hard-deleted animals drop out of the rollups
+on the next backfill of their dates.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Date, DateTime, Table, case, cast, delete, func, literal, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+from app.core.config import RollupConfig, settings
+from app.core.database import SessionLocal
+from app.models.archivo import RegistroPesoArchivado
+from app.models.registro_peso import KILOS_POR_LIBRA, RegistroPeso, UnidadPeso
+from app.models.resumen_peso import MarcaAgregacion, ResumenPesoUsuarioDiario, ResumenPesoVacaDiario
+
+logger = logging.getLogger(__name__)
+
+ROLLUP = "peso_diario"
+PERIODS: Dict[str, str] = {"dia": "day", "semana": "week", "mes": "month", "anio": "year"}
+
+_marca = MarcaAgregacion.__table__
+_TARGETS = (
+    (ResumenPesoVacaDiario.__table__, "id_vaca"),
+    (ResumenPesoUsuarioDiario.__table__, "id_usuario"),
+)
+_MEASURES = ("min_kg", "max_kg", "suma_kg", "lecturas")
+
+
+def _kilos(pesos: Table):
+    return case((pesos.c.unidad == UnidadPeso.LIBRA, pesos.c.peso * KILOS_POR_LIBRA), else_=pesos.c.peso)
+
+
+def _readings(include_archive: bool = False) -> Subquery:
+    """Readings with their owner, optionally including the archived history."""
+    tables = [RegistroPeso.__table__]
+    if include_archive:
+        tables.append(RegistroPesoArchivado.__table__)
+    branches = [
+        select(
+            pesos.c.id_vaca,
+            pesos.c.id_usuario,
+            pesos.c.fecha,
+            _kilos(pesos).label("kilos"),
+            pesos.c.timestamp,
+        )
+        for pesos in tables
+    ]
+    source = union_all(*branches) if len(branches) > 1 else branches[0]
+    return source.subquery("lecturas")
+
+
+def _fold(db: Session, readings: Subquery, *conditions) -> int:
+    """Upsert the aggregates of the matching *readings* into both rollups."""
+    rows = 0
+    for table, key in _TARGETS:
+        group = (readings.c[key], readings.c.fecha)
+        aggregated = (
+            select(
+                *group,
+                func.min(readings.c.kilos),
+                func.max(readings.c.kilos),
+                func.sum(readings.c.kilos),
+                func.count(),
+            )
+            .where(*conditions)
+            .group_by(*group)
+        )
+        stmt = pg_insert(table).from_select([key, "fecha", *_MEASURES], aggregated)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[key], table.c.fecha],
+            set_={
+                "min_kg": func.least(table.c.min_kg, stmt.excluded.min_kg),
+                "max_kg": func.greatest(table.c.max_kg, stmt.excluded.max_kg),
+                "suma_kg": table.c.suma_kg + stmt.excluded.suma_kg,
+                "lecturas": table.c.lecturas + stmt.excluded.lecturas,
+            },
+        )
+        rows += db.execute(stmt).rowcount
+    return rows
+
+
+def _lock_watermark(db: Session) -> Optional[datetime]:
+    """Return the watermark, locking it so refreshes and backfills serialize."""
+    db.execute(pg_insert(_marca).values(nombre=ROLLUP).on_conflict_do_nothing())
+    return db.execute(
+        select(_marca.c.hasta).where(_marca.c.nombre == ROLLUP).with_for_update()
+    ).scalar_one()
+
+
+def _settled(db: Session, settle_s: int) -> datetime:
+    return db.execute(select(func.now() - timedelta(seconds=settle_s))).scalar_one()
+
+
+def _set_watermark(db: Session, hasta: datetime) -> None:
+    db.execute(update(_marca).where(_marca.c.nombre == ROLLUP).values(hasta=hasta))
+
+
+def refresh_rollups(db: Session, settle_s: int = settings.rollup.settle_s) -> Dict[str, Any]:
+    """Fold readings newer than the watermark into the rollups.
+
+    Without a watermark yet, only sets it: the existing history is left to
+    :func:`backfill_rollups`, which rebuilds it in chunks instead of in one
+    transaction holding the watermark lock. Runs in the caller's transaction,
+    which must be committed afterwards.
+    """
+    desde = _lock_watermark(db)
+    hasta = _settled(db, settle_s)
+    if desde is None:
+        _set_watermark(db, hasta)
+        logger.info("Weight rollup watermark set to %s; run the backfill for older readings", hasta)
+        return {"filas": 0, "hasta": hasta}
+    if hasta <= desde:
+        return {"filas": 0, "hasta": desde}
+    readings = _readings()
+    rows = _fold(db, readings, readings.c.timestamp > desde, readings.c.timestamp <= hasta)
+    _set_watermark(db, hasta)
+    return {"filas": rows, "hasta": hasta}
+
+
+def backfill_rollups(
+    session_factory: Callable[[], Session],
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    chunk_days: int = settings.rollup.backfill_days,
+    settle_s: int = settings.rollup.settle_s,
+) -> Dict[str, int]:
+    """Recompute the rollups for ``[desde, hasta]`` (all history by default).
+
+    Each chunk of ``chunk_days`` days is deleted and rebuilt in its own
+    transaction from the readings at or below the current watermark; the first
+    run sets the watermark instead of folding everything in one transaction.
+    """
+    with session_factory() as db:
+        marca = _lock_watermark(db)
+        if marca is None:
+            marca = _settled(db, settle_s)
+            _set_watermark(db, marca)
+        readings = _readings(include_archive=True)
+        first, last = db.execute(
+            select(func.min(readings.c.fecha), func.max(readings.c.fecha)).where(
+                readings.c.timestamp <= marca
+            )
+        ).one()
+        db.commit()
+    start, end = desde or first, hasta or last
+    totals = {"dias": 0, "filas": 0}
+    if start is None or end is None:
+        return totals
+
+    step = timedelta(days=max(chunk_days, 1))
+    while start <= end:
+        stop = min(start + step - timedelta(days=1), end)
+        with session_factory() as db:
+            marca = _lock_watermark(db)
+            for table, _ in _TARGETS:
+                db.execute(delete(table).where(table.c.fecha.between(start, stop)))
+            readings = _readings(include_archive=True)
+            totals["filas"] += _fold(
+                db, readings, readings.c.fecha.between(start, stop), readings.c.timestamp <= marca
+            )
+            db.commit()
+        totals["dias"] += (stop - start).days + 1
+        start = stop + timedelta(days=1)
+    return totals
+
+
+def daily_series(
+    db: Session,
+    *,
+    id_vaca: Optional[uuid.UUID] = None,
+    id_usuario: Optional[uuid.UUID] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    periodo: str = "dia",
+) -> List[Dict[str, Any]]:
+    """Weight min/max/average per *periodo* for one animal or one owner.
+
+    Raises :class:`ValueError` for an unknown period or when neither or both
+    of ``id_vaca`` and ``id_usuario`` are given.
+    """
+    if (id_vaca is None) == (id_usuario is None):
+        raise ValueError("Indique id_vaca o id_usuario")
+    if periodo not in PERIODS:
+        raise ValueError(f"Periodo debe ser uno de: {', '.join(PERIODS)}")
+    if id_vaca is not None:
+        (table, key), value = _TARGETS[0], id_vaca
+    else:
+        (table, key), value = _TARGETS[1], id_usuario
+
+    marca = select(_marca.c.hasta).where(_marca.c.nombre == ROLLUP).scalar_subquery()
+    readings = _readings()
+    stored = select(table.c.fecha, *(table.c[name] for name in _MEASURES)).where(table.c[key] == value)
+    live = select(
+        readings.c.fecha,
+        readings.c.kilos,
+        readings.c.kilos,
+        readings.c.kilos,
+        literal(1),
+    ).where(readings.c[key] == value, or_(marca.is_(None), readings.c.timestamp > marca))
+    if desde:
+        stored = stored.where(table.c.fecha >= desde)
+        live = live.where(readings.c.fecha >= desde)
+    if hasta:
+        stored = stored.where(table.c.fecha <= hasta)
+        live = live.where(readings.c.fecha <= hasta)
+
+    rows = union_all(stored, live).subquery()
+    bucket = cast(func.date_trunc(PERIODS[periodo], cast(rows.c.fecha, DateTime)), Date)
+    stmt = (
+        select(
+            bucket.label("fecha"),
+            func.min(rows.c.min_kg).label("min_kg"),
+            func.max(rows.c.max_kg).label("max_kg"),
+            (func.sum(rows.c.suma_kg) / func.sum(rows.c.lecturas)).label("promedio_kg"),
+            func.sum(rows.c.lecturas).label("lecturas"),
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return [row._asdict() for row in db.execute(stmt)]
+
+
+class RollupRefresher:
+    """Background thread calling :func:`refresh_rollups` every interval."""
+
+    def __init__(
+        self,
+        config: RollupConfig,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.config = config
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.refresh_interval_s > 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="weight-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.config.refresh_interval_s):
+            try:
+                with self.session_factory() as db:
+                    refresh_rollups(db, self.config.settle_s)
+                    db.commit()
+            except Exception:
+                logger.exception("Weight rollup refresh failed")
+
+
+rollup_refresher = RollupRefresher(settings.rollup)
+
+
+__all__ = [
+    "PERIODS",
+    "RollupRefresher",
+    "backfill_rollups",
+    "daily_series",
+    "refresh_rollups",
+    "rollup_refresher",
+]
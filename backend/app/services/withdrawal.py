@@ -0,0 +1,91 @@
+"""Drug withdrawal periods.
+
+Treatments linked to the :class:`Medicamento` catalog store their withdrawal
+end dates when written, so "is this animal under withdrawal" becomes an index
+probe on ``(id_vaca, fecha_fin_retiro)`` instead of a scan of its treatments.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, exists, func, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.medicamento import Medicamento
+from app.models.registro_salud import RegistroSalud
+from app.models.vaca import Vaca
+
+
+def find_medicamento(
+    db: Session, id_medicamento: Optional[uuid.UUID] = None, nombre: Optional[str] = None
+) -> Optional[Medicamento]:
+    """Look a catalog entry up by id, or by case-insensitive name."""
+    if id_medicamento is not None:
+        return db.get(Medicamento, id_medicamento)
+    if nombre and nombre.strip():
+        return db.scalars(
+            select(Medicamento).where(func.lower(Medicamento.nombre) == nombre.strip().lower())
+        ).first()
+    return None
+
+
+def apply_withdrawal(db: Session, registro: RegistroSalud) -> Optional[Medicamento]:
+    """Compute the withdrawal end dates of *registro* from the catalog.
+
+    Raises :class:`ValueError` when an explicit ``id_medicamento`` is unknown;
+    free-text medications missing from the catalog carry no withdrawal.
+    """
+    medicamento = find_medicamento(db, registro.id_medicamento, registro.medicamento)
+    if medicamento is None:
+        if registro.id_medicamento is not None:
+            raise ValueError(f"Medicamento {registro.id_medicamento} no existe")
+        return None
+    registro.aplicar_retiro(medicamento)
+    return medicamento
+
+
+def under_withdrawal(fecha: Optional[date] = None) -> ColumnElement[bool]:
+    """``EXISTS`` clause, correlated to ``vacas``, for a meat withdrawal in force."""
+    return exists().where(
+        RegistroSalud.id_vaca == Vaca.id,
+        RegistroSalud.fecha_fin_retiro >= (fecha or func.current_date()),
+    )
+
+
+def list_under_withdrawal(
+    db: Session, id_usuario: uuid.UUID, fecha: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """Animals of *id_usuario* that cannot be sold or milked on *fecha* (today by default)."""
+    fecha = fecha or date.today()
+    carne = RegistroSalud.fecha_fin_retiro
+    leche = RegistroSalud.fecha_fin_retiro_leche
+    vigentes = (
+        select(
+            RegistroSalud.id_vaca,
+            func.max(case((carne >= fecha, carne))).label("retiro_carne_hasta"),
+            func.max(case((leche >= fecha, leche))).label("retiro_leche_hasta"),
+        )
+        .where(RegistroSalud.id_usuario == id_usuario, or_(carne >= fecha, leche >= fecha))
+        .group_by(RegistroSalud.id_vaca)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Vaca.id,
+            Vaca.identificador,
+            Vaca.nombre,
+            Vaca.estado,
+            vigentes.c.retiro_carne_hasta,
+            vigentes.c.retiro_leche_hasta,
+        )
+        .join(vigentes, vigentes.c.id_vaca == Vaca.id)
+        .order_by(Vaca.identificador)
+    )
+    return [row._asdict() for row in db.execute(stmt)]
+
+
+__all__ = ["apply_withdrawal", "find_medicamento", "list_under_withdrawal", "under_withdrawal"]